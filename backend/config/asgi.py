@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Con ASGI la validación asíncrona (``/api/codigos-qr/validar-async/``) no
+ocupa un hilo por escaneo; el resto de vistas (síncronas) siguen funcionando.
+Ejemplo: ``uvicorn config.asgi:application --workers 2``. Bajo ASGI usa
+``DB_CONN_MAX_AGE=0``: las conexiones persistentes no se reutilizan entre
+peticiones asíncronas.
 """
 
 import os
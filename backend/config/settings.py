@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 from decouple import config, Csv
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,12 +45,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir toda la cadena (ver /metrics)
+    'event_management.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Después de la autenticación: el perfilado bajo demanda es solo para staff
+    'event_management.perfilado.PerfiladoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,6 +93,9 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='3306'),
+        # Conexiones persistentes con chequeo de salud antes de reutilizarlas
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
@@ -100,9 +108,14 @@ DATABASES = {
         'PASSWORD': config('DB_RICA_PASSWORD'),
         'HOST': config('DB_RICA_HOST', default='localhost'),
         'PORT': config('DB_RICA_PORT', default='3306'),
+        'CONN_MAX_AGE': config('DB_RICA_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': True,
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
             'charset': 'utf8mb4',
+            # Fallar rápido si rica_univalle se pone lenta (segundos)
+            'connect_timeout': config('DB_RICA_CONNECT_TIMEOUT', default=3, cast=int),
+            'read_timeout': config('DB_RICA_READ_TIMEOUT', default=5, cast=int),
         },
     }
 }
@@ -110,6 +123,17 @@ DATABASES = {
 # Router para dirigir modelos a sus bases de datos
 DATABASE_ROUTERS = ['config.db_router.DatabaseRouter']
 
+# True si DB_RICA_* apunta a una copia local de rica_univalle (desarrollo o
+# pruebas de carga): seed_carga crea ahí los visitantes sintéticos
+RICA_COPIA_LOCAL = config('DB_RICA_LOCAL', default=False, cast=bool)
+
+# Lecturas resilientes de rica_univalle (ver event_management/resiliencia.py)
+RICA_CACHE_TTL = config('RICA_CACHE_TTL', default=30, cast=int)  # segundos de datos frescos
+RICA_CACHE_MAX_OBSOLETO = config('RICA_CACHE_MAX_OBSOLETO', default=3600, cast=int)  # segundos extra sirviendo datos viejos
+RICA_CIRCUITO_FALLOS = config('RICA_CIRCUITO_FALLOS', default=3, cast=int)  # fallos seguidos para abrir el circuito
+RICA_CIRCUITO_REINTENTO = config('RICA_CIRCUITO_REINTENTO', default=30, cast=int)  # segundos antes de volver a probar
+RICA_UMBRAL_LENTITUD = config('RICA_UMBRAL_LENTITUD', default=2.0, cast=float)  # consulta más lenta cuenta como fallo
+
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -155,16 +179,41 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
 ]
+# X-Estacion identifica el punto de escaneo en las validaciones; Idempotency-Key, las
+# peticiones de generación que se pueden repetir sin duplicar (ver idempotencia.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-estacion', 'idempotency-key')
 
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'DEFAULT_PAGINATION_CLASS': 'event_management.pagination.PaginacionConfigurable',
+    'PAGE_SIZE': 10,
+    # orjson para respuestas grandes; la API navegable sigue disponible en desarrollo
+    'DEFAULT_RENDERER_CLASSES': [
+        'event_management.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Caché (por defecto en memoria del proceso; usar un backend compartido en producción)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='refrigerios'),
+    }
 }
 
+# GET condicional y caché de listados (ver event_management/versiones.py)
+# 0 desactiva la caché por URL; el ETag siempre está activo
+CACHE_LISTADOS_SEGUNDOS = config('CACHE_LISTADOS_SEGUNDOS', default=0, cast=int)
+# La tabla visitantes es externa: su ETag se renueva cada N segundos
+VISITANTES_ETAG_SEGUNDOS = config('VISITANTES_ETAG_SEGUNDOS', default=60, cast=int)
+
+# Métricas Prometheus en /metrics; si se define un token se exige 'Authorization: Bearer <token>'
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
 # Media files (QR Codes)
 import os
 MEDIA_URL = '/media/'
@@ -174,6 +223,71 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Perfilado bajo demanda (ver event_management/perfilado.py)
+# 1 de cada N peticiones se perfila automáticamente (0 = solo bajo demanda)
+PERFILADO_MUESTREO = config('PERFILADO_MUESTREO', default=0, cast=int)
+PERFILADO_MAXIMO_ARCHIVOS = config('PERFILADO_MAXIMO_ARCHIVOS', default=200, cast=int)
+# Fuera de MEDIA_ROOT: en DEBUG los media se sirven sin autenticación y los
+# perfiles contienen SQL y URLs; solo se exponen por /api/perfiles/ (administradores)
+PERFILADO_DIRECTORIO = config('PERFILADO_DIRECTORIO', default=os.path.join(BASE_DIR, 'perfiles'))
+
+# Validación ligera (ver event_management/views_rapidas.py y config/wsgi.py):
+# esta ruta se atiende solo con VALIDACION_RAPIDA_MIDDLEWARE, sin sesiones,
+# CSRF, mensajes ni DRF
+VALIDACION_RAPIDA_RUTA = '/api/codigos-qr/validar-rapido/'
+VALIDACION_RAPIDA_MIDDLEWARE = [
+    'event_management.metricas.MetricasMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+]
+
+# Lecturas repetidas del mismo código en la misma estación dentro de esta
+# ventana (segundos) reciben el resultado de la primera (ver event_management/duplicados.py)
+VALIDACION_VENTANA_DUPLICADOS = config('VALIDACION_VENTANA_DUPLICADOS', default=2.0, cast=float)
+
+# Registro de intentos de canje (ver event_management/redenciones.py)
+# Se escriben en lotes de REDENCIONES_LOTE o cada REDENCIONES_INTERVALO segundos
+REDENCIONES_LOTE = config('REDENCIONES_LOTE', default=200, cast=int)
+REDENCIONES_INTERVALO = config('REDENCIONES_INTERVALO', default=2.0, cast=float)
+# Días con detalle por escaneo; los anteriores los consolida consolidar_redenciones
+REDENCIONES_DIAS_DETALLE = config('REDENCIONES_DIAS_DETALLE', default=7, cast=int)
+
+# Modo ticket (ver event_management/tickets.py): un código por visitante para
+# todas las comidas; la comida se elige al validar por la franja horaria local
+CODIGOS_MODO_TICKET = config('CODIGOS_MODO_TICKET', default=False, cast=bool)
+FRANJAS_COMIDAS = config(
+    'FRANJAS_COMIDAS', default='DESAYUNO=06:00-10:30,ALMUERZO=11:30-14:30,REFRIGERIO=15:00-18:00', cast=Csv()
+)
+
+# Contenido de los QR (ver event_management/qr_render.py): el UUID en base32
+# (26 caracteres) en lugar de su texto de 36; la validación acepta ambos
+QR_CARGA_COMPACTA = config('QR_CARGA_COMPACTA', default=False, cast=bool)
+
+# Generación de códigos: horas que se guardan las respuestas por Idempotency-Key
+# (ver event_management/idempotencia.py) y segundos tras los que un bloqueo de
+# la tabla Bloqueo se da por abandonado (solo BD sin GET_LOCK, ver bloqueos.py)
+IDEMPOTENCIA_HORAS = config('IDEMPOTENCIA_HORAS', default=24, cast=int)
+BLOQUEO_MAXIMO = config('BLOQUEO_MAXIMO', default=3600, cast=int)
+# Visitantes leídos y generados por bloque en generar_codigos_masivo
+GENERACION_MASIVA_LOTE = config('GENERACION_MASIVA_LOTE', default=200, cast=int)
+
+# Archivos JSONL.gz de los eventos archivados (ver event_management/archivo.py);
+# fuera de MEDIA_ROOT porque contienen datos personales
+EVENTOS_ARCHIVO_DIRECTORIO = config('EVENTOS_ARCHIVO_DIRECTORIO', default=os.path.join(BASE_DIR, 'archivo_eventos'))
+
+# Ritmo de canje en vivo (ver event_management/monitor.py): cada cuántos
+# segundos se recuentan los códigos pendientes por tipo de comida
+MONITOR_REFRESCO_PENDIENTES = config('MONITOR_REFRESCO_PENDIENTES', default=60, cast=int)
+
+# Exportación CSV/XLSX de códigos (ver event_management/exportacion.py):
+# filas leídas por consulta
+EXPORTACION_LOTE = config('EXPORTACION_LOTE', default=2000, cast=int)
+
+# Estaciones de escaneo (ver event_management/estaciones.py): la actividad se
+# vuelca a la BD cada ESTACIONES_INTERVALO segundos; sin escaneos ni latidos en
+# ESTACIONES_SIN_SENAL segundos la estación se muestra desconectada
+ESTACIONES_INTERVALO = config('ESTACIONES_INTERVALO', default=10.0, cast=float)
+ESTACIONES_SIN_SENAL = config('ESTACIONES_SIN_SENAL', default=60, cast=int)
+
 # Email Configuration (Gmail)
 EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')
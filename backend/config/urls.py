@@ -18,10 +18,12 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from event_management.metricas import metricas_prometheus
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('event_management.urls')),
+    path('metrics', metricas_prometheus, name='metricas'),
 ]
 
 # Servir archivos media en desarrollo
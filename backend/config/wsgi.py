@@ -5,6 +5,9 @@ It exposes the WSGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
+
+``VALIDACION_RAPIDA_RUTA`` se despacha a ``ManejadorValidacion``, que la
+atiende con un middleware mínimo; el resto va a la aplicación de Django.
 """
 
 import os
@@ -13,4 +16,16 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_wsgi_application()
+aplicacion_django = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402 (después de configurar Django)
+from event_management.views_rapidas import ManejadorValidacion  # noqa: E402
+
+aplicacion_validacion = ManejadorValidacion()
+RUTA_VALIDACION = settings.VALIDACION_RAPIDA_RUTA
+
+
+def application(environ, start_response):
+    if environ.get('PATH_INFO') == RUTA_VALIDACION:
+        return aplicacion_validacion(environ, start_response)
+    return aplicacion_django(environ, start_response)
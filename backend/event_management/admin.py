@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Estudiante, CodigoQR
+from .models import Estudiante, CodigoQR, ConsumoTicket, Estacion, Evento, Redencion, ResumenRedencionDiario, Titular
+from .pagination import PaginadorEstimado
+from .validacion import normalizar_codigo
 
 
 @admin.register(Estudiante)
@@ -10,14 +12,96 @@ class EstudianteAdmin(admin.ModelAdmin):
     ordering = ['nombre']
 
 
+@admin.register(Evento)
+class EventoAdmin(admin.ModelAdmin):
+    list_display = ['nombre', 'fecha', 'activo', 'archivado', 'codigos_archivados', 'fecha_creacion']
+    list_filter = ['activo', 'archivado']
+    search_fields = ['nombre']
+    # El archivo lo gestiona el comando archivar_evento
+    readonly_fields = ['archivado', 'archivo', 'codigos_archivados', 'fecha_creacion']
+
+
+class ConsumoTicketInline(admin.TabularInline):
+    """Comidas servidas con un código en modo ticket"""
+    model = ConsumoTicket
+    fields = ['tipo_comida', 'fecha']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(CodigoQR)
 class CodigoQRAdmin(admin.ModelAdmin):
-    list_display = ['estudiante', 'tipo_comida', 'codigo', 'usado', 'fecha_creacion', 'fecha_uso']
-    list_filter = ['tipo_comida', 'usado', 'fecha_creacion']
-    search_fields = ['estudiante__nombre', 'codigo']
+    """
+    Pensado para cientos de miles de filas: solo el JOIN al titular (sin
+    Estudiante), filtros y búsquedas por prefijo sobre columnas indexadas,
+    orden por PK y sin el COUNT(*) del total sin filtrar.
+    """
+    list_display = ['titular__nombre', 'titular__documento', 'tipo_comida', 'codigo', 'usado', 'fecha_creacion', 'fecha_uso']
+    list_select_related = ['titular']
+    list_filter = ['evento', 'tipo_comida', 'usado']
+    search_fields = ['^titular__documento', '^titular__email', '^titular__nombre']
+    search_help_text = 'Identificación, email o nombre (por el inicio), o el código QR completo'
     readonly_fields = ['codigo', 'fecha_creacion', 'fecha_uso']
-    ordering = ['estudiante', 'tipo_comida']
-    
+    raw_id_fields = ['estudiante', 'titular']
+    inlines = [ConsumoTicketInline]
+    ordering = ['-id']
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+
     def has_add_permission(self, request):
         # Los códigos QR se crean automáticamente, no manualmente
         return False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Un código escaneado o pegado se busca por igualdad en el índice único
+        codigo_uuid = normalizar_codigo(search_term) if search_term else None
+        if codigo_uuid is not None:
+            return queryset.filter(codigo=codigo_uuid), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(Titular)
+class TitularAdmin(admin.ModelAdmin):
+    """Corregir aquí un nombre o email lo cambia en todos los códigos de la persona"""
+    list_display = ['nombre', 'documento', 'email']
+    search_fields = ['^documento', '^email', '^nombre']
+    ordering = ['-id']
+
+
+@admin.register(Estacion)
+class EstacionAdmin(admin.ModelAdmin):
+    list_display = ['identificador', 'nombre', 'escaneos', 'errores', 'ultimo_escaneo', 'ultimo_latido']
+    search_fields = ['identificador', 'nombre']
+    # Los contadores y la actividad los escribe estaciones.agregador_estaciones
+    readonly_fields = ['escaneos', 'errores', 'ultimo_escaneo', 'ultimo_latido', 'fecha_registro']
+
+
+@admin.register(Redencion)
+class RedencionAdmin(admin.ModelAdmin):
+    list_display = ['fecha', 'codigo', 'resultado', 'tipo_comida', 'estacion']
+    list_filter = ['resultado', 'tipo_comida', 'estacion']
+    search_fields = ['=codigo']
+    ordering = ['-id']
+
+    def has_add_permission(self, request):
+        # Registro de solo inserción desde las vistas de validación
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumenRedencionDiario)
+class ResumenRedencionDiarioAdmin(admin.ModelAdmin):
+    list_display = ['dia', 'estacion', 'tipo_comida', 'resultado', 'total']
+    list_filter = ['dia', 'resultado', 'tipo_comida', 'estacion']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
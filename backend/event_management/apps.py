@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EventManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'event_management'
+
+    def ready(self):
+        # Registrar los receptores de señales (invalidación de listados, estadísticas de conexiones)
+        from . import signals  # noqa: F401
@@ -0,0 +1,84 @@
+"""
+Archivo en frío de eventos terminados.
+
+``archivar_evento`` escribe los códigos de un evento en un JSONL.gz (una fila
+por línea, con la misma forma que devuelve ``CodigoQRSerializer``) y después
+los borra de ``CodigoQR``; los tickets llevan además ``consumos`` (comida ->
+fecha). ``buscar_archivados`` recorre ese archivo en
+streaming para las consultas de solo lectura sobre eventos pasados.
+"""
+import gzip
+import json
+import os
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CodigoQR, ConsumoTicket
+from .serializers import CodigoQRSerializer, fecha_iso
+
+# Filtros de la consulta de códigos de un evento: parámetro -> (campo en la
+# tabla CodigoQR, clave de la fila serializada en el archivo)
+FILTROS_ARCHIVO = {
+    'codigo': ('codigo', 'codigo'),
+    'email': ('titular__email', 'visitante_email'),
+    'identificacion': ('titular__documento', 'visitante_identificacion'),
+}
+
+
+def ruta_archivo(evento):
+    return os.path.join(settings.EVENTOS_ARCHIVO_DIRECTORIO, f'evento-{evento.pk}.jsonl.gz')
+
+
+def escribir_archivo(evento, lote=5000):
+    """
+    Vuelca los códigos del evento a su JSONL.gz; retorna (ruta, filas escritas).
+    Se escribe en un temporal y se renombra: nunca queda un archivo a medias.
+    """
+    valores = CodigoQRSerializer.valores_rapidos
+    columnas = list(dict.fromkeys(c for columnas, _ in valores.values() for c in columnas))
+    conversores = [(campo, convertir) for campo, (_, convertir) in valores.items()]
+    zona = timezone.get_current_timezone()
+
+    ruta = ruta_archivo(evento)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f'{ruta}.tmp'
+    filas = CodigoQR.objects.filter(evento=evento).order_by('id').values(*columnas)
+    # Ambos ordenados por código: los consumos se emparejan sin cargarlos en memoria
+    consumos = (
+        ConsumoTicket.objects.filter(codigo__evento=evento).order_by('codigo_id', 'fecha')
+        .values_list('codigo_id', 'tipo_comida', 'fecha').iterator(chunk_size=lote)
+    )
+    consumo = next(consumos, None)
+    total = 0
+    with gzip.open(temporal, 'wt', encoding='utf-8') as archivo:
+        for fila in filas.iterator(chunk_size=lote):
+            datos = {campo: convertir(fila, zona) for campo, convertir in conversores}
+            if fila['tipo_comida'] == CodigoQR.TICKET:
+                datos['consumos'] = {}
+                while consumo is not None and consumo[0] <= fila['id']:
+                    if consumo[0] == fila['id']:
+                        datos['consumos'][consumo[1]] = fecha_iso(consumo[2], zona)
+                    consumo = next(consumos, None)
+            archivo.write(json.dumps(datos, ensure_ascii=False))
+            archivo.write('\n')
+            total += 1
+    os.replace(temporal, ruta)
+    return ruta, total
+
+
+def leer_archivo(ruta):
+    with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+        for linea in archivo:
+            yield json.loads(linea)
+
+
+def buscar_archivados(evento, filtros, limite=100):
+    """Filas del archivo del evento que cumplen todos los ``filtros`` (campo -> valor)"""
+    encontrados = []
+    for fila in leer_archivo(evento.archivo):
+        if all(str(fila.get(campo) or '').lower() == valor.lower() for campo, valor in filtros.items()):
+            encontrados.append(fila)
+            if len(encontrados) >= limite:
+                break
+    return encontrados
@@ -0,0 +1,66 @@
+"""
+Bloqueos con nombre entre procesos (workers de gunicorn, comandos).
+
+En MySQL se usa ``GET_LOCK`` y en PostgreSQL ``pg_try_advisory_lock``: los
+libera la BD aunque el proceso muera. En otras BD (SQLite en desarrollo) se
+inserta una fila en ``Bloqueo``, única por nombre; una fila más vieja que
+``BLOQUEO_MAXIMO`` segundos se considera de un proceso caído y se reemplaza.
+"""
+import zlib
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from .models import Bloqueo
+
+GENERACION_MASIVA = 'generacion_masiva'
+
+
+def _adquirir(nombre, alias):
+    conexion = connections[alias]
+    if conexion.vendor == 'mysql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT GET_LOCK(%s, 0)', [nombre])
+            return cursor.fetchone()[0] == 1
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [zlib.crc32(nombre.encode())])
+            return cursor.fetchone()[0]
+
+    vencido = timezone.now() - timedelta(seconds=settings.BLOQUEO_MAXIMO)
+    Bloqueo.objects.using(alias).filter(nombre=nombre, fecha__lt=vencido).delete()
+    try:
+        with transaction.atomic(using=alias):
+            Bloqueo.objects.using(alias).create(nombre=nombre)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _liberar(nombre, alias):
+    conexion = connections[alias]
+    if conexion.vendor == 'mysql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT RELEASE_LOCK(%s)', [nombre])
+    elif conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [zlib.crc32(nombre.encode())])
+    else:
+        Bloqueo.objects.using(alias).filter(nombre=nombre).delete()
+
+
+@contextmanager
+def bloqueo_exclusivo(nombre, alias='default'):
+    """
+    Intenta tomar el bloqueo ``nombre`` sin esperar; produce True si se obtuvo
+    (y lo libera al salir) o False si otro proceso lo tiene.
+    """
+    obtenido = _adquirir(nombre, alias)
+    try:
+        yield obtenido
+    finally:
+        if obtenido:
+            _liberar(nombre, alias)
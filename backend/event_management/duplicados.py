@@ -0,0 +1,134 @@
+"""
+Coalescencia de escaneos duplicados (*single-flight*).
+
+Los lectores suelen enviar el mismo código dos o tres veces en pocos
+milisegundos. Las vistas de validación canjean a través de
+``escaneos.ejecutar`` / ``escaneos.aejecutar`` con la clave (código,
+estación): la primera copia consulta la BD, las concurrentes esperan su
+resultado y las que llegan dentro de ``VALIDACION_VENTANA_DUPLICADOS``
+segundos reciben el resultado guardado. Una lectura física = una consulta.
+Sin estación la clave no distingue entre puertas: esos escaneos solo se
+agrupan mientras la primera copia está en curso (``ventana=0``).
+
+Es por proceso: con varios workers, un duplicado que cae en otro proceso se
+valida por su cuenta (y recibe "ya utilizado").
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+
+class _Vuelo:
+    """Una ejecución en curso o terminada para una clave"""
+
+    __slots__ = ('listo', 'resultado', 'fallido', 'expira', 'esperas')
+
+    def __init__(self):
+        self.listo = threading.Event()
+        self.resultado = None
+        self.fallido = False
+        self.expira = None
+        # Futuros de las esperas asíncronas: (loop, futuro)
+        self.esperas = []
+
+
+def _resolver(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+class VueloUnico:
+    """Agrupa las llamadas con la misma clave en una sola ejecución"""
+
+    def __init__(self, ventana, espera_maxima=30.0):
+        self.ventana = ventana
+        # Si la primera copia no termina en este tiempo, las demás se ejecutan solas
+        self.espera_maxima = espera_maxima
+        self.coalescidos = 0
+        self._vuelos = {}
+        # (expiración, clave, vuelo) en orden de finalización
+        self._caducidad = deque()
+        self._lock = threading.Lock()
+
+    def _tomar(self, clave):
+        """Retorna (vuelo, es_la_primera_copia)"""
+        ahora = time.monotonic()
+        with self._lock:
+            while self._caducidad and self._caducidad[0][0] <= ahora:
+                _, vieja, vuelo = self._caducidad.popleft()
+                if self._vuelos.get(vieja) is vuelo:
+                    del self._vuelos[vieja]
+            vuelo = self._vuelos.get(clave)
+            if vuelo is not None and (vuelo.expira is None or vuelo.expira > ahora):
+                self.coalescidos += 1
+                return vuelo, False
+            vuelo = self._vuelos[clave] = _Vuelo()
+            return vuelo, True
+
+    def _terminar(self, clave, vuelo, resultado, fallido, ventana):
+        if ventana is None:
+            ventana = self.ventana
+        with self._lock:
+            vuelo.resultado = resultado
+            vuelo.fallido = fallido
+            if fallido or ventana <= 0:
+                # Los errores no se guardan: la próxima copia lo intenta de nuevo
+                if self._vuelos.get(clave) is vuelo:
+                    del self._vuelos[clave]
+            else:
+                vuelo.expira = time.monotonic() + ventana
+                self._caducidad.append((vuelo.expira, clave, vuelo))
+            vuelo.listo.set()
+            esperas, vuelo.esperas = vuelo.esperas, []
+        for loop, futuro in esperas:
+            loop.call_soon_threadsafe(_resolver, futuro)
+
+    def ejecutar(self, clave, funcion, ventana=None):
+        """
+        Retorna (resultado, repetido); ``repetido`` indica que se reutilizó otra
+        ejecución. ``ventana`` reemplaza la de la instancia para esta llamada.
+        """
+        vuelo, primera = self._tomar(clave)
+        if not primera:
+            if vuelo.listo.wait(self.espera_maxima) and not vuelo.fallido:
+                return vuelo.resultado, True
+            return funcion(), False
+        try:
+            resultado = funcion()
+        except BaseException:
+            self._terminar(clave, vuelo, None, True, ventana)
+            raise
+        self._terminar(clave, vuelo, resultado, False, ventana)
+        return resultado, False
+
+    async def aejecutar(self, clave, funcion, ventana=None):
+        """Versión asíncrona de ``ejecutar``; ``funcion`` retorna una corutina"""
+        vuelo, primera = self._tomar(clave)
+        if not primera:
+            futuro = None
+            with self._lock:
+                if not vuelo.listo.is_set():
+                    loop = asyncio.get_running_loop()
+                    futuro = loop.create_future()
+                    vuelo.esperas.append((loop, futuro))
+            if futuro is not None:
+                try:
+                    await asyncio.wait_for(futuro, self.espera_maxima)
+                except asyncio.TimeoutError:
+                    pass
+            if vuelo.listo.is_set() and not vuelo.fallido:
+                return vuelo.resultado, True
+            return await funcion(), False
+        try:
+            resultado = await funcion()
+        except BaseException:
+            self._terminar(clave, vuelo, None, True, ventana)
+            raise
+        self._terminar(clave, vuelo, resultado, False, ventana)
+        return resultado, False
+
+
+escaneos = VueloUnico(settings.VALIDACION_VENTANA_DUPLICADOS)
@@ -0,0 +1,159 @@
+"""
+Actividad en vivo de las estaciones de escaneo.
+
+``agregador_estaciones`` lleva en memoria, por estación, los escaneos y
+rechazos de los últimos minutos (``monitor.VentanaDeslizante``) y la última
+vez que se la vio. Lo alimentan ``redenciones.registrar`` (cada escaneo con
+``X-Estacion``) y el endpoint de latido, sin consultas. Un hilo vuelca cada
+``ESTACIONES_INTERVALO`` segundos los totales acumulados y la última actividad
+en ``Estacion``, dando de alta las estaciones nuevas.
+
+Los ritmos son por proceso; los totales y la última actividad en la BD suman
+todos los procesos.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections
+from django.db.models import F
+
+from .models import Estacion
+from .monitor import VentanaDeslizante
+
+logger = logging.getLogger(__name__)
+
+
+class _Actividad:
+    __slots__ = ('escaneos', 'errores', 'escaneos_pendientes', 'errores_pendientes',
+                 'ultimo_escaneo', 'ultimo_latido', 'sin_volcar')
+
+    def __init__(self):
+        self.escaneos = VentanaDeslizante()
+        self.errores = VentanaDeslizante()
+        self.escaneos_pendientes = 0
+        self.errores_pendientes = 0
+        self.ultimo_escaneo = None
+        self.ultimo_latido = None
+        self.sin_volcar = False
+
+
+def _fecha(marca):
+    return datetime.fromtimestamp(marca, tz=dt_timezone.utc) if marca else None
+
+
+class AgregadorEstaciones:
+    """Escaneos, rechazos y última actividad por estación, volcados a la BD por lotes"""
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._actividad = {}
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def _de(self, estacion):
+        actividad = self._actividad.get(estacion)
+        if actividad is None:
+            actividad = self._actividad[estacion] = _Actividad()
+        return actividad
+
+    def _asegurar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            with self._lock:
+                if self._hilo is None or not self._hilo.is_alive():
+                    self._hilo = threading.Thread(target=self._bucle, name='estaciones', daemon=True)
+                    self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            time.sleep(self.intervalo)
+            self.vaciar()
+
+    def registrar_escaneo(self, estacion, exito):
+        ahora = time.time()
+        with self._lock:
+            actividad = self._de(estacion)
+            actividad.escaneos.registrar(ahora)
+            actividad.escaneos_pendientes += 1
+            if not exito:
+                actividad.errores.registrar(ahora)
+                actividad.errores_pendientes += 1
+            actividad.ultimo_escaneo = ahora
+            actividad.sin_volcar = True
+        self._asegurar_hilo()
+
+    def registrar_latido(self, estacion):
+        with self._lock:
+            actividad = self._de(estacion)
+            actividad.ultimo_latido = time.time()
+            actividad.sin_volcar = True
+        self._asegurar_hilo()
+
+    def en_vivo(self, estacion):
+        """Ritmo del último minuto y última actividad vista por este proceso (None si no hay)"""
+        ahora = time.time()
+        with self._lock:
+            actividad = self._actividad.get(estacion)
+            if actividad is None:
+                return None
+            escaneos = actividad.escaneos.totales(ahora)['ultimo_minuto']
+            errores = actividad.errores.totales(ahora)['ultimo_minuto']
+            ultimo = max(actividad.ultimo_escaneo or 0, actividad.ultimo_latido or 0)
+        return {
+            'escaneos_por_seg': round(escaneos / 60, 2),
+            'escaneos_ultimo_minuto': escaneos,
+            'tasa_error': round(errores / escaneos, 3) if escaneos else 0.0,
+            'ultimo_visto': _fecha(ultimo),
+        }
+
+    def vaciar(self):
+        """Vuelca a ``Estacion`` lo acumulado desde el último volcado; retorna las estaciones escritas"""
+        with self._lock:
+            pendientes = []
+            for estacion, actividad in self._actividad.items():
+                if not actividad.sin_volcar:
+                    continue
+                pendientes.append((
+                    estacion, actividad.escaneos_pendientes, actividad.errores_pendientes,
+                    actividad.ultimo_escaneo, actividad.ultimo_latido,
+                ))
+                actividad.escaneos_pendientes = actividad.errores_pendientes = 0
+                actividad.sin_volcar = False
+        if not pendientes:
+            return 0
+
+        close_old_connections()
+        escritas = 0
+        for estacion, escaneos, errores, ultimo_escaneo, ultimo_latido in pendientes:
+            cambios = {'escaneos': F('escaneos') + escaneos, 'errores': F('errores') + errores}
+            if ultimo_escaneo:
+                cambios['ultimo_escaneo'] = _fecha(ultimo_escaneo)
+            if ultimo_latido:
+                cambios['ultimo_latido'] = _fecha(ultimo_latido)
+            try:
+                if not Estacion.objects.filter(identificador=estacion).update(**cambios):
+                    try:
+                        Estacion.objects.create(
+                            identificador=estacion, escaneos=escaneos, errores=errores,
+                            ultimo_escaneo=_fecha(ultimo_escaneo), ultimo_latido=_fecha(ultimo_latido),
+                        )
+                    except IntegrityError:
+                        # Otro proceso la dio de alta a la vez
+                        Estacion.objects.filter(identificador=estacion).update(**cambios)
+                escritas += 1
+            except DatabaseError as e:
+                logger.warning('No se pudo guardar la actividad de la estación %s: %s', estacion, e)
+                with self._lock:
+                    # Reintentar en el próximo volcado
+                    actividad = self._de(estacion)
+                    actividad.escaneos_pendientes += escaneos
+                    actividad.errores_pendientes += errores
+                    actividad.sin_volcar = True
+        return escritas
+
+
+agregador_estaciones = AgregadorEstaciones(settings.ESTACIONES_INTERVALO)
+atexit.register(agregador_estaciones.vaciar)
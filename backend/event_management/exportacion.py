@@ -0,0 +1,96 @@
+"""
+Exportación de códigos QR a CSV o XLSX sin cargar el reporte en memoria.
+
+Las filas se leen por lotes de ``EXPORTACION_LOTE`` con ``values_list`` y
+paginación por PK (``id > último``): cada lote es una consulta corta y en
+memoria solo hay uno a la vez, también en MySQL, cuyo cursor normal trae el
+resultado completo al cliente. Las columnas se convierten con los
+``valores_rapidos`` de ``CodigoQRSerializer``, así que coinciden con el API.
+
+El CSV se envía con ``StreamingHttpResponse`` a medida que se lee: la
+descarga empieza con el primer lote. El XLSX necesita ``xlsxwriter``
+(opcional) y, como un .xlsx es un zip que solo se cierra al final, se
+escribe en modo ``constant_memory`` a un archivo temporal que luego se envía.
+"""
+import csv
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from .serializers import CodigoQRSerializer
+
+# Columnas por defecto (sin los duplicados de compatibilidad del API)
+COLUMNAS_EXPORTACION = [
+    'id', 'evento', 'visitante_nombre', 'visitante_identificacion', 'visitante_email',
+    'tipo_comida', 'codigo', 'usado', 'fecha_creacion', 'fecha_uso',
+]
+
+FORMATOS = ('csv', 'xlsx')
+
+
+def filas(queryset, campos):
+    """Genera las filas (listas en el orden de ``campos``) leyendo por lotes de PK"""
+    valores = CodigoQRSerializer.valores_rapidos
+    columnas = list(dict.fromkeys(
+        ['id'] + [columna for campo in campos for columna in valores[campo][0]]
+    ))
+    conversores = [valores[campo][1] for campo in campos]
+    zona = timezone.get_current_timezone()
+    lote = settings.EXPORTACION_LOTE
+
+    ultimo = 0
+    while True:
+        bloque = list(
+            queryset.filter(pk__gt=ultimo).order_by('pk').values_list(*columnas)[:lote]
+        )
+        for tupla in bloque:
+            fila = dict(zip(columnas, tupla))
+            yield [convertir(fila, zona) for convertir in conversores]
+        if len(bloque) < lote:
+            return
+        ultimo = bloque[-1][0]
+
+
+class _Eco:
+    """Archivo falso para ``csv.writer``: devuelve lo escrito en lugar de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def respuesta_csv(queryset, campos, nombre):
+    escritor = csv.writer(_Eco())
+
+    def contenido():
+        # BOM para que Excel abra el archivo como UTF-8
+        yield '\ufeff' + escritor.writerow(campos)
+        for fila in filas(queryset, campos):
+            yield escritor.writerow(['' if valor is None else valor for valor in fila])
+
+    response = StreamingHttpResponse(contenido(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+    return response
+
+
+def respuesta_xlsx(queryset, campos, nombre):
+    """Respuesta XLSX o None si ``xlsxwriter`` no está instalado"""
+    try:
+        import xlsxwriter
+    except ImportError:
+        return None
+
+    # Se borra al cerrarlo, es decir, cuando FileResponse termina de enviarlo
+    temporal = tempfile.TemporaryFile(suffix='.xlsx')
+    libro = xlsxwriter.Workbook(temporal, {'constant_memory': True, 'tmpdir': tempfile.gettempdir()})
+    hoja = libro.add_worksheet('Códigos')
+    hoja.write_row(0, 0, campos, libro.add_format({'bold': True}))
+    for numero, fila in enumerate(filas(queryset, campos), start=1):
+        hoja.write_row(numero, 0, fila)
+    libro.close()
+    temporal.seek(0)
+    return FileResponse(
+        temporal, as_attachment=True, filename=f'{nombre}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
@@ -0,0 +1,87 @@
+"""
+Generación de códigos QR para visitantes de rica_univalle.
+
+Compartido por las acciones ``generar_codigos`` / ``generar_codigos_masivo``
+de ``VisitanteViewSet`` y por los comandos ``generar_codigos_shard`` y
+``benchmark_generacion``.
+"""
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import CodigoQR, Titular, evento_activo_id
+from .tickets import tipos_a_generar
+
+TIPOS_COMIDA = ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO']
+
+
+class SinEventoActivo(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'No hay un evento activo. Activa uno en el admin antes de generar códigos.'
+    default_code = 'sin_evento_activo'
+
+
+def evento_para_generar():
+    """PK del evento activo donde generar códigos; sin evento activo lanza ``SinEventoActivo``"""
+    evento_id = evento_activo_id()
+    if evento_id is None:
+        raise SinEventoActivo()
+    return evento_id
+
+
+class VisitanteEmail:
+    """Adapta un Visitante a la interfaz de estudiante que espera ``email_utils``"""
+
+    def __init__(self, v):
+        self.nombre = v.nombre_completo
+        self.email = email_visitante(v)
+        self.identificacion = v.documento
+
+
+def email_visitante(visitante):
+    """Email con el que se registran los códigos (uno ficticio si el visitante no tiene)"""
+    return visitante.email or f'{visitante.documento}@noemail.com'
+
+
+def visitantes_sin_codigos(visitantes):
+    """
+    Los de ``visitantes`` que no tienen códigos en el evento activo (por email o
+    documento), con una sola consulta para todo el bloque
+    """
+    emails = [email_visitante(v) for v in visitantes]
+    documentos = [v.documento for v in visitantes]
+    existentes = CodigoQR.objects.del_evento_activo().filter(
+        Q(titular__email__in=emails) | Q(titular__documento__in=documentos)
+    ).values_list('titular__email', 'titular__documento')
+    con_emails, con_documentos = set(), set()
+    for email, documento in existentes:
+        con_emails.add(email.lower())
+        con_documentos.add(documento)
+    return [
+        v for v, email in zip(visitantes, emails)
+        if email.lower() not in con_emails and v.documento not in con_documentos
+    ]
+
+
+def crear_codigos_visitante(visitante, evento_id=None):
+    """
+    Crea los códigos QR de un visitante en el evento activo: uno por comida
+    (desayuno, almuerzo, refrigerio), o un solo ticket con CODIGOS_MODO_TICKET
+    """
+    if evento_id is None:
+        evento_id = evento_activo_id()
+    titular = titular_visitante(visitante)
+    return [
+        CodigoQR.objects.create(evento_id=evento_id, titular=titular, tipo_comida=tipo)
+        for tipo in tipos_a_generar()
+    ]
+
+
+def titular_visitante(visitante):
+    """Titular del visitante, con el nombre y documento actuales de rica_univalle"""
+    return Titular.objects.registrar(*datos_titular(visitante))
+
+
+def datos_titular(visitante):
+    """Tupla (email, nombre, documento) para ``Titular.objects.registrar_varios``"""
+    return email_visitante(visitante), visitante.nombre_completo, visitante.documento
@@ -0,0 +1,140 @@
+"""
+Peticiones idempotentes con la cabecera ``Idempotency-Key``.
+
+``idempotente`` envuelve una acción de DRF: la primera petición con una clave
+registra una ``SolicitudIdempotente`` en curso (la restricción única sobre
+clave y ruta impide que dos workers la procesen a la vez) y al terminar
+guarda el código y el cuerpo de la respuesta. Una repetición recibe:
+
+- la respuesta guardada, con ``Idempotent-Replayed: true``, si ya terminó;
+- 409 con el estado de la solicitud original si sigue en curso;
+- 422 si trae la misma clave con otro cuerpo.
+
+Las respuestas 5xx, las 409 (p. ej. otra generación masiva en curso) y las
+excepciones no se guardan: se puede reintentar con la misma clave. Las claves caducan a las ``IDEMPOTENCIA_HORAS`` horas.
+Sin la cabecera la acción se ejecuta como siempre.
+
+Con una respuesta NDJSON en streaming la solicitud sigue en curso mientras se
+envía y, al cerrarse, se guarda su última línea si es ``{"tipo": "fin", ...}``:
+la repetición recibe esa línea como JSON. Si termina en ``error`` o el cliente
+se desconecta antes del final, no se guarda.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import SolicitudIdempotente
+
+LARGO_MAXIMO_CLAVE = 100
+
+
+def _huella(request):
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def _estado(solicitud):
+    return {
+        'estado': solicitud.estado.lower(),
+        'clave': solicitud.clave,
+        'inicio': timezone.localtime(solicitud.fecha_creacion),
+        'mensaje': 'La solicitud con esta clave aún se está procesando.',
+    }
+
+
+def idempotente(vista):
+    """Decorador para acciones de ViewSet; ver el docstring del módulo"""
+    @wraps(vista)
+    def envoltura(self, request, *args, **kwargs):
+        clave = request.headers.get('Idempotency-Key', '').strip()
+        if not clave:
+            return vista(self, request, *args, **kwargs)
+        if len(clave) > LARGO_MAXIMO_CLAVE:
+            return Response(
+                {'error': f'Idempotency-Key admite hasta {LARGO_MAXIMO_CLAVE} caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ahora = timezone.now()
+        SolicitudIdempotente.objects.filter(fecha_creacion__lt=ahora - timedelta(hours=settings.IDEMPOTENCIA_HORAS)).delete()
+        huella = _huella(request)
+        try:
+            with transaction.atomic():
+                solicitud = SolicitudIdempotente.objects.create(clave=clave, ruta=request.path, huella=huella)
+        except IntegrityError:
+            previa = SolicitudIdempotente.objects.filter(clave=clave, ruta=request.path).first()
+            if previa is None:
+                # Se borró entre el INSERT y la lectura (caducó o falló): reintentar
+                return envoltura(self, request, *args, **kwargs)
+            if previa.huella != huella:
+                return Response(
+                    {'error': 'Idempotency-Key ya se usó con otro cuerpo de petición'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if previa.estado == SolicitudIdempotente.EN_CURSO:
+                return Response(_estado(previa), status=status.HTTP_409_CONFLICT)
+            return Response(previa.respuesta, status=previa.codigo_estado, headers={'Idempotent-Replayed': 'true'})
+
+        try:
+            response = vista(self, request, *args, **kwargs)
+        except BaseException:
+            solicitud.delete()
+            raise
+        if response.status_code >= 500 or response.status_code == status.HTTP_409_CONFLICT:
+            solicitud.delete()
+            return response
+        if isinstance(response, StreamingHttpResponse):
+            # Se completa (o se libera) cuando el servidor cierra la respuesta
+            response.streaming_content = _RegistroAlCerrar(response.streaming_content, solicitud, response.status_code)
+            return response
+        if not hasattr(response, 'data'):
+            solicitud.delete()
+            return response
+
+        _completar(solicitud, response.status_code, response.data)
+        return response
+    return envoltura
+
+
+def _completar(solicitud, codigo_estado, respuesta):
+    solicitud.estado = SolicitudIdempotente.COMPLETADA
+    solicitud.codigo_estado = codigo_estado
+    solicitud.respuesta = respuesta
+    solicitud.fecha_fin = timezone.now()
+    solicitud.save(update_fields=['estado', 'codigo_estado', 'respuesta', 'fecha_fin'])
+
+
+class _RegistroAlCerrar:
+    """
+    Envuelve el cuerpo NDJSON recordando la última línea; ``close`` (que el
+    servidor llama siempre, aunque no se haya leído nada) guarda la línea
+    ``fin`` como respuesta o borra la solicitud
+    """
+
+    def __init__(self, contenido, solicitud, codigo_estado):
+        self.contenido = contenido
+        self.solicitud = solicitud
+        self.codigo_estado = codigo_estado
+        self.ultima = None
+
+    def __iter__(self):
+        for linea in self.contenido:
+            self.ultima = linea
+            yield linea
+
+    def close(self):
+        try:
+            datos = json.loads(self.ultima) if self.ultima else None
+        except ValueError:
+            datos = None
+        if isinstance(datos, dict) and datos.get('tipo') == 'fin':
+            _completar(self.solicitud, self.codigo_estado, datos)
+        else:
+            self.solicitud.delete()
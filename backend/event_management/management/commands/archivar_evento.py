@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from event_management.archivo import escribir_archivo
+from event_management.models import CodigoQR, Evento
+import os
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva un evento terminado: escribe sus códigos QR en un JSONL.gz '
+        '(EVENTOS_ARCHIVO_DIRECTORIO) y los borra de la tabla. El archivo se sigue '
+        'consultando en /api/eventos/<id>/codigos/.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('evento', help='ID o nombre del evento')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas leídas y borradas por consulta')
+        parser.add_argument('--dry-run', action='store_true', help='Solo contar los códigos que se archivarían')
+
+    def handle(self, *args, **options):
+        evento = self._buscar(options['evento'])
+        if evento.activo:
+            raise CommandError(f'"{evento.nombre}" es el evento activo; activa otro antes de archivarlo')
+
+        pendientes = CodigoQR.objects.filter(evento=evento)
+        if options['dry_run']:
+            self.stdout.write(f'[DRY] Se archivarían {pendientes.count()} códigos de "{evento.nombre}"')
+            return
+
+        # Reanudación: si ya se escribió el archivo solo falta terminar el borrado
+        if not (evento.archivado and evento.archivo and os.path.exists(evento.archivo)):
+            ruta, total = escribir_archivo(evento, options['lote'])
+            evento.archivado = True
+            evento.archivo = ruta
+            evento.codigos_archivados = total
+            evento.save(update_fields=['archivado', 'archivo', 'codigos_archivados'])
+            self.stdout.write(f'{total} códigos escritos en {ruta}')
+
+        borrados = 0
+        while True:
+            ids = list(pendientes.values_list('id', flat=True)[:options['lote']])
+            if not ids:
+                break
+            with transaction.atomic():
+                CodigoQR.objects.filter(id__in=ids).delete()
+            borrados += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Evento "{evento.nombre}" archivado: {evento.codigos_archivados} códigos en archivo, {borrados} filas borradas'
+        ))
+
+    def _buscar(self, valor):
+        try:
+            return Evento.objects.get(pk=int(valor)) if valor.isdigit() else Evento.objects.get(nombre=valor)
+        except Evento.DoesNotExist:
+            raise CommandError(f'No existe el evento {valor}')
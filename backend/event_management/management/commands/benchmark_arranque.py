@@ -0,0 +1,188 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.utils import timezone
+import django
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Proceso hijo del escenario WSGI: carga config/wsgi.py y opcionalmente
+# atiende una petición; imprime sus tiempos en JSON por stdout
+SCRIPT_WSGI = '''
+import io, json, sys, time
+inicio = time.perf_counter()
+from config.wsgi import application
+cargado = time.perf_counter()
+datos = {'carga_s': cargado - inicio}
+if sys.argv[1:]:
+    host = sys.argv[2]
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'SCRIPT_NAME': '', 'QUERY_STRING': '',
+        'SERVER_NAME': host, 'SERVER_PORT': '80', 'HTTP_HOST': host, 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'wsgi.input': io.BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http', 'wsgi.version': (1, 0), 'wsgi.multithread': False,
+        'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    estado = []
+    respuesta = application(environ, lambda s, h, e=None: estado.append(s))
+    b''.join(respuesta)
+    respuesta.close()
+    datos['primera_peticion_s'] = time.perf_counter() - cargado
+    datos['estado'] = estado[0]
+print(json.dumps(datos))
+'''
+
+# Métricas comparadas con --comparar (en todas, menor es mejor). El número de
+# módulos no depende del ruido de la máquina: detecta importaciones nuevas
+METRICAS = ['total_s', 'importacion_s', 'primera_peticion_s', 'modulos']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el arranque en frío: tiempo de "manage.py check", de cargar la aplicación WSGI y de su '
+        'primera petición, con el tiempo de importación por módulo (python -X importtime). '
+        'Falla si se importan módulos prohibidos (p. ej. qrcode) o si empeora respecto a --comparar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5, help='Procesos lanzados por escenario (se usa la mediana)')
+        parser.add_argument('--top', type=int, default=15, help='Módulos más lentos a mostrar por escenario')
+        parser.add_argument('--ruta', default='/api/salud/conexiones/', help='Ruta de la primera petición')
+        parser.add_argument('--prohibidos', default='qrcode,PIL',
+                            help='Módulos que no deben importarse al arrancar, separados por coma')
+        parser.add_argument('--salida', default='', help='Archivo JSON donde escribir los resultados (opcional)')
+        parser.add_argument('--comparar', default='', help='JSON de una corrida anterior con el que comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.15, help='Empeoramiento relativo permitido al comparar (0.15 = 15%%)')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] <= 0:
+            raise CommandError('--repeticiones debe ser mayor que cero')
+        base = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'No se pudo leer {options["comparar"]}: {e}')
+
+        hosts = [h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')]
+        host = hosts[0] if hosts else 'localhost'
+        manage = os.path.join(settings.BASE_DIR, 'manage.py')
+        escenarios = {
+            'check': [manage, 'check'],
+            'wsgi': ['-c', SCRIPT_WSGI],
+            'primera_peticion': ['-c', SCRIPT_WSGI, options['ruta'], host],
+        }
+        prohibidos = [m.strip() for m in options['prohibidos'].split(',') if m.strip()]
+
+        resultados = {}
+        violaciones = []
+        for nombre, argumentos in escenarios.items():
+            resultado, modulos = self._medir(argumentos, options['repeticiones'])
+            resultados[nombre] = resultado
+            self.stdout.write(
+                f'{nombre}: {resultado["total_s"] * 1000:.0f} ms en total, '
+                f'{resultado["importacion_s"] * 1000:.0f} ms importando {resultado["modulos"]} módulos'
+                + (f', primera petición {resultado["primera_peticion_s"] * 1000:.1f} ms' if 'primera_peticion_s' in resultado else '')
+            )
+            for modulo, propio in sorted(modulos.items(), key=lambda m: -m[1])[:options['top']]:
+                self.stdout.write(f'    {propio * 1000:8.2f} ms  {modulo}')
+            importados = sorted(m for m in modulos if any(m == p or m.startswith(f'{p}.') for p in prohibidos))
+            resultado['prohibidos'] = importados
+            if importados:
+                violaciones.append(f'{nombre}: {", ".join(importados[:5])}')
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump({
+                    'version': 1,
+                    'fecha': timezone.now().isoformat(),
+                    'entorno': {'python': platform.python_version(), 'django': django.get_version()},
+                    'resultados': resultados,
+                }, archivo, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f'Resultados escritos en {options["salida"]}'))
+
+        if violaciones:
+            for linea in violaciones:
+                self.stdout.write(self.style.ERROR(f'Importados al arrancar: {linea}'))
+            raise CommandError('Se importan módulos prohibidos al arrancar')
+        if base is not None:
+            self._comparar(base, resultados, options['tolerancia'])
+
+    def _medir(self, argumentos, repeticiones):
+        """Lanza el escenario ``repeticiones`` veces; retorna el resumen y la mediana por módulo"""
+        entorno = dict(os.environ)
+        entorno.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+        entorno['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), entorno.get('PYTHONPATH')]))
+
+        totales, importaciones, peticiones, por_modulo = [], [], [], {}
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            proceso = subprocess.run(
+                [sys.executable, '-X', 'importtime', *argumentos],
+                cwd=settings.BASE_DIR, env=entorno, capture_output=True, text=True
+            )
+            totales.append(time.perf_counter() - inicio)
+            if proceso.returncode != 0:
+                raise CommandError(f'El proceso terminó con código {proceso.returncode}:\n{proceso.stderr[-2000:]}')
+
+            modulos, importacion = self._leer_importtime(proceso.stderr)
+            importaciones.append(importacion)
+            for modulo, propio in modulos.items():
+                por_modulo.setdefault(modulo, []).append(propio)
+            if argumentos[0] == '-c':
+                datos = json.loads(proceso.stdout.strip().splitlines()[-1])
+                if 'primera_peticion_s' in datos:
+                    peticiones.append(datos['primera_peticion_s'])
+
+        resultado = {
+            'total_s': round(statistics.median(totales), 4),
+            'importacion_s': round(statistics.median(importaciones), 4),
+            'modulos': len(por_modulo),
+        }
+        if peticiones:
+            resultado['primera_peticion_s'] = round(statistics.median(peticiones), 4)
+        modulos = {m: statistics.median(v) for m, v in por_modulo.items()}
+        resultado['modulos_mas_lentos_ms'] = {
+            m: round(t * 1000, 2) for m, t in sorted(modulos.items(), key=lambda m: -m[1])[:50]
+        }
+        return resultado, modulos
+
+    def _leer_importtime(self, stderr):
+        """Tiempo propio (s) por módulo y tiempo total de importación de la salida de -X importtime"""
+        modulos = {}
+        total = 0.0
+        for linea in stderr.splitlines():
+            if not linea.startswith('import time:') or 'self [us]' in linea:
+                continue
+            propio, acumulado, nombre = linea[len('import time:'):].split('|')
+            modulo = nombre.strip()
+            modulos[modulo] = modulos.get(modulo, 0.0) + int(propio) / 1e6
+            # Las importaciones de primer nivel tienen un solo espacio de sangría
+            if not nombre.startswith('  '):
+                total += int(acumulado) / 1e6
+        return modulos, total
+
+    def _comparar(self, base, resultados, tolerancia):
+        anteriores = base.get('resultados', {})
+        self.stdout.write('Comparación con la corrida base:')
+        regresiones = []
+        for nombre, resultado in resultados.items():
+            anterior = anteriores.get(nombre, {})
+            for metrica in METRICAS:
+                previo, actual = anterior.get(metrica), resultado.get(metrica)
+                if not previo or actual is None:
+                    continue
+                cambio = (actual - previo) / previo
+                linea = f'  {nombre} {metrica}: {previo} -> {actual} ({cambio:+.1%})'
+                if cambio > tolerancia:
+                    regresiones.append(linea)
+                    self.stdout.write(self.style.ERROR(linea))
+                else:
+                    self.stdout.write(linea)
+        if regresiones:
+            raise CommandError(f'{len(regresiones)} métricas empeoraron más del {tolerancia:.0%}')
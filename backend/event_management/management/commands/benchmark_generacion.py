@@ -0,0 +1,185 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from event_management.models import Visitante, evento_activo_id
+from event_management.email_utils import construir_email_codigos_qr, generar_imagen_qr
+from event_management.generacion import VisitanteEmail, crear_codigos_visitante
+import django
+import json
+import platform
+import subprocess
+import time
+
+# Métricas comparadas con --comparar y si un valor mayor es mejor
+METRICAS = {
+    'codigos_por_seg': True,
+    'renders_por_seg': True,
+    'mime_ms_por_email': False,
+    'emails_por_seg': True,
+}
+
+
+class SMTPNulo:
+    """Sustituto de ``smtplib.SMTP`` que acepta el mensaje ya serializado sin enviarlo"""
+
+    def __init__(self):
+        self.bytes_enviados = 0
+
+    def sendmail(self, remitente, destinatarios, datos):
+        self.bytes_enviados += len(datos)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el rendimiento de la generación de códigos QR y el envío de emails '
+        '(etapas BD, render, MIME y SMTP) con visitantes sintéticos, sin enviar nada: la etapa SMTP '
+        'serializa el MIME ya construido como lo hace el backend SMTP y lo entrega a una conexión nula. '
+        'Los códigos se crean dentro de una transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanos', default='1000,10000,50000', help='Número de visitantes por corrida, separados por coma')
+        parser.add_argument('--salida', default='benchmark_generacion.json', help='Archivo JSON donde escribir los resultados')
+        parser.add_argument('--comparar', default='', help='JSON de una corrida anterior con el que comparar')
+        parser.add_argument('--tolerancia', type=float, default=0.15, help='Empeoramiento relativo permitido al comparar (0.15 = 15%%)')
+
+    def handle(self, *args, **options):
+        try:
+            tamanos = [int(t) for t in options['tamanos'].split(',') if t.strip()]
+        except ValueError:
+            raise CommandError('--tamanos debe ser una lista de enteros separados por coma')
+        if evento_activo_id() is None:
+            raise CommandError('No hay un evento activo donde crear los códigos')
+
+        base = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'No se pudo leer {options["comparar"]}: {e}')
+
+        resultados = []
+        for tamano in tamanos:
+            self.stdout.write(f'Corrida con {tamano} visitantes...')
+            resultado = self._medir(tamano)
+            resultados.append(resultado)
+            etapas = resultado['etapas_seg']
+            self.stdout.write(
+                f'  BD {etapas["bd"]:.2f}s | render {etapas["render"]:.2f}s | '
+                f'MIME {etapas["mime"]:.2f}s | SMTP {etapas["smtp"]:.2f}s'
+            )
+            self.stdout.write(
+                f'  {resultado["codigos_por_seg"]:.0f} códigos/s, {resultado["renders_por_seg"]:.0f} renders/s, '
+                f'{resultado["mime_ms_por_email"]:.2f} ms MIME/email, {resultado["emails_por_seg"]:.1f} emails/s'
+            )
+
+        datos = {
+            'version': 1,
+            'fecha': timezone.now().isoformat(),
+            'commit': self._commit_actual(),
+            'entorno': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'bd': connection.vendor,
+                'debug': settings.DEBUG,
+            },
+            'resultados': resultados,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'Resultados escritos en {options["salida"]}'))
+
+        if base is not None:
+            self._comparar(base, resultados, options['tolerancia'])
+
+    def _visitantes_sinteticos(self, tamano):
+        return [
+            Visitante(
+                documento=f'BENCH{i:08d}',
+                nombre=f'Visitante{i}',
+                apellido='Benchmark',
+                email=f'bench{i}@benchmark.invalid',
+            )
+            for i in range(tamano)
+        ]
+
+    def _medir(self, tamano):
+        visitantes = self._visitantes_sinteticos(tamano)
+
+        # Etapa BD: misma creación que generar_codigos_masivo, revertida al final
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            codigos_por_visitante = [crear_codigos_visitante(v) for v in visitantes]
+            tiempo_bd = time.perf_counter() - inicio
+            transaction.set_rollback(True)
+        total_codigos = sum(len(c) for c in codigos_por_visitante)
+
+        # Etapas de email sobre los objetos en memoria, medidas por separado. Enviar con
+        # un backend volvería a construir el MIME (send() llama otra vez a message()):
+        # la etapa SMTP hace lo de smtp.EmailBackend._send con el mensaje ya construido
+        smtp = SMTPNulo()
+        tiempo_render = tiempo_mime = tiempo_smtp = 0.0
+        for visitante, codigos in zip(visitantes, codigos_por_visitante):
+            t0 = time.perf_counter()
+            imagenes = {c.codigo: generar_imagen_qr(c.codigo) for c in codigos}
+            t1 = time.perf_counter()
+            email = construir_email_codigos_qr(VisitanteEmail(visitante), codigos, imagenes=imagenes)
+            mensaje = email.message()
+            t2 = time.perf_counter()
+            smtp.sendmail(email.from_email, email.recipients(), mensaje.as_bytes(linesep='\r\n'))
+            t3 = time.perf_counter()
+            tiempo_render += t1 - t0
+            tiempo_mime += t2 - t1
+            tiempo_smtp += t3 - t2
+
+        tiempo_emails = tiempo_render + tiempo_mime + tiempo_smtp
+        return {
+            'visitantes': tamano,
+            'codigos': total_codigos,
+            'etapas_seg': {
+                'bd': round(tiempo_bd, 4),
+                'render': round(tiempo_render, 4),
+                'mime': round(tiempo_mime, 4),
+                'smtp': round(tiempo_smtp, 4),
+            },
+            'codigos_por_seg': round(total_codigos / tiempo_bd, 2) if tiempo_bd else 0,
+            'renders_por_seg': round(total_codigos / tiempo_render, 2) if tiempo_render else 0,
+            'mime_ms_por_email': round(tiempo_mime / tamano * 1000, 4) if tamano else 0,
+            'emails_por_seg': round(tamano / tiempo_emails, 2) if tiempo_emails else 0,
+        }
+
+    def _commit_actual(self):
+        try:
+            salida = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+            )
+        except (OSError, subprocess.SubprocessError):
+            return ''
+        return salida.stdout.strip()
+
+    def _comparar(self, base, resultados, tolerancia):
+        anteriores = {r['visitantes']: r for r in base.get('resultados', [])}
+        self.stdout.write(f'Comparación con el commit {base.get("commit") or "?"}:')
+        regresiones = []
+        for resultado in resultados:
+            anterior = anteriores.get(resultado['visitantes'])
+            if anterior is None:
+                self.stdout.write(f'  {resultado["visitantes"]} visitantes: sin datos en la base')
+                continue
+            for metrica, mayor_es_mejor in METRICAS.items():
+                previo, actual = anterior.get(metrica), resultado[metrica]
+                if not previo:
+                    continue
+                cambio = (actual - previo) / previo
+                empeora = -cambio if mayor_es_mejor else cambio
+                linea = f'  {resultado["visitantes"]} visitantes {metrica}: {previo} -> {actual} ({cambio:+.1%})'
+                if empeora > tolerancia:
+                    regresiones.append(linea)
+                    self.stdout.write(self.style.ERROR(linea))
+                else:
+                    self.stdout.write(linea)
+        if regresiones:
+            raise CommandError(f'{len(regresiones)} métricas empeoraron más del {tolerancia:.0%}')
@@ -0,0 +1,152 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.conf import settings
+from django.utils import timezone
+from event_management.models import CodigoQR, Titular, evento_activo_id
+import io
+import json
+import logging
+import statistics
+import sys
+import time
+
+RUTAS = {
+    'validar': '/api/codigos-qr/validar/',
+    'validar-rapido': settings.VALIDACION_RAPIDA_RUTA,
+}
+DOMINIO_BENCHMARK = 'benchmark.invalid'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara la latencia de /api/codigos-qr/validar/ (DRF, middleware completo) con la '
+        'validación ligera, llamando en proceso a la aplicación WSGI (config/wsgi.py). '
+        'Crea códigos temporales que se borran al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=2000, help='Peticiones por ruta y escenario')
+        parser.add_argument('--calentamiento', type=int, default=50, help='Peticiones previas que no se miden')
+        parser.add_argument('--salida', default='', help='Archivo JSON donde escribir los resultados (opcional)')
+
+    def handle(self, *args, **options):
+        total = options['peticiones']
+        calentamiento = options['calentamiento']
+        if total <= 0:
+            raise CommandError('--peticiones debe ser mayor que cero')
+
+        self.app = get_internal_wsgi_application()
+        hosts = [h for h in settings.ALLOWED_HOSTS if h and '*' not in h and not h.startswith('.')]
+        self.host = hosts[0] if hosts else 'localhost'
+
+        # Cada rechazo registra un warning "Bad Request" en django.request
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        resultados = {}
+        try:
+            for nombre, ruta in RUTAS.items():
+                codigos = self._crear_codigos(nombre, total + calentamiento)
+                frescos = [str(c) for c in codigos]
+                escenarios = {
+                    # (valores, estación, lectura previa sin medir)
+                    # Primer escaneo: lectura + UPDATE + versión de la tabla
+                    'canje': (frescos, 'puerta-1', False),
+                    # Mismo código en otra estación: rechazo por usado
+                    'repetido': (frescos, 'puerta-2', False),
+                    # El lector repite la lectura: resultado guardado de la anterior, sin BD
+                    'duplicado': (frescos, 'puerta-3', True),
+                    # Texto que no es un UUID: rechazo sin consultar la BD
+                    'invalido': (['no-es-un-codigo'] * len(frescos), 'puerta-1', False),
+                }
+                resultados[nombre] = {}
+                for escenario, (valores, estacion, previa) in escenarios.items():
+                    for valor in valores[:calentamiento]:
+                        self._llamar(ruta, valor, estacion)
+                    latencias = []
+                    for valor in valores[calentamiento:]:
+                        if previa:
+                            self._llamar(ruta, valor, estacion)
+                        inicio = time.perf_counter()
+                        self._llamar(ruta, valor, estacion)
+                        latencias.append(time.perf_counter() - inicio)
+                    resultados[nombre][escenario] = self._resumen(latencias)
+        finally:
+            CodigoQR.objects.filter(titular__email__endswith=f'@{DOMINIO_BENCHMARK}').delete()
+            Titular.objects.filter(email__endswith=f'@{DOMINIO_BENCHMARK}').delete()
+
+        self.stdout.write(f'{"ruta":<16}{"escenario":<11}{"media ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"pet/s":>10}')
+        for nombre, escenarios in resultados.items():
+            for escenario, r in escenarios.items():
+                self.stdout.write(
+                    f'{nombre:<16}{escenario:<11}{r["media_ms"]:>10.3f}{r["p50_ms"]:>10.3f}'
+                    f'{r["p95_ms"]:>10.3f}{r["p99_ms"]:>10.3f}{r["peticiones_por_seg"]:>10.0f}'
+                )
+        for escenario in ('canje', 'repetido', 'duplicado', 'invalido'):
+            base = resultados['validar'][escenario]['media_ms']
+            rapido = resultados['validar-rapido'][escenario]['media_ms']
+            self.stdout.write(f'{escenario}: validar-rapido es {base / rapido:.1f}x más rápido')
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump({
+                    'fecha': timezone.now().isoformat(),
+                    'peticiones': total,
+                    'resultados': resultados,
+                }, archivo, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Resultados escritos en {options["salida"]}'))
+
+    def _crear_codigos(self, prefijo, cantidad):
+        evento_id = evento_activo_id()
+        titulares = Titular.objects.registrar_varios(
+            (f'{prefijo}.{i}@{DOMINIO_BENCHMARK}', f'Benchmark {i}', str(i)) for i in range(cantidad)
+        )
+        codigos = CodigoQR.objects.bulk_create([
+            CodigoQR(
+                evento_id=evento_id,
+                titular_id=titulares[f'{prefijo}.{i}@{DOMINIO_BENCHMARK}'],
+                tipo_comida='DESAYUNO',
+            )
+            for i in range(cantidad)
+        ], batch_size=1000)
+        return [c.codigo for c in codigos]
+
+    def _llamar(self, ruta, valor, estacion):
+        cuerpo = json.dumps({'codigo': valor}).encode()
+        environ = {
+            'REQUEST_METHOD': 'POST',
+            'PATH_INFO': ruta,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': '',
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'HTTP_HOST': self.host,
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_TYPE': 'application/json',
+            'HTTP_X_ESTACION': estacion,
+            'CONTENT_LENGTH': str(len(cuerpo)),
+            'wsgi.input': io.BytesIO(cuerpo),
+            'wsgi.errors': sys.stderr,
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        respuesta = self.app(environ, lambda estado, cabeceras, exc_info=None: None)
+        try:
+            b''.join(respuesta)
+        finally:
+            # Dispara request_finished, como haría el servidor WSGI
+            respuesta.close()
+
+    def _resumen(self, latencias):
+        ordenadas = sorted(latencias)
+        n = len(ordenadas)
+        return {
+            'media_ms': round(statistics.fmean(ordenadas) * 1000, 4),
+            'p50_ms': round(ordenadas[n // 2] * 1000, 4),
+            'p95_ms': round(ordenadas[min(n - 1, int(n * 0.95))] * 1000, 4),
+            'p99_ms': round(ordenadas[min(n - 1, int(n * 0.99))] * 1000, 4),
+            'peticiones_por_seg': round(n / sum(ordenadas), 1),
+        }
@@ -0,0 +1,82 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from event_management.models import Redencion, ResumenRedencionDiario
+from datetime import datetime, time, timedelta
+
+
+class Command(BaseCommand):
+    help = (
+        'Consolida los intentos de canje (Redencion) de días antiguos en ResumenRedencionDiario '
+        '(total por día, estación, tipo de comida y resultado) y borra el detalle de esos días.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.REDENCIONES_DIAS_DETALLE,
+                            help='Días recientes que conservan el detalle por escaneo')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas de detalle borradas por consulta')
+        parser.add_argument('--dry-run', action='store_true', help='Mostrar los totales sin escribir ni borrar')
+
+    def handle(self, *args, **options):
+        if options['dias'] < 1:
+            raise CommandError('--dias debe ser al menos 1 (el día en curso sigue recibiendo escaneos)')
+
+        zona = timezone.get_current_timezone()
+        # Días completos en la zona horaria del evento, sin TruncDate (en MySQL
+        # requiere las tablas de zonas horarias cargadas)
+        limite = datetime.combine(timezone.localdate() - timedelta(days=options['dias']), time.min, tzinfo=zona)
+        antiguas = Redencion.objects.filter(fecha__lt=limite)
+        primera = antiguas.aggregate(primera=Min('fecha'))['primera']
+        if primera is None:
+            self.stdout.write('No hay redenciones para consolidar.')
+            return
+
+        dia = timezone.localtime(primera, zona).date()
+        total_filas = total_resumenes = 0
+        while True:
+            inicio = datetime.combine(dia, time.min, tzinfo=zona)
+            if inicio >= limite:
+                break
+            fin = datetime.combine(dia + timedelta(days=1), time.min, tzinfo=zona)
+            filas, resumenes = self._consolidar_dia(dia, inicio, fin, options)
+            if filas:
+                self.stdout.write(f'{dia}: {filas} escaneos -> {resumenes} filas de resumen')
+            total_filas += filas
+            total_resumenes += resumenes
+            dia += timedelta(days=1)
+
+        prefijo = '[DRY] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefijo}Consolidados {total_filas} escaneos en {total_resumenes} filas de resumen'
+        ))
+
+    def _consolidar_dia(self, dia, inicio, fin, options):
+        del_dia = Redencion.objects.filter(fecha__gte=inicio, fecha__lt=fin)
+        grupos = list(
+            del_dia.values('estacion', 'tipo_comida', 'resultado').annotate(total=Count('id')).order_by()
+        )
+        filas = sum(g['total'] for g in grupos)
+        if not grupos or options['dry_run']:
+            return filas, len(grupos)
+
+        # Resumen y borrado en la misma transacción: un fallo no pierde ni duplica escaneos
+        with transaction.atomic():
+            for grupo in grupos:
+                clave = {
+                    'dia': dia,
+                    'estacion': grupo['estacion'],
+                    'tipo_comida': grupo['tipo_comida'],
+                    'resultado': grupo['resultado'],
+                }
+                # Si el día ya se consolidó antes (escaneos que llegaron tarde) se suma
+                if not ResumenRedencionDiario.objects.filter(**clave).update(total=F('total') + grupo['total']):
+                    ResumenRedencionDiario.objects.create(total=grupo['total'], **clave)
+
+            while True:
+                ids = list(del_dia.values_list('id', flat=True)[:options['lote']])
+                if not ids:
+                    break
+                Redencion.objects.filter(id__in=ids).delete()
+        return filas, len(grupos)
@@ -0,0 +1,232 @@
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connections, transaction
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from event_management.email_utils import enviar_codigos_qr_email
+from event_management.generacion import VisitanteEmail, datos_titular, email_visitante, visitantes_sin_codigos
+from event_management.models import CodigoQR, Titular, Visitante, evento_activo_id
+from event_management.tickets import tipos_a_generar
+from event_management.versiones import TABLA_CODIGOS, tocar_version
+import json
+import socket
+import time
+import zlib
+
+# Contadores que se suman al unir los resultados de los shards
+CONTADORES = ['visitantes', 'omitidos', 'generados', 'codigos', 'emails_enviados', 'emails_fallidos']
+
+
+def shard_de(documento, total):
+    """Shard (0..total-1) de un documento: CRC32 de su texto UTF-8, igual que CRC32() de MySQL"""
+    return zlib.crc32(documento.encode('utf-8')) % total
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera los códigos QR (y envía los emails) de los visitantes de un shard: los documentos '
+        'con CRC32(documento) % n == i. Varios procesos o servidores con --shard 0/n ... (n-1)/n '
+        'cubren todos los visitantes sin coordinarse ni solaparse. Cada shard escribe su '
+        'rendimiento en JSON; --unir junta esos archivos en un resumen.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shard', default='', help='Shard a procesar con la forma i/n, p. ej. 0/4')
+        parser.add_argument('--lote', type=int, default=500, help='Visitantes leídos y generados por bloque')
+        parser.add_argument('--sin-email', action='store_true', help='Solo generar los códigos, sin enviar emails')
+        parser.add_argument('--salida', default='', help='JSON del shard (por defecto generacion-shard-<i>-de-<n>.json)')
+        parser.add_argument('--unir', nargs='+', default=[], metavar='JSON',
+                            help='Unir los JSON de varios shards en un resumen (no genera nada)')
+
+    def handle(self, *args, **options):
+        if options['unir']:
+            self._unir(options['unir'])
+            return
+
+        indice, total = self._leer_shard(options['shard'])
+        evento_id = evento_activo_id()
+        if evento_id is None:
+            raise CommandError('No hay un evento activo donde crear los códigos')
+        lote = max(1, options['lote'])
+        enviar = not options['sin_email']
+
+        resultado = dict.fromkeys(CONTADORES, 0)
+        tiempos = {'lectura': 0.0, 'bd': 0.0, 'email': 0.0}
+        inicio = time.perf_counter()
+        for bloque, lectura in self._bloques(indice, total, lote):
+            tiempos['lectura'] += lectura
+            resultado['visitantes'] += len(bloque)
+
+            t0 = time.perf_counter()
+            pendientes = visitantes_sin_codigos(bloque)
+            resultado['omitidos'] += len(bloque) - len(pendientes)
+            codigos_por_visitante = self._crear(pendientes, evento_id)
+            tiempos['bd'] += time.perf_counter() - t0
+            resultado['generados'] += len(codigos_por_visitante)
+            resultado['codigos'] += sum(len(c) for _, c in codigos_por_visitante)
+
+            if enviar:
+                t0 = time.perf_counter()
+                enviados, fallidos = self._enviar(codigos_por_visitante)
+                tiempos['email'] += time.perf_counter() - t0
+                resultado['emails_enviados'] += enviados
+                resultado['emails_fallidos'] += fallidos
+
+            self.stdout.write(
+                f'shard {indice}/{total}: {resultado["visitantes"]} visitantes leídos, '
+                f'{resultado["generados"]} con códigos nuevos, {resultado["emails_enviados"]} emails'
+            )
+        duracion = time.perf_counter() - inicio
+
+        datos = {
+            'version': 1,
+            'shard': indice,
+            'shards': total,
+            'host': socket.gethostname(),
+            'fecha': timezone.now().isoformat(),
+            'evento': evento_id,
+            **resultado,
+            'tiempos_seg': {etapa: round(segundos, 4) for etapa, segundos in tiempos.items()},
+            'duracion_seg': round(duracion, 4),
+            **self._ritmos(resultado, duracion),
+        }
+        salida = options['salida'] or f'generacion-shard-{indice}-de-{total}.json'
+        with open(salida, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Shard {indice}/{total} terminado en {duracion:.1f}s: {resultado["codigos"]} códigos '
+            f'({datos["codigos_por_seg"]:.0f}/s), {resultado["emails_enviados"]} emails '
+            f'({datos["emails_por_seg"]:.1f}/s), {resultado["emails_fallidos"]} fallidos. Resultados en {salida}'
+        ))
+
+    def _leer_shard(self, valor):
+        try:
+            indice, total = (int(parte) for parte in valor.split('/'))
+        except ValueError:
+            raise CommandError('--shard debe tener la forma i/n, p. ej. 0/4')
+        if total < 1 or not 0 <= indice < total:
+            raise CommandError('--shard i/n requiere n >= 1 y 0 <= i < n')
+        return indice, total
+
+    def _bloques(self, indice, total, lote):
+        """Visitantes del shard por bloques ordenados por documento; produce (bloque, segundos de lectura)"""
+        visitantes = Visitante.objects.using('rica_univalle').order_by('documento')
+        # En MySQL el filtro se hace en la BD; en otras (SQLite de desarrollo) al leer
+        en_bd = connections['rica_univalle'].vendor == 'mysql'
+        if en_bd and total > 1:
+            visitantes = visitantes.annotate(
+                _shard=RawSQL('MOD(CRC32(documento), %s)', [total])
+            ).filter(_shard=indice)
+
+        ultimo = None
+        while True:
+            t0 = time.perf_counter()
+            consulta = visitantes if ultimo is None else visitantes.filter(documento__gt=ultimo)
+            leidos = list(consulta[:lote])
+            segundos = time.perf_counter() - t0
+            if not leidos:
+                return
+            ultimo = leidos[-1].documento
+            bloque = leidos if en_bd else [v for v in leidos if shard_de(v.documento, total) == indice]
+            if bloque:
+                yield bloque, segundos
+            if len(leidos) < lote:
+                return
+
+    def _codigos_de(self, evento_id, titular_id):
+        return [
+            CodigoQR(evento_id=evento_id, titular_id=titular_id, tipo_comida=tipo)
+            for tipo in tipos_a_generar()
+        ]
+
+    def _crear(self, visitantes, evento_id):
+        """Crea los códigos del bloque en un bulk_create; retorna [(visitante, códigos)]"""
+        if not visitantes:
+            return []
+        titulares = Titular.objects.registrar_varios(datos_titular(v) for v in visitantes)
+        por_visitante = [
+            (v, self._codigos_de(evento_id, titulares[email_visitante(v).lower()])) for v in visitantes
+        ]
+        try:
+            with transaction.atomic():
+                CodigoQR.objects.bulk_create([c for _, codigos in por_visitante for c in codigos])
+        except IntegrityError:
+            # Alguno recibió códigos por otra vía (API) mientras tanto: uno a uno
+            creados = []
+            for visitante, codigos in por_visitante:
+                try:
+                    with transaction.atomic():
+                        CodigoQR.objects.bulk_create(codigos)
+                except IntegrityError:
+                    continue
+                creados.append((visitante, codigos))
+            por_visitante = creados
+        if por_visitante:
+            # bulk_create no dispara post_save
+            tocar_version(TABLA_CODIGOS)
+        return por_visitante
+
+    def _enviar(self, codigos_por_visitante):
+        """Envía los emails del bloque con una sola conexión SMTP; retorna (enviados, fallidos)"""
+        enviados = fallidos = 0
+        with get_connection() as conexion:
+            for visitante, codigos in codigos_por_visitante:
+                if not visitante.email:
+                    continue
+                if enviar_codigos_qr_email(VisitanteEmail(visitante), codigos, connection=conexion):
+                    enviados += 1
+                else:
+                    fallidos += 1
+        return enviados, fallidos
+
+    def _ritmos(self, contadores, segundos):
+        return {
+            'visitantes_por_seg': round(contadores['visitantes'] / segundos, 2) if segundos else 0,
+            'codigos_por_seg': round(contadores['codigos'] / segundos, 2) if segundos else 0,
+            'emails_por_seg': round(contadores['emails_enviados'] / segundos, 2) if segundos else 0,
+        }
+
+    def _unir(self, rutas):
+        shards = []
+        for ruta in rutas:
+            try:
+                with open(ruta, encoding='utf-8') as archivo:
+                    shards.append(json.load(archivo))
+            except (OSError, ValueError) as e:
+                raise CommandError(f'No se pudo leer {ruta}: {e}')
+
+        totales = {datos['shards'] for datos in shards}
+        if len(totales) != 1:
+            raise CommandError(f'Los archivos son de particiones distintas (n = {sorted(totales)})')
+        total = totales.pop()
+        vistos = [datos['shard'] for datos in shards]
+        repetidos = sorted({s for s in vistos if vistos.count(s) > 1})
+        if repetidos:
+            raise CommandError(f'Shards repetidos: {repetidos}')
+
+        shards.sort(key=lambda datos: datos['shard'])
+        for datos in shards:
+            self.stdout.write(
+                f'  shard {datos["shard"]}/{total} ({datos.get("host", "?")}): {datos["visitantes"]} visitantes, '
+                f'{datos["codigos"]} códigos en {datos["duracion_seg"]:.1f}s '
+                f'({datos["codigos_por_seg"]:.0f} códigos/s, {datos["emails_por_seg"]:.1f} emails/s)'
+            )
+
+        resumen = {contador: sum(datos[contador] for datos in shards) for contador in CONTADORES}
+        # Los shards corren en paralelo: el tiempo total es el del más lento
+        duracion = max(datos['duracion_seg'] for datos in shards)
+        ritmos = self._ritmos(resumen, duracion)
+        self.stdout.write(
+            f'Total: {resumen["visitantes"]} visitantes, {resumen["generados"]} con códigos nuevos '
+            f'({resumen["omitidos"]} ya tenían), {resumen["codigos"]} códigos, '
+            f'{resumen["emails_enviados"]} emails enviados y {resumen["emails_fallidos"]} fallidos'
+        )
+        self.stdout.write(
+            f'En paralelo: {duracion:.1f}s (shard más lento), {ritmos["codigos_por_seg"]:.0f} códigos/s, '
+            f'{ritmos["emails_por_seg"]:.1f} emails/s'
+        )
+        faltantes = sorted(set(range(total)) - set(vistos))
+        if faltantes:
+            self.stdout.write(self.style.WARNING(f'Faltan los shards {faltantes} de {total}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Los {total} shards están completos'))
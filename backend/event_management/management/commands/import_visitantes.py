@@ -1,9 +1,14 @@
-from django.core.management.base import BaseCommand
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
-from django.db import connections, transaction
-from event_management.models import Estudiante, CodigoQR
+from django.db import DataError, IntegrityError, connections, transaction
+from event_management.models import Estudiante, CodigoQR, HuellaFilaImportada, PuntoControlImportacion, Titular, evento_activo_id
 from event_management.email_utils import enviar_codigos_qr_email
+from event_management.tickets import tipos_a_generar
+from event_management.versiones import TABLA_CODIGOS, tocar_version
+import hashlib
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,16 @@ class Command(BaseCommand):
         parser.add_argument('--dry-run', action='store_true', help='No escribir nada en la DB, solo mostrar lo que se haría')
         parser.add_argument('--generate-codes', action='store_true', help='Generar códigos QR para cada estudiante importado')
         parser.add_argument('--send-emails', action='store_true', help='Enviar emails con los códigos (requiere generate-codes)')
+        parser.add_argument('--streaming', action='store_true', help='Leer la tabla por bloques e insertar con bulk_create (memoria constante)')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Filas por bloque en modo --streaming')
+        parser.add_argument('--key-field', default='', help='Columna clave única y ordenable para --resume/--incremental (por defecto la de identificación)')
+        parser.add_argument('--resume', action='store_true', help='Reanudar una importación interrumpida desde el último checkpoint (implica --streaming)')
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='Importar solo filas nuevas o modificadas desde la última ejecución (implica --streaming). '
+                 'Cada ejecución lee y calcula la huella de toda la tabla fuente: el coste de lectura es '
+                 'O(filas de la tabla); solo la escritura es proporcional a lo que cambió.'
+        )
 
     def handle(self, *args, **options):
         # Añadir configuración temporal de la DB origen
@@ -50,11 +65,19 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING('--send-emails activa --generate-codes también (se requiere).'))
             return
 
+        if generate_codes and not dry_run and evento_activo_id() is None:
+            raise CommandError('No hay un evento activo: activa uno antes de usar --generate-codes.')
+
+        if options['streaming'] or options['resume'] or options['incremental']:
+            self._importar_streaming(options)
+            return
+
+        sql = f"SELECT * FROM `{table}`"
+        if limit and limit > 0:
+            sql += f" LIMIT {limit}"
+
         # Query the source DB
         with connections['rica_source'].cursor() as cursor:
-            sql = f"SELECT * FROM `{table}`"
-            if limit and limit > 0:
-                sql += f" LIMIT {limit}"
             try:
                 cursor.execute(sql)
             except Exception as e:
@@ -66,22 +89,11 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Filas encontradas: {len(rows)}')
 
-        # Heurística para detectar columnas si no se especificaron
-        def find_field(candidates):
-            for c in candidates:
-                if c in cols:
-                    return c
-            return None
-
-        name_field = options['name_field'] or find_field(['nombre', 'nombre_completo', 'full_name', 'name', 'visitante'])
-        id_field = options['id_field'] or find_field(['identificacion', 'documento', 'id_number', 'dni'])
-        email_field = options['email_field'] or find_field(['email', 'correo', 'correo_electronico'])
-        activo_field = options['activo_field'] or find_field(['activo', 'status', 'estado', 'is_active'])
+        name_field, id_field, email_field, activo_field = self._detectar_columnas(cols, options)
 
         if not email_field:
             self.stderr.write('No se pudo detectar la columna de email. Usa --email-field para indicar el nombre de la columna.')
             return
-
         created = 0
         skipped = 0
 
@@ -129,10 +141,13 @@ class Command(BaseCommand):
                     # Generar códigos si solicitado
                     codigos_creados = []
                     if generate_codes:
-                        tipos = ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO']
-                        for tipo in tipos:
-                            if not CodigoQR.objects.filter(estudiante=est, tipo_comida=tipo).exists():
-                                codigo = CodigoQR.objects.create(estudiante=est, tipo_comida=tipo)
+                        evento_id = evento_activo_id()
+                        titular = Titular.objects.registrar(est.email, est.nombre, est.identificacion)
+                        for tipo in tipos_a_generar():
+                            if not CodigoQR.objects.filter(evento_id=evento_id, titular=titular, tipo_comida=tipo).exists():
+                                codigo = CodigoQR.objects.create(
+                                    evento_id=evento_id, estudiante=est, tipo_comida=tipo, titular=titular
+                                )
                                 codigos_creados.append(codigo)
 
                         if send_emails and codigos_creados:
@@ -147,3 +162,371 @@ class Command(BaseCommand):
                 self.stderr.write(f'Error al crear estudiante para fila {record}: {e}')
 
         self.stdout.write(self.style.SUCCESS(f'Import completed: created={created} skipped={skipped}'))
+
+    def _detectar_columnas(self, cols, options):
+        """Heurística para detectar columnas si no se especificaron"""
+        def find_field(candidates):
+            for c in candidates:
+                if c in cols:
+                    return c
+            return None
+
+        name_field = options['name_field'] or find_field(['nombre', 'nombre_completo', 'full_name', 'name', 'visitante'])
+        id_field = options['id_field'] or find_field(['identificacion', 'documento', 'id_number', 'dni'])
+        email_field = options['email_field'] or find_field(['email', 'correo', 'correo_electronico'])
+        activo_field = options['activo_field'] or find_field(['activo', 'status', 'estado', 'is_active'])
+        return name_field, id_field, email_field, activo_field
+
+    def _cursor_streaming(self, conexion):
+        """Cursor del lado del servidor para que fetchmany no cargue toda la tabla en memoria"""
+        conexion.ensure_connection()
+        if conexion.vendor == 'mysql':
+            from MySQLdb.cursors import SSCursor
+            return conexion.connection.cursor(SSCursor)
+        return conexion.cursor()
+
+    def _huella(self, row):
+        """Hash estable de una fila de la fuente (MD5 de sus valores)"""
+        return hashlib.md5('\x1f'.join('' if v is None else str(v) for v in row).encode()).hexdigest()
+
+    def _preparar_punto_control(self, options, fuente, campo_clave, sql_fila):
+        """
+        Obtiene el checkpoint de la fuente. Con --resume y una importación
+        interrumpida se continúa desde la última clave; en otro caso se
+        reinicia la posición (las huellas de filas se conservan).
+        """
+        if options['dry_run']:
+            punto = (
+                PuntoControlImportacion.objects.filter(fuente=fuente).first()
+                or PuntoControlImportacion(fuente=fuente, campo_clave=campo_clave)
+            )
+        else:
+            punto, _ = PuntoControlImportacion.objects.get_or_create(
+                fuente=fuente, defaults={'campo_clave': campo_clave}
+            )
+        if options['resume'] and not punto.completado and punto.ultima_clave:
+            if punto.campo_clave != campo_clave:
+                raise CommandError(
+                    f'El checkpoint usa la columna clave {punto.campo_clave}; usa --key-field {punto.campo_clave}.'
+                )
+            # Verificar que la fila del checkpoint no cambió en la fuente
+            with connections['rica_source'].cursor() as cursor:
+                cursor.execute(sql_fila, [punto.ultima_clave])
+                fila = cursor.fetchone()
+            if fila is None or self._huella(fila) != punto.huella_ultima_fila:
+                self.stdout.write(self.style.WARNING(
+                    f'La fila {campo_clave}={punto.ultima_clave} cambió o ya no existe en la fuente; '
+                    'se reanuda igualmente (usa --incremental para sincronizar cambios).'
+                ))
+            self.stdout.write(
+                f'Reanudando desde {campo_clave} > {punto.ultima_clave} ({punto.filas_procesadas} filas ya procesadas)'
+            )
+            return punto, True
+
+        if options['resume']:
+            self.stdout.write(self.style.NOTICE('No hay una importación interrumpida; se empieza desde el inicio.'))
+        punto.campo_clave = campo_clave
+        punto.ultima_clave = ''
+        punto.huella_ultima_fila = ''
+        punto.filas_procesadas = 0
+        punto.completado = False
+        if not options['dry_run']:
+            punto.save()
+        return punto, False
+
+    def _actualizar_modificado(self, nombre, identificacion, email, activo):
+        """Aplica a estudiante y códigos los cambios de una fila ya importada"""
+        try:
+            with transaction.atomic():
+                Estudiante.objects.filter(identificacion=identificacion).update(
+                    nombre=nombre or f'Visitante {email}',
+                    email=email,
+                    activo=activo,
+                )
+                # Los códigos toman nombre y email del titular: una sola fila por persona
+                Titular.objects.filter(documento=identificacion).update(
+                    nombre=nombre or f'Visitante {email}',
+                    email=email,
+                )
+            return True
+        except (IntegrityError, DataError) as e:
+            self.stderr.write(f'No se pudo actualizar {identificacion} ({email}): {e}')
+            return False
+
+    def _importar_streaming(self, options):
+        """
+        Importación por bloques: lee con fetchmany, descarta duplicados contra
+        conjuntos precargados (sin una consulta por fila) e inserta estudiantes
+        y códigos con bulk_create en una transacción por bloque. Si el bloque
+        falla por una fila inválida (IntegrityError/DataError) se reintenta
+        fila por fila y se informan las que no se pudieron importar.
+
+        Con --resume/--incremental recorre la tabla ordenada por la columna
+        clave y guarda en cada bloque (en la misma transacción) la última clave
+        procesada y la huella de cada fila importada o actualizada, de modo que
+        un fallo no obliga a empezar de nuevo y las filas sin cambios se
+        descartan sin escribir en la BD. Las filas omitidas (sin email,
+        duplicadas) no guardan huella y se vuelven a evaluar en la siguiente
+        ejecución. La tabla fuente se lee entera en cada ejecución.
+        """
+        chunk_size = max(options['chunk_size'], 1)
+        dry_run = options['dry_run']
+        generate_codes = options['generate_codes']
+        send_emails = options['send_emails']
+        incremental = options['incremental']
+        con_checkpoint = incremental or options['resume']
+        table = options['table']
+        limit = options['limit']
+        tipos = tipos_a_generar()
+
+        conexion_fuente = connections['rica_source']
+        con_destino = connections['default']
+        q = conexion_fuente.ops.quote_name
+
+        # Detectar columnas sin leer filas
+        with conexion_fuente.cursor() as cursor:
+            try:
+                cursor.execute(f'SELECT * FROM {q(table)} LIMIT 0')
+            except Exception as e:
+                self.stderr.write(f'Error al consultar la tabla {table}: {e}')
+                return
+            cols = [col[0] for col in cursor.description]
+
+        name_field, id_field, email_field, activo_field = self._detectar_columnas(cols, options)
+        if not email_field:
+            self.stderr.write('No se pudo detectar la columna de email. Usa --email-field para indicar el nombre de la columna.')
+            return
+        key_field = options['key_field'] or id_field
+        if con_checkpoint and not key_field:
+            raise CommandError('--resume/--incremental requieren una columna clave única: usa --key-field.')
+
+        # Leer solo las columnas necesarias
+        seleccion = [c for c in dict.fromkeys([key_field, name_field, id_field, email_field, activo_field]) if c]
+        idx_clave = seleccion.index(key_field) if key_field else None
+        idx_nombre = seleccion.index(name_field) if name_field else None
+        idx_id = seleccion.index(id_field) if id_field else None
+        idx_email = seleccion.index(email_field)
+        idx_activo = seleccion.index(activo_field) if activo_field else None
+
+        base_sql = f"SELECT {', '.join(q(c) for c in seleccion)} FROM {q(table)}"
+        sql, params = base_sql, []
+        punto = None
+        fuente = f"{options['host']}:{options['port']}/{options['db']}.{table}"
+        if con_checkpoint:
+            punto, reanudando = self._preparar_punto_control(
+                options, fuente, key_field, f'{base_sql} WHERE {q(key_field)} = %s'
+            )
+            if reanudando:
+                sql += f' WHERE {q(key_field)} > %s'
+                params.append(punto.ultima_clave)
+            sql += f' ORDER BY {q(key_field)}'
+        if limit and limit > 0:
+            sql += f' LIMIT {int(limit)}'
+
+        # Precargar claves existentes normalizadas (una consulta cada una)
+        emails_existentes = {
+            e.strip().lower() for e in Estudiante.objects.values_list('email', flat=True).iterator(chunk_size=chunk_size)
+        }
+        # Las identificaciones vacías no identifican a nadie: no cuentan como duplicado
+        ids_existentes = set(
+            Estudiante.objects.exclude(identificacion='').values_list('identificacion', flat=True).iterator(chunk_size=chunk_size)
+        )
+        evento_id = evento_activo_id()
+        emails_con_codigos = {
+            e.strip().lower() for e in CodigoQR.objects.filter(evento_id=evento_id).values_list('titular__email', flat=True).distinct().iterator(chunk_size=chunk_size)
+        }
+
+        created = skipped = leidas = codigos_total = sin_cambios = modificados = fallidas = 0
+        inicio = time.monotonic()
+
+        cursor = self._cursor_streaming(conexion_fuente)
+        try:
+            cursor.execute(sql, params)
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                leidas += len(rows)
+
+                huellas_guardadas = {}
+                if con_checkpoint:
+                    huellas_guardadas = dict(
+                        HuellaFilaImportada.objects.filter(
+                            fuente=fuente, clave__in=[str(r[idx_clave]) for r in rows]
+                        ).values_list('clave', 'huella')
+                    )
+
+                nuevos = []
+                cambios = []
+                huellas = []
+                for row in rows:
+                    huella_fila = None
+                    if con_checkpoint:
+                        clave_fila = str(row[idx_clave])
+                        huella = self._huella(row)
+                        anterior = huellas_guardadas.get(clave_fila)
+                        if incremental and anterior == huella:
+                            sin_cambios += 1
+                            continue
+                        # Se guarda solo si la fila llega a importarse o actualizarse
+                        huella_fila = HuellaFilaImportada(fuente=fuente, clave=clave_fila, huella=huella)
+
+                    email = row[idx_email]
+                    if not email:
+                        skipped += 1
+                        continue
+                    email = str(email).strip()
+                    clave = email.lower()
+                    identificacion = str(row[idx_id]).strip() if idx_id is not None and row[idx_id] is not None else ''
+                    nombre = row[idx_nombre] if idx_nombre is not None else None
+                    activo = bool(row[idx_activo]) if idx_activo is not None else True
+
+                    if incremental and anterior is not None:
+                        # Fila ya importada que cambió en la fuente
+                        cambios.append(((nombre, identificacion, email, activo), huella_fila))
+                        continue
+
+                    if clave in emails_existentes or (identificacion and identificacion in ids_existentes):
+                        skipped += 1
+                        if options['verbosity'] > 1:
+                            self.stdout.write(self.style.NOTICE(f'Estudiante con email {email} o identificación {identificacion} ya existe.'))
+                        continue
+                    emails_existentes.add(clave)
+                    if identificacion:
+                        ids_existentes.add(identificacion)
+                    nuevos.append((Estudiante(
+                        nombre=nombre or f'Visitante {email}',
+                        identificacion=identificacion,
+                        email=email,
+                        activo=activo,
+                    ), huella_fila))
+
+                if dry_run:
+                    created += len(nuevos)
+                    modificados += len(cambios)
+                    continue
+
+                insertar = dict(
+                    evento_id=evento_id, tipos=tipos, generate_codes=generate_codes,
+                    emails_con_codigos=emails_con_codigos, chunk_size=chunk_size,
+                )
+                with transaction.atomic():
+                    try:
+                        with transaction.atomic():
+                            codigos = self._insertar_nuevos([est for est, _ in nuevos], **insertar)
+                        importados = nuevos
+                    except (IntegrityError, DataError) as e:
+                        # Una fila inválida no debe tumbar el bloque: se reintenta fila por fila
+                        self.stderr.write(f'Error en el bloque de las filas {leidas - len(rows) + 1}-{leidas} ({e}); se reintenta fila por fila')
+                        codigos, importados = [], []
+                        for est, huella_fila in nuevos:
+                            est.pk = None  # bulk_create pudo asignarla antes del rollback
+                            try:
+                                with transaction.atomic():
+                                    codigos += self._insertar_nuevos([est], **insertar)
+                            except (IntegrityError, DataError) as e:
+                                fallidas += 1
+                                self.stderr.write(f'No se pudo importar {est.email} (identificación "{est.identificacion}"): {e}')
+                                continue
+                            importados.append((est, huella_fila))
+                    created += len(importados)
+                    codigos_total += len(codigos)
+                    huellas.extend(huella_fila for _, huella_fila in importados if huella_fila is not None)
+
+                    for cambio, huella_fila in cambios:
+                        if self._actualizar_modificado(*cambio):
+                            modificados += 1
+                            if huella_fila is not None:
+                                huellas.append(huella_fila)
+
+                    if con_checkpoint:
+                        # Huellas y posición se guardan junto con los datos del bloque
+                        if huellas:
+                            HuellaFilaImportada.objects.bulk_create(
+                                huellas,
+                                batch_size=chunk_size,
+                                update_conflicts=True,
+                                # MySQL (ON DUPLICATE KEY UPDATE) no admite indicar las columnas únicas
+                                unique_fields=['fuente', 'clave'] if con_destino.features.supports_update_conflicts_with_target else None,
+                                update_fields=['huella'],
+                            )
+                        punto.ultima_clave = str(rows[-1][idx_clave])
+                        punto.huella_ultima_fila = self._huella(rows[-1])
+                        punto.filas_procesadas += len(rows)
+                        punto.save(update_fields=['ultima_clave', 'huella_ultima_fila', 'filas_procesadas', 'actualizado'])
+
+                if codigos or cambios:
+                    # bulk_create/update no disparan señales: invalidar listados a mano
+                    tocar_version(TABLA_CODIGOS)
+                if codigos and send_emails:
+                    self._enviar_emails_bloque([est for est, _ in importados], codigos)
+
+                transcurrido = time.monotonic() - inicio
+                self.stdout.write(
+                    f'Leídas {leidas} filas, creados {created} estudiantes y {codigos_total} códigos, '
+                    f'{modificados} modificados, {sin_cambios} sin cambios, {fallidas} con error '
+                    f'({leidas / transcurrido:.0f} filas/s)'
+                )
+        finally:
+            cursor.close()
+
+        if punto is not None and not dry_run and not (limit and leidas >= limit):
+            punto.completado = True
+            punto.save(update_fields=['completado', 'actualizado'])
+
+        prefijo = '[DRY] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefijo}Import completed: read={leidas} created={created} updated={modificados} '
+            f'unchanged={sin_cambios} skipped={skipped} failed={fallidas} codes={codigos_total}'
+        ))
+
+    def _insertar_nuevos(self, estudiantes, evento_id, tipos, generate_codes, emails_con_codigos, chunk_size):
+        """Inserta estudiantes y, si se pide, sus códigos con bulk_create; retorna los códigos"""
+        if not estudiantes:
+            return []
+        Estudiante.objects.bulk_create(estudiantes, batch_size=chunk_size)
+        if not generate_codes:
+            return []
+        # bulk_create no devuelve PKs en MySQL: recuperarlas por email
+        ids = dict(
+            Estudiante.objects.filter(email__in=[e.email for e in estudiantes]).values_list('email', 'id')
+        )
+        sin_codigos = []
+        for est in estudiantes:
+            est.id = ids[est.email]
+            if est.email.lower() not in emails_con_codigos:
+                sin_codigos.append(est)
+        titulares = Titular.objects.registrar_varios(
+            (est.email, est.nombre, est.identificacion) for est in sin_codigos
+        )
+        codigos = [
+            CodigoQR(
+                evento_id=evento_id,
+                estudiante_id=est.id,
+                tipo_comida=tipo,
+                titular_id=titulares[est.email.lower()],
+            )
+            for est in sin_codigos
+            for tipo in tipos
+        ]
+        CodigoQR.objects.bulk_create(codigos, batch_size=chunk_size)
+        # Solo tras insertar: si el bloque falla, el reintento fila por fila los vuelve a generar
+        emails_con_codigos.update(est.email.lower() for est in sin_codigos)
+        return codigos
+
+    def _enviar_emails_bloque(self, estudiantes, codigos):
+        """Envía los emails de un bloque reutilizando una sola conexión SMTP"""
+        por_estudiante = {}
+        for codigo in codigos:
+            por_estudiante.setdefault(codigo.estudiante_id, []).append(codigo)
+
+        with get_connection() as conexion:
+            for est in estudiantes:
+                codigos_est = por_estudiante.get(est.id)
+                if not codigos_est:
+                    continue
+                if enviar_codigos_qr_email(est, codigos_est, connection=conexion):
+                    self.stdout.write(self.style.SUCCESS(f'Email enviado a {est.email}'))
+                else:
+                    self.stderr.write(f'Error al enviar email a {est.email}. Revisa configuración de correo.')
@@ -0,0 +1,201 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+from event_management.models import Visitante, CodigoQR, Titular, evento_activo_id
+from event_management.tickets import tipos_a_generar
+from event_management.versiones import TABLA_CODIGOS, tocar_version
+from datetime import timedelta
+import random
+import time
+import uuid
+
+# Dominio reservado (RFC 2606): identifica las filas sintéticas para poder borrarlas
+DOMINIO_CARGA = 'carga.invalid'
+
+# Alias de la fuente externa de visitantes (producción): solo se escribe en ella con
+# --forzar o si RICA_COPIA_LOCAL indica que es una copia local
+BD_EXTERNA = 'rica_univalle'
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Andrés', 'Valentina', 'Jorge', 'Camila',
+    'Diego', 'Daniela', 'Felipe', 'Sofía', 'Santiago', 'Natalia', 'Sebastián', 'Paula', 'Mateo', 'Isabella',
+]
+APELLIDOS = [
+    'García', 'Rodríguez', 'Martínez', 'López', 'González', 'Hernández', 'Pérez', 'Sánchez', 'Ramírez', 'Torres',
+    'Flórez', 'Gómez', 'Díaz', 'Vargas', 'Castro', 'Rojas', 'Moreno', 'Muñoz', 'Ortiz', 'Valencia',
+]
+DEPENDENCIAS = [
+    'Ingeniería', 'Salud', 'Humanidades', 'Ciencias', 'Artes Integradas', 'Administración',
+    'Psicología', 'Educación', 'Derecho', 'Ciencias Sociales',
+]
+
+# Orden de los valores en las tuplas que se insertan
+COLUMNAS_VISITANTE = ('documento', 'nombre', 'apellido', 'tipodocumento', 'dependencia', 'telefono', 'funcionario', 'email')
+COLUMNAS_TITULAR = ('documento', 'nombre', 'email')
+COLUMNAS_CODIGO = ('evento', 'titular', 'tipo_comida', 'codigo', 'usado', 'fecha_creacion', 'fecha_uso')
+
+
+class Command(BaseCommand):
+    help = (
+        'Llena una tabla visitantes local y CodigoQR con datos sintéticos deterministas para pruebas de escala. '
+        'Las filas usan emails @carga.invalid y se pueden borrar con --limpiar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--visitantes', type=int, default=10000, help='Número de visitantes a crear (cada uno recibe 3 códigos, o 1 con CODIGOS_MODO_TICKET)')
+        parser.add_argument('--usados', type=float, default=0.3, help='Proporción de códigos marcados como usados (0 a 1)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--lote', type=int, default=5000, help='Visitantes por bloque de inserción')
+        parser.add_argument(
+            '--bd-visitantes', default=None,
+            help=f'Alias de BD donde crear la tabla visitantes de prueba (por defecto {BD_EXTERNA} con '
+                 f'DB_RICA_LOCAL=True y default en otro caso; {BD_EXTERNA} sin DB_RICA_LOCAL exige --forzar)'
+        )
+        parser.add_argument('--sin-visitantes', action='store_true', help='Crear solo los códigos, sin tocar la tabla visitantes')
+        parser.add_argument('--limpiar', action='store_true', help='Borrar las filas sintéticas existentes antes de generar (con --visitantes 0 solo borra)')
+        parser.add_argument('--forzar', action='store_true', help=f'Permitir ejecutar con DEBUG=False o escribir en {BD_EXTERNA}')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['forzar']:
+            raise CommandError('seed_carga escribe datos sintéticos; con DEBUG=False usa --forzar si estás seguro de la BD destino')
+        if not 0 <= options['usados'] <= 1:
+            raise CommandError('--usados debe estar entre 0 y 1')
+        copia_local = settings.RICA_COPIA_LOCAL
+        alias = options['bd_visitantes'] or (BD_EXTERNA if copia_local else 'default')
+        if alias not in settings.DATABASES:
+            raise CommandError(f'Alias de BD desconocido: {alias}')
+        con_visitantes = not options['sin_visitantes']
+        if con_visitantes and alias == BD_EXTERNA and not (copia_local or options['forzar']):
+            raise CommandError(
+                f'{BD_EXTERNA} es la fuente externa de visitantes; define DB_RICA_LOCAL=True (o usa --forzar) '
+                'solo si apunta a una copia local'
+            )
+        if con_visitantes and not self._misma_bd(alias, router.db_for_read(Visitante)):
+            self.stdout.write(self.style.WARNING(
+                f'Los visitantes se leen de {router.db_for_read(Visitante)} (config/db_router.py): la API no verá '
+                f'los creados en {alias}. Apunta DB_RICA_* a una BD local con DB_RICA_LOCAL=True.'
+            ))
+
+        if con_visitantes:
+            self._asegurar_tabla_visitantes(alias)
+        if options['limpiar']:
+            self._limpiar(alias if con_visitantes else None)
+        elif Titular.objects.filter(email__endswith=f'@{DOMINIO_CARGA}').exists():
+            raise CommandError('Ya hay datos sintéticos; usa --limpiar para reemplazarlos')
+
+        total = options['visitantes']
+        if total <= 0:
+            return
+
+        evento_id = evento_activo_id()
+        if evento_id is None:
+            raise CommandError('No hay un evento activo donde crear los códigos')
+
+        rng = random.Random(options['semilla'])
+        proporcion_usados = options['usados']
+        lote = max(1, options['lote'])
+        tipos = tipos_a_generar()
+        conexion = connections['default']
+        campo_codigo = CodigoQR._meta.get_field('codigo')
+        campo_fecha = CodigoQR._meta.get_field('fecha_uso')
+        ahora = timezone.now()
+        fecha_creacion = CodigoQR._meta.get_field('fecha_creacion').get_db_prep_save(ahora, conexion)
+        creados_visitantes = creados_titulares = creados_codigos = 0
+        inicio = time.monotonic()
+
+        for desde in range(0, total, lote):
+            visitantes = []
+            titulares = []
+            codigos = []
+            for i in range(desde, min(desde + lote, total)):
+                documento = str(1000000000 + i)
+                nombre = rng.choice(NOMBRES)
+                apellido = f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}'
+                email = f'{nombre.lower()}.{i}@{DOMINIO_CARGA}'
+                if con_visitantes:
+                    visitantes.append((
+                        documento, nombre, apellido, 'CC', rng.choice(DEPENDENCIAS),
+                        f'3{rng.randrange(10 ** 9):09d}', rng.choice(('SI', 'NO')), email,
+                    ))
+                titulares.append((documento, f'{nombre} {apellido}', email))
+                for tipo in tipos:
+                    usado = rng.random() < proporcion_usados
+                    fecha_uso = ahora - timedelta(seconds=rng.randrange(86400)) if usado else None
+                    codigos.append([
+                        evento_id, email, tipo,
+                        campo_codigo.get_db_prep_save(uuid.UUID(int=rng.getrandbits(128), version=4), conexion),
+                        usado, fecha_creacion, campo_fecha.get_db_prep_save(fecha_uso, conexion),
+                    ])
+
+            if visitantes:
+                self._insertar(alias, Visitante, COLUMNAS_VISITANTE, visitantes)
+            self._insertar('default', Titular, COLUMNAS_TITULAR, titulares)
+            # Los códigos llevan la PK del titular: se lee una vez por bloque
+            ids = dict(Titular.objects.filter(email__in=[t[2] for t in titulares]).values_list('email', 'id'))
+            for codigo in codigos:
+                codigo[1] = ids[codigo[1]]
+            self._insertar('default', CodigoQR, COLUMNAS_CODIGO, codigos)
+            creados_visitantes += len(visitantes)
+            creados_titulares += len(titulares)
+            creados_codigos += len(codigos)
+
+            transcurrido = time.monotonic() - inicio
+            self.stdout.write(
+                f'{creados_visitantes} visitantes, {creados_codigos} códigos '
+                f'({(creados_visitantes + creados_titulares + creados_codigos) / transcurrido:.0f} filas/s)'
+            )
+
+        # Los INSERT directos no disparan señales: invalidar los ETag de los listados a mano
+        tocar_version(TABLA_CODIGOS)
+        transcurrido = time.monotonic() - inicio
+        self.stdout.write(self.style.SUCCESS(
+            f'Generados {creados_visitantes} visitantes y {creados_codigos} códigos en {transcurrido:.1f}s'
+        ))
+
+    def _misma_bd(self, alias, otro):
+        """Indica si dos alias de ``DATABASES`` apuntan a la misma base de datos"""
+        def destino(nombre):
+            datos = settings.DATABASES[nombre]
+            return tuple(datos.get(clave) for clave in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+        return alias == otro or destino(alias) == destino(otro)
+
+    def _insertar(self, alias, modelo, campos, filas):
+        """
+        INSERT con executemany de tuplas ya preparadas: bulk_create dedica la
+        mayor parte del tiempo a compilar cada campo de cada instancia
+        """
+        conexion = connections[alias]
+        columnas = ', '.join(conexion.ops.quote_name(modelo._meta.get_field(c).column) for c in campos)
+        marcadores = ', '.join(['%s'] * len(campos))
+        sql = f'INSERT INTO {conexion.ops.quote_name(modelo._meta.db_table)} ({columnas}) VALUES ({marcadores})'
+        with transaction.atomic(using=alias), conexion.cursor() as cursor:
+            cursor.executemany(sql, filas)
+
+    def _asegurar_tabla_visitantes(self, alias):
+        """Crea la tabla visitantes en ``alias`` si no existe (el modelo es managed=False)"""
+        conexion = connections[alias]
+        if Visitante._meta.db_table in conexion.introspection.table_names():
+            return
+        with conexion.schema_editor() as editor:
+            editor.create_model(Visitante)
+        self.stdout.write(self.style.NOTICE(f'Creada la tabla {Visitante._meta.db_table} en {alias}'))
+
+    def _limpiar(self, alias):
+        # DELETE directo: queryset.delete() cargaría cada fila para las señales post_delete
+        patron = f'%@{DOMINIO_CARGA}'
+        q = connections['default'].ops.quote_name
+        titulares = f'SELECT {q("id")} FROM {q(Titular._meta.db_table)} WHERE {q("email")} LIKE %s'
+        # Primero los códigos (la FK al titular es PROTECT), después los titulares
+        sentencias = [
+            ('default', CodigoQR._meta.db_table, f'{q(CodigoQR._meta.get_field("titular").column)} IN ({titulares})'),
+            ('default', Titular._meta.db_table, f'{q("email")} LIKE %s'),
+        ]
+        if alias:
+            sentencias.append((alias, Visitante._meta.db_table, f'{connections[alias].ops.quote_name("email")} LIKE %s'))
+        for bd, tabla, condicion in sentencias:
+            conexion = connections[bd]
+            with conexion.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {conexion.ops.quote_name(tabla)} WHERE {condicion}', [patron])
+                self.stdout.write(f'Borradas {cursor.rowcount} filas sintéticas de {tabla} ({bd})')
+        tocar_version(TABLA_CODIGOS)
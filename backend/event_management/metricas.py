@@ -0,0 +1,242 @@
+"""
+Métricas de la API en formato Prometheus.
+
+``MetricasMiddleware`` registra por ruta (nombre de la vista) el número de
+peticiones, un histograma de latencia y las consultas/tiempo de BD por alias,
+y añade la cabecera ``Server-Timing``. ``medir_smtp`` mide los envíos de
+``email_utils``. Los datos se publican en ``/metrics``.
+
+Los contadores son por proceso: con varios workers cada uno expone los suyos
+(Prometheus los suma por instancia).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# Límites superiores (segundos) de los buckets de los histogramas
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histograma:
+    """Histograma acumulativo al estilo Prometheus"""
+
+    __slots__ = ('conteos', 'suma', 'total')
+
+    def __init__(self):
+        self.conteos = [0] * (len(BUCKETS) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.conteos[bisect.bisect_left(BUCKETS, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre, etiquetas):
+        acumulado = 0
+        for limite, conteo in zip(BUCKETS + ('+Inf',), self.conteos):
+            acumulado += conteo
+            yield f'{nombre}_bucket{{{etiquetas},le="{limite}"}} {acumulado}'
+        yield f'{nombre}_sum{{{etiquetas}}} {self.suma:.6f}'
+        yield f'{nombre}_count{{{etiquetas}}} {self.total}'
+
+
+class RegistroMetricas:
+    """Almacén en memoria de las métricas del proceso"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.peticiones = {}
+        self.latencias = {}
+        self.consultas = {}
+        self.smtp = Histograma()
+        self.smtp_resultados = {'ok': 0, 'error': 0}
+
+    def observar_peticion(self, ruta, metodo, estado, duracion, consultas):
+        with self._lock:
+            clave = (ruta, metodo, estado)
+            self.peticiones[clave] = self.peticiones.get(clave, 0) + 1
+            histograma = self.latencias.get((ruta, metodo))
+            if histograma is None:
+                histograma = self.latencias[(ruta, metodo)] = Histograma()
+            histograma.observar(duracion)
+            for alias, (numero, tiempo) in consultas.items():
+                if numero:
+                    acumulado = self.consultas.setdefault((ruta, alias), [0, 0.0])
+                    acumulado[0] += numero
+                    acumulado[1] += tiempo
+
+    def observar_smtp(self, duracion, exito):
+        with self._lock:
+            self.smtp.observar(duracion)
+            self.smtp_resultados['ok' if exito else 'error'] += 1
+
+    def exportar(self):
+        """Texto en formato de exposición de Prometheus"""
+        from .resiliencia import estadisticas_conexiones, interruptor_rica
+
+        lineas = []
+        with self._lock:
+            lineas += [
+                '# HELP refrigerios_http_peticiones_total Peticiones HTTP por ruta, método y estado.',
+                '# TYPE refrigerios_http_peticiones_total counter',
+            ]
+            for (ruta, metodo, estado), valor in sorted(self.peticiones.items()):
+                lineas.append(
+                    f'refrigerios_http_peticiones_total{{ruta="{ruta}",metodo="{metodo}",estado="{estado}"}} {valor}'
+                )
+            lineas += [
+                '# HELP refrigerios_http_duracion_segundos Latencia de las peticiones HTTP.',
+                '# TYPE refrigerios_http_duracion_segundos histogram',
+            ]
+            for (ruta, metodo), histograma in sorted(self.latencias.items()):
+                lineas += histograma.lineas('refrigerios_http_duracion_segundos', f'ruta="{ruta}",metodo="{metodo}"')
+            lineas += [
+                '# HELP refrigerios_bd_consultas_total Consultas SQL por ruta y alias de BD.',
+                '# TYPE refrigerios_bd_consultas_total counter',
+            ]
+            for (ruta, alias), (numero, _) in sorted(self.consultas.items()):
+                lineas.append(f'refrigerios_bd_consultas_total{{ruta="{ruta}",alias="{alias}"}} {numero}')
+            lineas += [
+                '# HELP refrigerios_bd_duracion_segundos_total Tiempo en consultas SQL por ruta y alias de BD.',
+                '# TYPE refrigerios_bd_duracion_segundos_total counter',
+            ]
+            for (ruta, alias), (_, tiempo) in sorted(self.consultas.items()):
+                lineas.append(f'refrigerios_bd_duracion_segundos_total{{ruta="{ruta}",alias="{alias}"}} {tiempo:.6f}')
+            lineas += [
+                '# HELP refrigerios_smtp_envio_segundos Duración de los envíos de email.',
+                '# TYPE refrigerios_smtp_envio_segundos histogram',
+            ]
+            lineas += self.smtp.lineas('refrigerios_smtp_envio_segundos', 'backend="smtp"')
+            lineas += [
+                '# HELP refrigerios_smtp_envios_total Envíos de email por resultado.',
+                '# TYPE refrigerios_smtp_envios_total counter',
+            ]
+            for resultado, valor in self.smtp_resultados.items():
+                lineas.append(f'refrigerios_smtp_envios_total{{resultado="{resultado}"}} {valor}')
+
+        lineas += [
+            '# HELP refrigerios_bd_conexiones_abiertas Conexiones abiertas por alias de BD.',
+            '# TYPE refrigerios_bd_conexiones_abiertas gauge',
+        ]
+        for alias, datos in estadisticas_conexiones.por_alias().items():
+            lineas.append(f'refrigerios_bd_conexiones_abiertas{{alias="{alias}"}} {datos["conexiones_abiertas"]}')
+        circuito = interruptor_rica.estadisticas()
+        lineas += [
+            '# HELP refrigerios_circuito_abierto 1 si el circuito de rica_univalle no está cerrado.',
+            '# TYPE refrigerios_circuito_abierto gauge',
+            f'refrigerios_circuito_abierto{{nombre="rica_univalle"}} {int(circuito["estado"] != "CERRADO")}',
+            '# HELP refrigerios_circuito_disparos_total Veces que se abrió el circuito.',
+            '# TYPE refrigerios_circuito_disparos_total counter',
+            f'refrigerios_circuito_disparos_total{{nombre="rica_univalle"}} {circuito["disparos"]}',
+        ]
+        return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+@contextmanager
+def medir_smtp():
+    """Mide un envío de email y registra si terminó bien o con error"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        registro.observar_smtp(time.perf_counter() - inicio, exito=False)
+        raise
+    registro.observar_smtp(time.perf_counter() - inicio, exito=True)
+
+
+# Consultas {alias: [número, segundos]} de la petición en curso. Las conexiones
+# son por hilo, pero las variables de contexto también llegan a los hilos de
+# sync_to_async (vistas síncronas bajo ASGI y ORM asíncrono)
+_consultas_peticion = ContextVar('consultas_peticion', default=None)
+
+
+def contar_consultas(execute, sql, params, many, context):
+    """execute_wrapper permanente (ver ``instalar_contador``); solo mide dentro de una petición"""
+    consultas = _consultas_peticion.get()
+    if consultas is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        acumulado = consultas.setdefault(context['connection'].alias, [0, 0.0])
+        acumulado[0] += 1
+        acumulado[1] += time.perf_counter() - inicio
+
+
+def instalar_contador(conexion):
+    """Se llama desde la señal ``connection_created``"""
+    if contar_consultas not in conexion.execute_wrappers:
+        # Al inicio de la lista: execute_wrapper() retira con pop() el último
+        conexion.execute_wrappers.insert(0, contar_consultas)
+
+
+class MetricasMiddleware:
+    """
+    Registra latencia y consultas por ruta y añade la cabecera Server-Timing.
+    Funciona en modo síncrono (WSGI) y asíncrono (ASGI).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        consultas = {}
+        token = _consultas_peticion.set(consultas)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _consultas_peticion.reset(token)
+        return self._registrar(request, response, duracion, consultas)
+
+    async def __acall__(self, request):
+        consultas = {}
+        token = _consultas_peticion.set(consultas)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _consultas_peticion.reset(token)
+        return self._registrar(request, response, duracion, consultas)
+
+    def _registrar(self, request, response, duracion, consultas):
+        # Etiquetar por nombre de vista para no crear una serie por URL
+        coincidencia = getattr(request, 'resolver_match', None)
+        ruta = (coincidencia.view_name or coincidencia.route) if coincidencia else 'sin_ruta'
+        registro.observar_peticion(ruta, request.method, response.status_code, duracion, consultas)
+
+        tiempos = [f'total;dur={duracion * 1000:.1f}']
+        for alias, (numero, tiempo) in consultas.items():
+            if numero:
+                tiempos.append(f'db-{alias};dur={tiempo * 1000:.1f};desc="{numero} consultas"')
+        response['Server-Timing'] = ', '.join(tiempos)
+        return response
+
+
+def metricas_prometheus(request):
+    """Vista de ``/metrics``; si ``METRICAS_TOKEN`` está definido exige ``Authorization: Bearer <token>``"""
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(registro.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-19 16:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0003_alter_codigoqr_visitante_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionTabla',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabla', models.CharField(max_length=50, unique=True, verbose_name='Tabla')),
+                ('version', models.BigIntegerField(default=0, verbose_name='Versión')),
+                ('modificado', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Última Modificación')),
+            ],
+            options={
+                'verbose_name': 'Versión de Tabla',
+                'verbose_name_plural': 'Versiones de Tablas',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0004_versiontabla'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuntoControlImportacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fuente', models.CharField(max_length=255, unique=True, verbose_name='Fuente')),
+                ('campo_clave', models.CharField(max_length=100, verbose_name='Columna Clave')),
+                ('ultima_clave', models.CharField(blank=True, default='', max_length=100, verbose_name='Última Clave Procesada')),
+                ('huella_ultima_fila', models.CharField(blank=True, default='', max_length=32, verbose_name='Huella de la Última Fila')),
+                ('filas_procesadas', models.BigIntegerField(default=0, verbose_name='Filas Procesadas')),
+                ('completado', models.BooleanField(default=False, verbose_name='Completado')),
+                ('actualizado', models.DateTimeField(auto_now=True, verbose_name='Actualizado')),
+            ],
+            options={
+                'verbose_name': 'Punto de Control de Importación',
+                'verbose_name_plural': 'Puntos de Control de Importación',
+            },
+        ),
+        migrations.CreateModel(
+            name='HuellaFilaImportada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fuente', models.CharField(max_length=255, verbose_name='Fuente')),
+                ('clave', models.CharField(max_length=100, verbose_name='Clave')),
+                ('huella', models.CharField(max_length=32, verbose_name='Huella')),
+            ],
+            options={
+                'verbose_name': 'Huella de Fila Importada',
+                'verbose_name_plural': 'Huellas de Filas Importadas',
+                'unique_together': {('fuente', 'clave')},
+            },
+        ),
+    ]
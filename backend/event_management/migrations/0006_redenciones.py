@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0005_puntos_control_importacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Redencion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo', models.UUIDField(blank=True, null=True, verbose_name='Código QR')),
+                ('resultado', models.CharField(choices=[('VALIDADO', 'Validado'), ('USADO', 'Ya utilizado'), ('NO_VALIDO', 'No válido')], max_length=10, verbose_name='Resultado')),
+                ('tipo_comida', models.CharField(blank=True, choices=[('DESAYUNO', 'Desayuno'), ('ALMUERZO', 'Almuerzo'), ('REFRIGERIO', 'Refrigerio')], default='', max_length=20, verbose_name='Tipo de Comida')),
+                ('estacion', models.CharField(blank=True, default='', max_length=100, verbose_name='Estación')),
+                ('fecha', models.DateTimeField(db_index=True, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Redención',
+                'verbose_name_plural': 'Redenciones',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenRedencionDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField(verbose_name='Día')),
+                ('estacion', models.CharField(blank=True, default='', max_length=100, verbose_name='Estación')),
+                ('tipo_comida', models.CharField(blank=True, choices=[('DESAYUNO', 'Desayuno'), ('ALMUERZO', 'Almuerzo'), ('REFRIGERIO', 'Refrigerio')], default='', max_length=20, verbose_name='Tipo de Comida')),
+                ('resultado', models.CharField(choices=[('VALIDADO', 'Validado'), ('USADO', 'Ya utilizado'), ('NO_VALIDO', 'No válido')], max_length=10, verbose_name='Resultado')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Total')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Redenciones',
+                'verbose_name_plural': 'Resúmenes Diarios de Redenciones',
+                'ordering': ['-dia', 'estacion', 'tipo_comida', 'resultado'],
+                'unique_together': {('dia', 'estacion', 'tipo_comida', 'resultado')},
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:29
+
+import django.db.models.deletion
+import event_management.models
+from django.db import migrations, models
+
+
+def crear_evento_inicial(apps, schema_editor):
+    """Los códigos existentes pasan a un evento inicial, que queda activo"""
+    Evento = apps.get_model('event_management', 'Evento')
+    CodigoQR = apps.get_model('event_management', 'CodigoQR')
+    evento = Evento.objects.create(nombre='Evento inicial', activo=True)
+    CodigoQR.objects.update(evento=evento)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0006_redenciones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Evento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=200, unique=True, verbose_name='Nombre')),
+                ('fecha', models.DateField(blank=True, null=True, verbose_name='Fecha')),
+                ('activo', models.BooleanField(default=False, verbose_name='Activo')),
+                ('archivado', models.BooleanField(default=False, verbose_name='Archivado')),
+                ('archivo', models.CharField(blank=True, default='', max_length=255, verbose_name='Archivo')),
+                ('codigos_archivados', models.PositiveIntegerField(default=0, verbose_name='Códigos Archivados')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+            ],
+            options={
+                'verbose_name': 'Evento',
+                'verbose_name_plural': 'Eventos',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.AddField(
+            model_name='codigoqr',
+            name='evento',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='codigos', to='event_management.evento', verbose_name='Evento'),
+        ),
+        migrations.RunPython(crear_evento_inicial, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='codigoqr',
+            name='evento',
+            field=models.ForeignKey(default=event_management.models.evento_activo_id, on_delete=django.db.models.deletion.PROTECT, related_name='codigos', to='event_management.evento', verbose_name='Evento'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='codigoqr',
+            unique_together=set(),
+        ),
+        migrations.AlterUniqueTogether(
+            name='codigoqr',
+            unique_together={('evento', 'visitante_email', 'tipo_comida')},
+        ),
+        migrations.AddIndex(
+            model_name='codigoqr',
+            index=models.Index(fields=['evento', 'usado', 'tipo_comida'], name='codigoqr_evento_usado_tipo'),
+        ),
+        migrations.AddIndex(
+            model_name='codigoqr',
+            index=models.Index(fields=['evento', 'visitante_identificacion'], name='codigoqr_evento_ident'),
+        ),
+    ]
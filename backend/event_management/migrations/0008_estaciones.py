@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0007_eventos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Estacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identificador', models.CharField(max_length=100, unique=True, verbose_name='Identificador')),
+                ('nombre', models.CharField(blank=True, default='', max_length=200, verbose_name='Nombre')),
+                ('escaneos', models.BigIntegerField(default=0, verbose_name='Escaneos')),
+                ('errores', models.BigIntegerField(default=0, verbose_name='Escaneos Rechazados')),
+                ('ultimo_escaneo', models.DateTimeField(blank=True, null=True, verbose_name='Último Escaneo')),
+                ('ultimo_latido', models.DateTimeField(blank=True, null=True, verbose_name='Último Latido')),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Registro')),
+            ],
+            options={
+                'verbose_name': 'Estación',
+                'verbose_name_plural': 'Estaciones',
+                'ordering': ['identificador'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0008_estaciones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='codigoqr',
+            index=models.Index(fields=['tipo_comida', 'usado'], name='codigoqr_tipo_usado'),
+        ),
+        migrations.AddIndex(
+            model_name='codigoqr',
+            index=models.Index(fields=['visitante_identificacion'], name='codigoqr_ident'),
+        ),
+        migrations.AddIndex(
+            model_name='codigoqr',
+            index=models.Index(fields=['visitante_email'], name='codigoqr_email'),
+        ),
+        migrations.AddIndex(
+            model_name='codigoqr',
+            index=models.Index(fields=['visitante_nombre'], name='codigoqr_nombre'),
+        ),
+    ]
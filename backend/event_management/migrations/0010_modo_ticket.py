@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0009_indices_admin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='codigoqr',
+            name='tipo_comida',
+            field=models.CharField(choices=[('DESAYUNO', 'Desayuno'), ('ALMUERZO', 'Almuerzo'), ('REFRIGERIO', 'Refrigerio'), ('TICKET', 'Ticket (todas las comidas)')], max_length=20, verbose_name='Tipo de Comida'),
+        ),
+        migrations.AlterField(
+            model_name='redencion',
+            name='tipo_comida',
+            field=models.CharField(blank=True, choices=[('DESAYUNO', 'Desayuno'), ('ALMUERZO', 'Almuerzo'), ('REFRIGERIO', 'Refrigerio'), ('TICKET', 'Ticket (todas las comidas)')], default='', max_length=20, verbose_name='Tipo de Comida'),
+        ),
+        migrations.AlterField(
+            model_name='resumenredenciondiario',
+            name='tipo_comida',
+            field=models.CharField(blank=True, choices=[('DESAYUNO', 'Desayuno'), ('ALMUERZO', 'Almuerzo'), ('REFRIGERIO', 'Refrigerio'), ('TICKET', 'Ticket (todas las comidas)')], default='', max_length=20, verbose_name='Tipo de Comida'),
+        ),
+        migrations.CreateModel(
+            name='ConsumoTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_comida', models.CharField(choices=[('DESAYUNO', 'Desayuno'), ('ALMUERZO', 'Almuerzo'), ('REFRIGERIO', 'Refrigerio')], max_length=20, verbose_name='Tipo de Comida')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('codigo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='consumos', to='event_management.codigoqr', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': 'Consumo de Ticket',
+                'verbose_name_plural': 'Consumos de Tickets',
+                'unique_together': {('codigo', 'tipo_comida')},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:48
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0010_modo_ticket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Bloqueo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=64, unique=True, verbose_name='Nombre')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Bloqueo',
+                'verbose_name_plural': 'Bloqueos',
+            },
+        ),
+        migrations.CreateModel(
+            name='SolicitudIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=100, verbose_name='Clave')),
+                ('ruta', models.CharField(max_length=200, verbose_name='Ruta')),
+                ('huella', models.CharField(max_length=64, verbose_name='Huella del Cuerpo')),
+                ('estado', models.CharField(choices=[('EN_CURSO', 'En curso'), ('COMPLETADA', 'Completada')], default='EN_CURSO', max_length=10, verbose_name='Estado')),
+                ('codigo_estado', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Código HTTP')),
+                ('respuesta', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Respuesta')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Fecha de Creación')),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de Finalización')),
+            ],
+            options={
+                'verbose_name': 'Solicitud Idempotente',
+                'verbose_name_plural': 'Solicitudes Idempotentes',
+                'unique_together': {('clave', 'ruta')},
+            },
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.7 on 2026-10-19 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+LOTE = 2000
+
+
+def plegar_titulares(apps, schema_editor):
+    """
+    Un Titular por email con los datos del código más reciente; luego cada
+    código apunta al suyo. Los emails se comparan sin mayúsculas, como en MySQL.
+    """
+    CodigoQR = apps.get_model('event_management', 'CodigoQR')
+    Titular = apps.get_model('event_management', 'Titular')
+
+    datos = {}
+    filas = CodigoQR.objects.order_by('id').values_list(
+        'visitante_email', 'visitante_nombre', 'visitante_identificacion', 'visitante_id'
+    )
+    for email, nombre, identificacion, visitante_id in filas.iterator(chunk_size=LOTE):
+        datos[email.lower()] = (email, nombre or '', identificacion or visitante_id or '')
+    Titular.objects.bulk_create(
+        [Titular(email=email, nombre=nombre, documento=documento) for email, nombre, documento in datos.values()],
+        batch_size=LOTE
+    )
+    ids = {email.lower(): pk for email, pk in Titular.objects.values_list('email', 'id').iterator(chunk_size=LOTE)}
+
+    ultimo = 0
+    while True:
+        bloque = list(CodigoQR.objects.filter(pk__gt=ultimo).order_by('pk').only('id', 'visitante_email')[:LOTE])
+        if not bloque:
+            return
+        for codigo in bloque:
+            codigo.titular_id = ids[codigo.visitante_email.lower()]
+        CodigoQR.objects.bulk_update(bloque, ['titular'])
+        ultimo = bloque[-1].pk
+
+
+def desplegar_titulares(apps, schema_editor):
+    """Copia de vuelta los datos del titular en las columnas visitante_* de cada código"""
+    CodigoQR = apps.get_model('event_management', 'CodigoQR')
+    Titular = apps.get_model('event_management', 'Titular')
+    for titular in Titular.objects.iterator(chunk_size=LOTE):
+        CodigoQR.objects.filter(titular=titular).update(
+            visitante_id=titular.documento or None,
+            visitante_nombre=titular.nombre,
+            visitante_identificacion=titular.documento,
+            visitante_email=titular.email,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_management', '0011_idempotencia_bloqueos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Titular',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('documento', models.CharField(default='', max_length=50, verbose_name='Identificación')),
+                ('nombre', models.CharField(default='', max_length=200, verbose_name='Nombre')),
+                ('email', models.EmailField(max_length=254, unique=True, verbose_name='Email')),
+            ],
+            options={
+                'verbose_name': 'Titular',
+                'verbose_name_plural': 'Titulares',
+                'ordering': ['nombre'],
+                'indexes': [
+                    models.Index(fields=['documento'], name='titular_documento'),
+                    models.Index(fields=['nombre'], name='titular_nombre'),
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name='codigoqr',
+            name='titular',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='codigos', to='event_management.titular', verbose_name='Titular'),
+        ),
+        # Antes de los datos: al revertir, la unicidad por email vuelve después de restaurar los emails
+        migrations.AlterUniqueTogether(
+            name='codigoqr',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='codigoqr',
+            name='codigoqr_evento_ident',
+        ),
+        migrations.RemoveIndex(
+            model_name='codigoqr',
+            name='codigoqr_ident',
+        ),
+        migrations.RemoveIndex(
+            model_name='codigoqr',
+            name='codigoqr_email',
+        ),
+        migrations.RemoveIndex(
+            model_name='codigoqr',
+            name='codigoqr_nombre',
+        ),
+        migrations.RunPython(plegar_titulares, desplegar_titulares),
+        migrations.AlterModelOptions(
+            name='codigoqr',
+            options={'ordering': ['titular__nombre', 'tipo_comida'], 'verbose_name': 'Código QR', 'verbose_name_plural': 'Códigos QR'},
+        ),
+        migrations.RemoveField(
+            model_name='codigoqr',
+            name='visitante_id',
+        ),
+        migrations.RemoveField(
+            model_name='codigoqr',
+            name='visitante_nombre',
+        ),
+        migrations.RemoveField(
+            model_name='codigoqr',
+            name='visitante_identificacion',
+        ),
+        migrations.RemoveField(
+            model_name='codigoqr',
+            name='visitante_email',
+        ),
+        migrations.AlterField(
+            model_name='codigoqr',
+            name='titular',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='codigos', to='event_management.titular', verbose_name='Titular'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='codigoqr',
+            unique_together={('evento', 'titular', 'tipo_comida')},
+        ),
+    ]
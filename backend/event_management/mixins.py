@@ -0,0 +1,42 @@
+from django.utils import timezone
+from rest_framework.response import Response
+from .serializers import campos_solicitados
+
+
+class ListadoRapidoMixin:
+    """
+    Listado de solo lectura basado en ``values()``.
+
+    En lugar de instanciar el serializador por cada fila, se piden a la BD solo
+    las columnas necesarias para los campos solicitados (``?fields=``) y cada
+    fila se transforma con las funciones de ``valores_rapidos`` del
+    serializador. La salida es idéntica a la del serializador completo.
+    """
+
+    def get_campos_listado(self):
+        disponibles = list(self.get_serializer_class().valores_rapidos)
+        return campos_solicitados(self.request, disponibles) or disponibles
+
+    def filas_rapidas(self, queryset, campos):
+        """Convierte un queryset en la lista de diccionarios que devolvería el serializador"""
+        valores = self.get_serializer_class().valores_rapidos
+        columnas = list(dict.fromkeys(
+            columna for campo in campos for columna in valores[campo][0]
+        ))
+        # values() sin columnas traería todas; pedimos al menos la PK
+        filas = queryset.values(*(columnas or ['pk']))
+        return filas, [(campo, valores[campo][1]) for campo in campos]
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        filas, conversores = self.filas_rapidas(queryset, self.get_campos_listado())
+
+        page = self.paginate_queryset(filas)
+        zona = timezone.get_current_timezone()
+        datos = [
+            {campo: convertir(fila, zona) for campo, convertir in conversores}
+            for fila in (page if page is not None else filas)
+        ]
+        if page is not None:
+            return self.get_paginated_response(datos)
+        return Response(datos)
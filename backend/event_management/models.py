@@ -1,3 +1,5 @@
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 import uuid
 from django.utils import timezone
@@ -66,14 +68,133 @@ class Estudiante(models.Model):
         return f"{self.nombre} - {self.identificacion}"
 
 
+class Evento(models.Model):
+    """
+    Evento al que pertenecen los códigos QR. Solo uno está activo: en él se
+    generan y validan códigos. Los eventos terminados se pasan a un archivo
+    JSONL.gz con ``archivar_evento`` y sus códigos se borran de la tabla.
+    """
+    nombre = models.CharField(max_length=200, unique=True, verbose_name="Nombre")
+    fecha = models.DateField(null=True, blank=True, verbose_name="Fecha")
+    activo = models.BooleanField(default=False, verbose_name="Activo")
+    archivado = models.BooleanField(default=False, verbose_name="Archivado")
+    archivo = models.CharField(max_length=255, blank=True, default='', verbose_name="Archivo")
+    codigos_archivados = models.PositiveIntegerField(default=0, verbose_name="Códigos Archivados")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
+
+    class Meta:
+        verbose_name = "Evento"
+        verbose_name_plural = "Eventos"
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        estado = " (activo)" if self.activo else (" (archivado)" if self.archivado else "")
+        return f"{self.nombre}{estado}"
+
+    def clean(self):
+        if self.activo and self.archivado:
+            raise ValidationError('Un evento archivado no se puede activar: sus códigos ya no están en la tabla.')
+
+    def save(self, *args, **kwargs):
+        # Activar un evento desactiva los demás
+        if self.activo:
+            Evento.objects.filter(activo=True).exclude(pk=self.pk).update(activo=False)
+        super().save(*args, **kwargs)
+
+
+def evento_activo_id():
+    """PK del evento activo (valor por defecto de ``CodigoQR.evento``)"""
+    return Evento.objects.filter(activo=True).values_list('id', flat=True).first()
+
+
+class TitularQuerySet(models.QuerySet):
+    def registrar(self, email, nombre, documento):
+        """Titular con ``email``: lo crea o pone al día su nombre y documento"""
+        titular, creado = self.get_or_create(email=email, defaults={'nombre': nombre, 'documento': documento})
+        if not creado and (titular.nombre, titular.documento) != (nombre, documento):
+            titular.nombre, titular.documento = nombre, documento
+            titular.save(update_fields=['nombre', 'documento'])
+        return titular
+
+    def registrar_varios(self, datos):
+        """
+        ``registrar`` por lotes para tuplas (email, nombre, documento): pocas
+        consultas en total. Retorna {email en minúsculas: id del titular}.
+        """
+        por_email = {email.lower(): (email, nombre, documento) for email, nombre, documento in datos}
+        if not por_email:
+            return {}
+        emails = [email for email, _, _ in por_email.values()]
+        existentes = {t.email.lower(): t for t in self.filter(email__in=emails)}
+        cambiados = []
+        for clave, titular in existentes.items():
+            _, nombre, documento = por_email[clave]
+            if (titular.nombre, titular.documento) != (nombre, documento):
+                titular.nombre, titular.documento = nombre, documento
+                cambiados.append(titular)
+        if cambiados:
+            self.bulk_update(cambiados, ['nombre', 'documento'])
+            # bulk_update no dispara post_save: los listados de códigos muestran estos datos
+            # (import local: versiones importa este módulo)
+            from .versiones import TABLA_CODIGOS, tocar_version
+            tocar_version(TABLA_CODIGOS)
+        nuevos = [
+            Titular(email=email, nombre=nombre, documento=documento)
+            for clave, (email, nombre, documento) in por_email.items() if clave not in existentes
+        ]
+        ids = {clave: titular.pk for clave, titular in existentes.items()}
+        if nuevos:
+            # Otro proceso pudo crear alguno entre la lectura y el INSERT; las PK se leen después
+            self.bulk_create(nuevos, ignore_conflicts=True)
+            ids.update(
+                (email.lower(), pk)
+                for email, pk in self.filter(email__in=[t.email for t in nuevos]).values_list('email', 'id')
+            )
+        return ids
+
+
+class Titular(models.Model):
+    """
+    Persona a la que se emiten códigos QR (visitante de rica_univalle o
+    estudiante). Los códigos la referencian en lugar de copiar sus datos en
+    cada fila; se identifica por email, igual que la unicidad de los códigos.
+    """
+    documento = models.CharField(max_length=50, default='', verbose_name="Identificación")
+    nombre = models.CharField(max_length=200, default='', verbose_name="Nombre")
+    email = models.EmailField(unique=True, verbose_name="Email")
+
+    objects = TitularQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Titular"
+        verbose_name_plural = "Titulares"
+        # Búsquedas por prefijo del admin y de los códigos de un visitante
+        indexes = [
+            models.Index(fields=['documento'], name='titular_documento'),
+            models.Index(fields=['nombre'], name='titular_nombre'),
+        ]
+        ordering = ['nombre']
+
+    def __str__(self):
+        return f"{self.nombre} - {self.documento}"
+
+
+class CodigoQRQuerySet(models.QuerySet):
+    def del_evento_activo(self):
+        return self.filter(evento__activo=True)
+
+
 class CodigoQR(models.Model):
     """Modelo para los códigos QR de cada tipo de comida"""
     
-    TIPO_COMIDA_CHOICES = [
+    COMIDA_CHOICES = [
         ('DESAYUNO', 'Desayuno'),
         ('ALMUERZO', 'Almuerzo'),
         ('REFRIGERIO', 'Refrigerio'),
     ]
+    # Modo ticket: un solo código para todas las comidas (ver tickets.py)
+    TICKET = 'TICKET'
+    TIPO_COMIDA_CHOICES = COMIDA_CHOICES + [(TICKET, 'Ticket (todas las comidas)')]
     
     # Relación con Estudiante (mantener por compatibilidad)
     estudiante = models.ForeignKey(
@@ -85,11 +206,21 @@ class CodigoQR(models.Model):
         blank=True
     )
     
-    # Información del visitante (almacenada localmente para auditoría)
-    visitante_id = models.CharField(max_length=50, verbose_name="ID Visitante (Documento)", null=True, blank=True)
-    visitante_nombre = models.CharField(max_length=200, verbose_name="Nombre Visitante", default='')
-    visitante_identificacion = models.CharField(max_length=50, verbose_name="Identificación Visitante", default='')
-    visitante_email = models.EmailField(verbose_name="Email Visitante", default='noemail@example.com')
+    evento = models.ForeignKey(
+        Evento,
+        on_delete=models.PROTECT,
+        related_name='codigos',
+        default=evento_activo_id,
+        verbose_name="Evento"
+    )
+
+    # Datos del visitante (se guardan una vez por persona, no en cada código)
+    titular = models.ForeignKey(
+        Titular,
+        on_delete=models.PROTECT,
+        related_name='codigos',
+        verbose_name="Titular"
+    )
     
     tipo_comida = models.CharField(
         max_length=20, 
@@ -105,16 +236,25 @@ class CodigoQR(models.Model):
     usado = models.BooleanField(default=False, verbose_name="Usado")
     fecha_creacion = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Creación")
     fecha_uso = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Uso")
+
+    objects = CodigoQRQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Código QR"
         verbose_name_plural = "Códigos QR"
-        unique_together = [['visitante_email', 'tipo_comida']]  # Cambio: usar email en lugar de FK
-        ordering = ['visitante_nombre', 'tipo_comida']
+        # Un código por titular (email) y tipo de comida en cada evento
+        unique_together = [['evento', 'titular', 'tipo_comida']]
+        # Índices encabezados por evento: las consultas del evento activo no recorren los archivados
+        indexes = [
+            models.Index(fields=['evento', 'usado', 'tipo_comida'], name='codigoqr_evento_usado_tipo'),
+            # Filtros del admin (sin evento)
+            models.Index(fields=['tipo_comida', 'usado'], name='codigoqr_tipo_usado'),
+        ]
+        ordering = ['titular__nombre', 'tipo_comida']
 
     def __str__(self):
         estado = "Usado" if self.usado else "Disponible"
-        return f"{self.visitante_nombre} - {self.tipo_comida} ({estado})"
+        return f"{self.titular.nombre} - {self.tipo_comida} ({estado})"
 
     def marcar_como_usado(self):
         """Marca el código QR como usado"""
@@ -124,3 +264,202 @@ class CodigoQR(models.Model):
             self.save()
             return True
         return False
+
+
+class ConsumoTicket(models.Model):
+    """Comida servida con un código en modo ticket (una por comida y ticket)"""
+    codigo = models.ForeignKey(
+        CodigoQR,
+        on_delete=models.CASCADE,
+        related_name='consumos',
+        verbose_name="Ticket"
+    )
+    tipo_comida = models.CharField(max_length=20, choices=CodigoQR.COMIDA_CHOICES, verbose_name="Tipo de Comida")
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = "Consumo de Ticket"
+        verbose_name_plural = "Consumos de Tickets"
+        # El canje es el INSERT: un segundo escaneo de la misma comida choca aquí
+        unique_together = [['codigo', 'tipo_comida']]
+
+    def __str__(self):
+        return f"{self.codigo_id} - {self.tipo_comida}"
+
+
+class VersionTabla(models.Model):
+    """
+    Contador de versión por tabla. Se incrementa cuando cambian sus filas y
+    permite responder el ETag sin consultar la tabla en sí.
+    """
+    tabla = models.CharField(max_length=50, unique=True, verbose_name="Tabla")
+    version = models.BigIntegerField(default=0, verbose_name="Versión")
+    modificado = models.DateTimeField(default=timezone.now, verbose_name="Última Modificación")
+
+    class Meta:
+        verbose_name = "Versión de Tabla"
+        verbose_name_plural = "Versiones de Tablas"
+
+    def __str__(self):
+        return f"{self.tabla} v{self.version}"
+
+
+class PuntoControlImportacion(models.Model):
+    """
+    Checkpoint de ``import_visitantes`` por fuente (host/bd/tabla): última
+    clave procesada y huella de esa fila, para reanudar o sincronizar solo
+    lo que cambió.
+    """
+    fuente = models.CharField(max_length=255, unique=True, verbose_name="Fuente")
+    campo_clave = models.CharField(max_length=100, verbose_name="Columna Clave")
+    ultima_clave = models.CharField(max_length=100, blank=True, default='', verbose_name="Última Clave Procesada")
+    huella_ultima_fila = models.CharField(max_length=32, blank=True, default='', verbose_name="Huella de la Última Fila")
+    filas_procesadas = models.BigIntegerField(default=0, verbose_name="Filas Procesadas")
+    completado = models.BooleanField(default=False, verbose_name="Completado")
+    actualizado = models.DateTimeField(auto_now=True, verbose_name="Actualizado")
+
+    class Meta:
+        verbose_name = "Punto de Control de Importación"
+        verbose_name_plural = "Puntos de Control de Importación"
+
+    def __str__(self):
+        estado = "completo" if self.completado else f"en {self.ultima_clave or 'inicio'}"
+        return f"{self.fuente} ({estado})"
+
+
+class HuellaFilaImportada(models.Model):
+    """Hash de cada fila importada; permite detectar filas modificadas en la fuente"""
+    fuente = models.CharField(max_length=255, verbose_name="Fuente")
+    clave = models.CharField(max_length=100, verbose_name="Clave")
+    huella = models.CharField(max_length=32, verbose_name="Huella")
+
+    class Meta:
+        verbose_name = "Huella de Fila Importada"
+        verbose_name_plural = "Huellas de Filas Importadas"
+        unique_together = [['fuente', 'clave']]
+
+
+class Estacion(models.Model):
+    """
+    Estación de escaneo, identificada por la cabecera ``X-Estacion`` del lector.
+    Los totales y la última actividad los vuelca ``estaciones.py`` por lotes;
+    las estaciones nuevas se registran solas con su primer escaneo o latido.
+    """
+    identificador = models.CharField(max_length=100, unique=True, verbose_name="Identificador")
+    nombre = models.CharField(max_length=200, blank=True, default='', verbose_name="Nombre")
+    escaneos = models.BigIntegerField(default=0, verbose_name="Escaneos")
+    errores = models.BigIntegerField(default=0, verbose_name="Escaneos Rechazados")
+    ultimo_escaneo = models.DateTimeField(null=True, blank=True, verbose_name="Último Escaneo")
+    ultimo_latido = models.DateTimeField(null=True, blank=True, verbose_name="Último Latido")
+    fecha_registro = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Registro")
+
+    class Meta:
+        verbose_name = "Estación"
+        verbose_name_plural = "Estaciones"
+        ordering = ['identificador']
+
+    def __str__(self):
+        return self.nombre or self.identificador
+
+
+class Redencion(models.Model):
+    """
+    Intento de canje (solo inserción): una fila por escaneo con su resultado y
+    estación. Se escribe por lotes (ver ``redenciones.py``) y los días antiguos
+    se consolidan en ``ResumenRedencionDiario`` con ``consolidar_redenciones``.
+    """
+
+    VALIDADO = 'VALIDADO'
+    USADO = 'USADO'
+    NO_VALIDO = 'NO_VALIDO'
+    RESULTADO_CHOICES = [
+        (VALIDADO, 'Validado'),
+        (USADO, 'Ya utilizado'),
+        (NO_VALIDO, 'No válido'),
+    ]
+
+    # Sin FK: también se registran códigos inexistentes y no se frena el borrado de CodigoQR
+    codigo = models.UUIDField(null=True, blank=True, verbose_name="Código QR")
+    resultado = models.CharField(max_length=10, choices=RESULTADO_CHOICES, verbose_name="Resultado")
+    tipo_comida = models.CharField(
+        max_length=20,
+        choices=CodigoQR.TIPO_COMIDA_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Tipo de Comida"
+    )
+    estacion = models.CharField(max_length=100, blank=True, default='', verbose_name="Estación")
+    fecha = models.DateTimeField(db_index=True, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = "Redención"
+        verbose_name_plural = "Redenciones"
+
+    def __str__(self):
+        return f"{self.codigo or '-'} {self.resultado} ({self.estacion or 'sin estación'})"
+
+
+class ResumenRedencionDiario(models.Model):
+    """Total de intentos de canje por día, estación, tipo de comida y resultado"""
+    dia = models.DateField(verbose_name="Día")
+    estacion = models.CharField(max_length=100, blank=True, default='', verbose_name="Estación")
+    tipo_comida = models.CharField(
+        max_length=20,
+        choices=CodigoQR.TIPO_COMIDA_CHOICES,
+        blank=True,
+        default='',
+        verbose_name="Tipo de Comida"
+    )
+    resultado = models.CharField(max_length=10, choices=Redencion.RESULTADO_CHOICES, verbose_name="Resultado")
+    total = models.PositiveIntegerField(default=0, verbose_name="Total")
+
+    class Meta:
+        verbose_name = "Resumen Diario de Redenciones"
+        verbose_name_plural = "Resúmenes Diarios de Redenciones"
+        unique_together = [['dia', 'estacion', 'tipo_comida', 'resultado']]
+        ordering = ['-dia', 'estacion', 'tipo_comida', 'resultado']
+
+    def __str__(self):
+        return f"{self.dia} {self.estacion or 'sin estación'} {self.tipo_comida} {self.resultado}: {self.total}"
+
+
+class SolicitudIdempotente(models.Model):
+    """Resultado de una petición con cabecera ``Idempotency-Key`` (ver idempotencia.py)"""
+    EN_CURSO = 'EN_CURSO'
+    COMPLETADA = 'COMPLETADA'
+
+    ESTADO_CHOICES = [
+        (EN_CURSO, 'En curso'),
+        (COMPLETADA, 'Completada'),
+    ]
+
+    clave = models.CharField(max_length=100, verbose_name="Clave")
+    ruta = models.CharField(max_length=200, verbose_name="Ruta")
+    # SHA-256 del cuerpo: la misma clave con otro cuerpo es un error del cliente
+    huella = models.CharField(max_length=64, verbose_name="Huella del Cuerpo")
+    estado = models.CharField(max_length=10, choices=ESTADO_CHOICES, default=EN_CURSO, verbose_name="Estado")
+    codigo_estado = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="Código HTTP")
+    respuesta = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Respuesta")
+    fecha_creacion = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Fecha de Creación")
+    fecha_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de Finalización")
+
+    class Meta:
+        verbose_name = "Solicitud Idempotente"
+        verbose_name_plural = "Solicitudes Idempotentes"
+        unique_together = [['clave', 'ruta']]
+
+    def __str__(self):
+        return f"{self.ruta} {self.clave} ({self.estado})"
+
+
+class Bloqueo(models.Model):
+    """Bloqueo entre procesos para BD sin bloqueos con nombre (ver bloqueos.py)"""
+    nombre = models.CharField(max_length=64, unique=True, verbose_name="Nombre")
+    fecha = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+
+    class Meta:
+        verbose_name = "Bloqueo"
+        verbose_name_plural = "Bloqueos"
+
+    def __str__(self):
+        return self.nombre
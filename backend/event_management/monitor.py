@@ -0,0 +1,178 @@
+"""
+Ritmo de canje en vivo por tipo de comida.
+
+Cada canje exitoso (ver ``redenciones.registrar``) suma en una ventana
+deslizante de 900 segundos por tipo de comida: un contador por segundo en un
+buffer circular y los totales de 1 y 15 minutos mantenidos al avanzar, de
+modo que consultar el ritmo es O(1). Los códigos pendientes salen de una sola
+consulta agrupada que un hilo refresca cada ``MONITOR_REFRESCO_PENDIENTES``
+segundos y se descuentan en memoria con cada canje; el endpoint no consulta
+``CodigoQR``.
+
+Los contadores son por proceso: con varios workers cada uno ve sus escaneos.
+"""
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.db.models import Count
+
+from .generacion import TIPOS_COMIDA
+from .models import CodigoQR, ConsumoTicket
+from .tickets import FRANJAS
+
+logger = logging.getLogger(__name__)
+
+VENTANA = 900  # segundos (15 minutos)
+
+
+class VentanaDeslizante:
+    """Conteos por segundo de los últimos 15 minutos con totales de 1 y 15 minutos"""
+
+    __slots__ = ('conteos', 'segundo_actual', 'total_minuto', 'total_ventana')
+
+    def __init__(self):
+        self.conteos = [0] * VENTANA
+        self.segundo_actual = None
+        self.total_minuto = 0
+        self.total_ventana = 0
+
+    def _avanzar(self, segundo):
+        if self.segundo_actual is None:
+            self.segundo_actual = segundo
+            return
+        if segundo <= self.segundo_actual:
+            return
+        if segundo - self.segundo_actual >= VENTANA:
+            # Más de 15 minutos sin actividad: todo quedó fuera de la ventana
+            self.conteos = [0] * VENTANA
+            self.total_minuto = self.total_ventana = 0
+        else:
+            # Amortizado O(1): cada segundo se recorre una sola vez
+            for s in range(self.segundo_actual + 1, segundo + 1):
+                self.total_minuto -= self.conteos[(s - 60) % VENTANA]
+                posicion = s % VENTANA
+                self.total_ventana -= self.conteos[posicion]
+                self.conteos[posicion] = 0
+        self.segundo_actual = segundo
+
+    def registrar(self, ahora):
+        segundo = int(ahora)
+        self._avanzar(segundo)
+        self.conteos[segundo % VENTANA] += 1
+        self.total_minuto += 1
+        self.total_ventana += 1
+
+    def totales(self, ahora):
+        segundo = int(ahora)
+        self._avanzar(segundo)
+        return {
+            'ultimo_segundo': self.conteos[(segundo - 1) % VENTANA] if self.segundo_actual is not None else 0,
+            'ultimo_minuto': self.total_minuto,
+            'ultimos_15_minutos': self.total_ventana,
+        }
+
+
+class MonitorComidas:
+    """Ventanas por tipo de comida y códigos pendientes, en memoria"""
+
+    def __init__(self, refresco):
+        self.refresco = refresco
+        self.ventanas = {tipo: VentanaDeslizante() for tipo in TIPOS_COMIDA}
+        self.pendientes = {}
+        self.pendientes_actualizado = None
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def _asegurar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            with self._lock:
+                if self._hilo is None or not self._hilo.is_alive():
+                    self._hilo = threading.Thread(target=self._bucle, name='monitor-comidas', daemon=True)
+                    self._hilo.start()
+
+    def _bucle(self):
+        while True:
+            close_old_connections()
+            try:
+                self.refrescar_pendientes()
+            except DatabaseError as e:
+                logger.warning('No se pudieron contar los códigos pendientes: %s', e)
+            time.sleep(self.refresco)
+
+    def refrescar_pendientes(self):
+        """Consultas agrupadas por tipo de comida sobre los códigos (y tickets) sin usar del evento activo"""
+        conteos = dict(
+            CodigoQR.objects.del_evento_activo().filter(usado=False).values_list('tipo_comida').annotate(total=Count('id')).order_by()
+        )
+        tickets = conteos.get(CodigoQR.TICKET, 0)
+        if tickets:
+            # Cada ticket sin agotar está pendiente en las comidas que aún no consumió
+            consumidos = dict(
+                ConsumoTicket.objects.filter(codigo__evento__activo=True, codigo__usado=False)
+                .values_list('tipo_comida').annotate(total=Count('id')).order_by()
+            )
+            for tipo, _, _ in FRANJAS:
+                conteos[tipo] = conteos.get(tipo, 0) + tickets - consumidos.get(tipo, 0)
+        with self._lock:
+            self.pendientes = {tipo: conteos.get(tipo, 0) for tipo in TIPOS_COMIDA}
+            self.pendientes_actualizado = time.time()
+
+    def registrar(self, tipo_comida):
+        ventana = self.ventanas.get(tipo_comida)
+        if ventana is None:
+            return
+        with self._lock:
+            ventana.registrar(time.time())
+            if self.pendientes.get(tipo_comida):
+                self.pendientes[tipo_comida] -= 1
+        self._asegurar_hilo()
+
+    def estado(self):
+        self._asegurar_hilo()
+        ahora = time.time()
+        comidas = {}
+        with self._lock:
+            for tipo, ventana in self.ventanas.items():
+                datos = ventana.totales(ahora)
+                datos['por_minuto_15m'] = round(datos['ultimos_15_minutos'] / 15, 2)
+                datos['tendencia'] = self._tendencia(datos['ultimo_minuto'], datos['por_minuto_15m'])
+                pendientes = self.pendientes.get(tipo)
+                datos['pendientes'] = pendientes
+                # Proyección con el ritmo del último minuto (o el de 15 minutos si está parado)
+                ritmo = datos['ultimo_minuto'] / 60 or datos['ultimos_15_minutos'] / VENTANA
+                if pendientes is not None and ritmo:
+                    restantes = pendientes / ritmo
+                    datos['segundos_restantes'] = round(restantes)
+                    datos['fin_estimado'] = _iso(ahora + restantes)
+                else:
+                    datos['segundos_restantes'] = None
+                    datos['fin_estimado'] = None
+                comidas[tipo] = datos
+            actualizado = self.pendientes_actualizado
+        return {
+            'generado': _iso(ahora),
+            'pendientes_actualizado': _iso(actualizado) if actualizado else None,
+            'comidas': comidas,
+        }
+
+    @staticmethod
+    def _tendencia(ultimo_minuto, por_minuto_15m):
+        if not por_minuto_15m:
+            return 'acelerando' if ultimo_minuto else 'detenido'
+        relacion = ultimo_minuto / por_minuto_15m
+        if relacion > 1.2:
+            return 'acelerando'
+        if relacion < 0.8:
+            return 'frenando' if ultimo_minuto else 'detenido'
+        return 'estable'
+
+
+def _iso(marca):
+    return datetime.fromtimestamp(marca, tz=dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+monitor_comidas = MonitorComidas(settings.MONITOR_REFRESCO_PENDIENTES)
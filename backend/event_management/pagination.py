@@ -0,0 +1,45 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+
+class PaginacionConfigurable(PageNumberPagination):
+    """Paginación por número de página que permite pedir ``?page_size=`` (hasta 1000 filas)"""
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+def filas_estimadas(modelo, alias):
+    """Filas de la tabla según las estadísticas de la BD (MySQL/PostgreSQL), o None"""
+    conexion = connections[alias]
+    tabla = modelo._meta.db_table
+    if conexion.vendor == 'mysql':
+        sql = 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+    elif conexion.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s'
+    else:
+        return None
+    with conexion.cursor() as cursor:
+        cursor.execute(sql, [tabla])
+        fila = cursor.fetchone()
+    return int(fila[0]) if fila and fila[0] is not None and fila[0] >= 0 else None
+
+
+class PaginadorEstimado(Paginator):
+    """
+    Paginador del admin para tablas grandes: sin filtros ni búsqueda, el total
+    sale de las estadísticas de la BD (aproximado, sin recorrer la tabla) en
+    lugar de ``COUNT(*)``. Con filtros, o si la tabla es pequeña, cuenta exacto.
+    """
+    # Por debajo de esto COUNT(*) es barato y se prefiere el total exacto
+    MINIMO_ESTIMADO = 10000
+
+    @cached_property
+    def count(self):
+        consulta = getattr(self.object_list, 'query', None)
+        if consulta is not None and not consulta.where:
+            estimado = filas_estimadas(self.object_list.model, self.object_list.db)
+            if estimado is not None and estimado >= self.MINIMO_ESTIMADO:
+                return estimado
+        return super().count
@@ -0,0 +1,216 @@
+"""
+Perfilado bajo demanda de peticiones.
+
+Una petición se perfila si un usuario staff envía la cabecera
+``X-Perfilar: 1`` o el parámetro ``?perfilar=1``, o por muestreo aleatorio de
+1 cada ``PERFILADO_MUESTREO`` peticiones. Se ejecuta bajo cProfile, se
+capturan las consultas SQL con su duración y se guarda en
+``PERFILADO_DIRECTORIO`` (fuera de ``MEDIA_ROOT``; se consultan solo con
+``PerfilViewSet``, para administradores):
+
+- ``<id>.prof``: volcado de pstats (abrir con ``python -m pstats`` o snakeviz)
+- ``<id>.json``: ruta, duración, consultas SQL y funciones más costosas
+"""
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FORMATO_ID = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+def directorio_perfiles():
+    return settings.PERFILADO_DIRECTORIO
+
+
+def ruta_perfil(perfil_id, extension):
+    """Ruta del archivo de un perfil, o None si el id no tiene el formato esperado"""
+    if not FORMATO_ID.match(perfil_id):
+        return None
+    return os.path.join(directorio_perfiles(), f'{perfil_id}.{extension}')
+
+
+def listar_perfiles(limite):
+    """Metadatos (sin SQL) de los ``limite`` perfiles más lentos"""
+    directorio = directorio_perfiles()
+    if not os.path.isdir(directorio):
+        return []
+    perfiles = []
+    for nombre in os.listdir(directorio):
+        if not nombre.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directorio, nombre), encoding='utf-8') as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            continue
+        datos.pop('consultas', None)
+        datos.pop('funciones', None)
+        perfiles.append(datos)
+    perfiles.sort(key=lambda p: p['duracion_ms'], reverse=True)
+    return perfiles[:limite]
+
+
+# Lista donde se guardan las consultas de la petición que se está perfilando
+# (variable de contexto: llega también a los hilos de sync_to_async)
+_consultas_perfil = ContextVar('consultas_perfil', default=None)
+
+
+def capturar_consultas(execute, sql, params, many, context):
+    """execute_wrapper permanente (ver ``instalar_captura``); guarda cada consulta con su duración"""
+    consultas = _consultas_perfil.get()
+    if consultas is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        consultas.append({
+            'alias': context['connection'].alias,
+            'sql': sql,
+            'duracion_ms': round((time.perf_counter() - inicio) * 1000, 3),
+        })
+
+
+def instalar_captura(conexion):
+    """Se llama desde la señal ``connection_created``"""
+    if capturar_consultas not in conexion.execute_wrappers:
+        # Al inicio de la lista: execute_wrapper() retira con pop() el último
+        conexion.execute_wrappers.insert(0, capturar_consultas)
+
+
+class PerfiladoMiddleware:
+    """
+    Ejecuta bajo cProfile las peticiones marcadas o muestreadas y guarda el resultado.
+
+    En modo asíncrono (ASGI) el perfil cubre todo lo que corre en el event
+    loop mientras se atiende la petición, y solo se perfila una a la vez.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = settings.PERFILADO_MUESTREO
+        self.asincrono = iscoroutinefunction(get_response)
+        self._perfilando = False
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def solicitado(self, request):
+        return request.headers.get('X-Perfilar') == '1' or request.GET.get('perfilar') == '1'
+
+    def muestreado(self):
+        return self.muestreo > 0 and random.random() < 1 / self.muestreo
+
+    def debe_perfilar(self, request):
+        if self.solicitado(request):
+            usuario = getattr(request, 'user', None)
+            return bool(usuario and usuario.is_staff)
+        return self.muestreado()
+
+    async def adebe_perfilar(self, request):
+        if self.solicitado(request):
+            # request.user haría una consulta síncrona desde el event loop
+            usuario = await request.auser() if hasattr(request, 'auser') else None
+            return bool(usuario and usuario.is_staff)
+        return self.muestreado()
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        if not self.debe_perfilar(request):
+            return self.get_response(request)
+
+        consultas = []
+        token = _consultas_perfil.set(consultas)
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        try:
+            response = perfil.runcall(self.get_response, request)
+        finally:
+            duracion = time.perf_counter() - inicio
+            _consultas_perfil.reset(token)
+        return self._guardar_en_respuesta(request, response, perfil, consultas, duracion)
+
+    async def __acall__(self, request):
+        # cProfile admite un solo perfil activo por hilo
+        if self._perfilando or not await self.adebe_perfilar(request):
+            return await self.get_response(request)
+
+        self._perfilando = True
+        consultas = []
+        token = _consultas_perfil.set(consultas)
+        perfil = cProfile.Profile()
+        inicio = time.perf_counter()
+        perfil.enable()
+        try:
+            response = await self.get_response(request)
+        finally:
+            perfil.disable()
+            duracion = time.perf_counter() - inicio
+            _consultas_perfil.reset(token)
+            self._perfilando = False
+        return self._guardar_en_respuesta(request, response, perfil, consultas, duracion)
+
+    def _guardar_en_respuesta(self, request, response, perfil, consultas, duracion):
+        try:
+            perfil_id = self.guardar(request, response, perfil, consultas, duracion)
+            response['X-Perfil-Id'] = perfil_id
+        except OSError as e:
+            logger.warning('No se pudo guardar el perfil de %s: %s', request.path, e)
+        return response
+
+    def guardar(self, request, response, perfil, consultas, duracion):
+        directorio = directorio_perfiles()
+        os.makedirs(directorio, exist_ok=True)
+        perfil_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        perfil.dump_stats(os.path.join(directorio, f'{perfil_id}.prof'))
+
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(30)
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        datos = {
+            'id': perfil_id,
+            'fecha': timezone.now().isoformat(),
+            'metodo': request.method,
+            'ruta': coincidencia.view_name if coincidencia else '',
+            'url': request.get_full_path(),
+            'estado': response.status_code,
+            'duracion_ms': round(duracion * 1000, 3),
+            'total_consultas': len(consultas),
+            'duracion_consultas_ms': round(sum(c['duracion_ms'] for c in consultas), 3),
+            'consultas': consultas,
+            'funciones': salida.getvalue(),
+        }
+        with open(os.path.join(directorio, f'{perfil_id}.json'), 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+
+        self.depurar(directorio)
+        return perfil_id
+
+    def depurar(self, directorio):
+        """Conserva solo los ``PERFILADO_MAXIMO_ARCHIVOS`` perfiles más recientes"""
+        ids = sorted(nombre[:-5] for nombre in os.listdir(directorio) if nombre.endswith('.json'))
+        for perfil_id in ids[:-settings.PERFILADO_MAXIMO_ARCHIVOS]:
+            for extension in ('json', 'prof'):
+                try:
+                    os.remove(os.path.join(directorio, f'{perfil_id}.{extension}'))
+                except OSError:
+                    pass
@@ -0,0 +1,69 @@
+"""
+Render de imágenes QR.
+
+``qrcode`` (y Pillow, que carga al crear la imagen) se importa en el primer
+render y no al cargar los módulos: arrancar un worker, ``manage.py check`` o
+cualquier comando no paga esa importación si no se dibuja ningún código.
+``benchmark_arranque`` verifica que siga siendo así.
+
+Con ``QR_CARGA_COMPACTA`` el QR lleva los 16 bytes del UUID en base32 (26
+caracteres en mayúsculas, sin relleno) en lugar del UUID de 36 caracteres:
+cabe en el modo alfanumérico del QR y baja de la versión 3 (29x29 módulos) a
+la 2 (25x25). ``validacion.normalizar_codigo`` acepta ambas formas, así que
+los QR ya enviados siguen valiendo.
+"""
+import base64
+import binascii
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+
+# Longitud de un UUID en base32 sin relleno (128 bits / 5)
+LARGO_COMPACTO = 26
+
+
+def compactar(codigo):
+    """UUID -> 26 caracteres base32 (A-Z, 2-7)"""
+    return base64.b32encode(codigo.bytes).decode().rstrip('=')
+
+
+def descompactar(texto):
+    """UUID a partir de su forma base32 (sin relleno, mayúsculas), o None"""
+    if len(texto) != LARGO_COMPACTO:
+        return None
+    try:
+        return uuid.UUID(bytes=base64.b32decode(texto + '======'))
+    except (binascii.Error, ValueError):
+        return None
+
+
+def contenido_qr(codigo):
+    """Texto que se codifica en el QR de ``codigo`` según ``QR_CARGA_COMPACTA``"""
+    if settings.QR_CARGA_COMPACTA and isinstance(codigo, uuid.UUID):
+        return compactar(codigo)
+    return str(codigo)
+
+
+def imagen_png(codigo):
+    """PNG (bytes) con el código QR de ``codigo`` (ver ``contenido_qr``)"""
+    import qrcode
+
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(contenido_qr(codigo))
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def imagen_data_uri(codigo):
+    """El PNG de ``imagen_png`` como ``data:image/png;base64,...``"""
+    return f'data:image/png;base64,{base64.b64encode(imagen_png(codigo)).decode()}'
@@ -0,0 +1,142 @@
+"""
+Registro por lotes de los intentos de canje (modelo ``Redencion``).
+
+Las vistas de validación llaman a ``registrar``, que solo agrega una tupla a
+un buffer en memoria: no hace consultas, así que sirve igual en vistas
+síncronas y asíncronas. Un hilo en segundo plano inserta el buffer con
+``bulk_create`` cada ``REDENCIONES_INTERVALO`` segundos o en cuanto se
+juntan ``REDENCIONES_LOTE`` escaneos. Lo pendiente se escribe también al
+terminar el proceso. Los canjes exitosos alimentan además el ritmo en vivo
+de ``monitor`` y cada escaneo con estación la actividad de ``estaciones``.
+
+``redimir_escaneo`` / ``aredimir_escaneo`` canjean y registran una sola vez
+por lectura física: los duplicados del lector se agrupan en ``duplicados``.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .duplicados import escaneos
+from .estaciones import agregador_estaciones
+from .models import Redencion
+from .monitor import monitor_comidas
+from .validacion import MENSAJE_USADO, aredimir, redimir
+
+logger = logging.getLogger(__name__)
+
+
+def estacion_de(request):
+    """Estación de escaneo indicada por el cliente en la cabecera ``X-Estacion``"""
+    return request.headers.get('X-Estacion', '')[:100]
+
+
+def resultado_de_error(mensaje):
+    return Redencion.USADO if mensaje == MENSAJE_USADO else Redencion.NO_VALIDO
+
+
+class BufferRedenciones:
+    """Acumula escaneos en memoria y los inserta en lotes desde un hilo propio"""
+
+    # Tope del buffer si la BD no responde: se descartan los más antiguos
+    MAXIMO_PENDIENTES = 100000
+
+    def __init__(self, lote, intervalo):
+        self.lote = lote
+        self.intervalo = intervalo
+        self.descartados = 0
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._evento = threading.Event()
+        self._hilo = None
+
+    def registrar(self, codigo, resultado, tipo_comida='', estacion=''):
+        with self._lock:
+            self._pendientes.append((codigo, resultado, tipo_comida or '', estacion, timezone.now()))
+            lleno = len(self._pendientes) >= self.lote
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='redenciones', daemon=True)
+                self._hilo.start()
+        if lleno:
+            self._evento.set()
+
+    def _bucle(self):
+        while True:
+            self._evento.wait(self.intervalo)
+            self._evento.clear()
+            self.vaciar()
+
+    def vaciar(self):
+        """Inserta lo pendiente; retorna el número de filas escritas"""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, []
+        if not pendientes:
+            return 0
+        # El hilo conserva su conexión entre lotes: descartarla si caducó o falló
+        close_old_connections()
+        try:
+            Redencion.objects.bulk_create(
+                [
+                    Redencion(codigo=codigo, resultado=resultado, tipo_comida=tipo, estacion=estacion, fecha=fecha)
+                    for codigo, resultado, tipo, estacion, fecha in pendientes
+                ],
+                batch_size=1000
+            )
+        except DatabaseError as e:
+            logger.warning('No se pudieron guardar %s redenciones: %s', len(pendientes), e)
+            with self._lock:
+                # Reintentar en el próximo ciclo sin crecer sin límite
+                self._pendientes[:0] = pendientes
+                exceso = len(self._pendientes) - self.MAXIMO_PENDIENTES
+                if exceso > 0:
+                    del self._pendientes[:exceso]
+                    self.descartados += exceso
+            return 0
+        return len(pendientes)
+
+
+buffer_redenciones = BufferRedenciones(settings.REDENCIONES_LOTE, settings.REDENCIONES_INTERVALO)
+atexit.register(buffer_redenciones.vaciar)
+
+
+def registrar(codigo, resultado, tipo_comida='', estacion=''):
+    buffer_redenciones.registrar(codigo, resultado, tipo_comida, estacion)
+    if resultado == Redencion.VALIDADO:
+        monitor_comidas.registrar(tipo_comida)
+    if estacion:
+        agregador_estaciones.registrar_escaneo(estacion, resultado == Redencion.VALIDADO)
+
+
+def _registrar_canje(codigo_uuid, estacion, fila, error):
+    resultado = resultado_de_error(error) if error else Redencion.VALIDADO
+    registrar(codigo_uuid, resultado, fila and fila['tipo_comida'], estacion)
+    return fila, error
+
+
+def _ventana(estacion):
+    # Sin X-Estacion la clave es la misma en todas las puertas: no repetir el
+    # resultado guardado, solo unirse a la lectura en curso
+    return None if estacion else 0
+
+
+def redimir_escaneo(codigo_uuid, estacion):
+    """``redimir`` y su registro, una vez por (código, estación) aunque el lector repita la lectura"""
+    resultado, _ = escaneos.ejecutar(
+        (codigo_uuid, estacion),
+        lambda: _registrar_canje(codigo_uuid, estacion, *redimir(codigo_uuid)),
+        ventana=_ventana(estacion),
+    )
+    return resultado
+
+
+async def aredimir_escaneo(codigo_uuid, estacion):
+    """Versión asíncrona de ``redimir_escaneo``"""
+    async def canjear():
+        # registrar() no consulta la BD: se puede llamar desde el event loop
+        return _registrar_canje(codigo_uuid, estacion, *await aredimir(codigo_uuid))
+
+    resultado, _ = await escaneos.aejecutar((codigo_uuid, estacion), canjear, ventana=_ventana(estacion))
+    return resultado
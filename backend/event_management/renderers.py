@@ -0,0 +1,31 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    Renderer JSON que usa orjson cuando está instalado.
+
+    Produce la misma salida compacta que ``JSONRenderer`` (UTF-8, fechas ISO con
+    ``Z`` en UTC); si orjson no está disponible o se pide indentación (p. ej.
+    desde la API navegable) delega en el renderer estándar de DRF.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=self._encoder.default, option=orjson.OPT_UTC_Z)
+        # Igual que DRF: escapar separadores de línea que rompen JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -0,0 +1,247 @@
+"""
+Lecturas resilientes de la BD externa rica_univalle.
+
+- ``InterruptorCircuito``: deja de consultar la BD tras varios errores o
+  consultas lentas seguidas y vuelve a probar pasado ``RICA_CIRCUITO_REINTENTO``.
+- ``leer_con_cache``: caché TTL con *stale-while-revalidate*; sirve datos
+  obsoletos mientras se refrescan en segundo plano o mientras el circuito
+  está abierto.
+- Estadísticas por alias de ``DATABASES`` (conexiones abiertas, tiempo de
+  espera en consultas) alimentadas por la señal ``connection_created``.
+
+Las conexiones persistentes y su chequeo de salud se configuran por alias
+con ``CONN_MAX_AGE`` / ``CONN_HEALTH_CHECKS`` en ``settings.DATABASES``.
+"""
+import logging
+import threading
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitoAbierto(Exception):
+    """La BD externa se considera caída; no se intenta la consulta"""
+
+
+class BDExternaNoDisponible(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'La base de datos de visitantes no está disponible. Intenta más tarde.'
+    default_code = 'bd_externa_no_disponible'
+
+
+class InterruptorCircuito:
+    """Circuit breaker de tres estados (cerrado, abierto, semiabierto)"""
+
+    CERRADO = 'CERRADO'
+    ABIERTO = 'ABIERTO'
+    SEMIABIERTO = 'SEMIABIERTO'
+
+    def __init__(self, nombre, umbral_fallos, tiempo_reintento, umbral_lentitud):
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_reintento = tiempo_reintento
+        self.umbral_lentitud = umbral_lentitud
+        self.estado = self.CERRADO
+        self.fallos_consecutivos = 0
+        self.disparos = 0
+        self.abierto_desde = None
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        """Indica si se puede intentar una llamada ahora"""
+        with self._lock:
+            if self.estado == self.CERRADO:
+                return True
+            if self.estado == self.ABIERTO and time.monotonic() - self.abierto_desde >= self.tiempo_reintento:
+                self.estado = self.SEMIABIERTO
+            if self.estado == self.SEMIABIERTO and not self._prueba_en_curso:
+                # Solo una llamada de prueba a la vez
+                self._prueba_en_curso = True
+                return True
+            return False
+
+    def disponible(self):
+        """
+        Como ``permitir`` pero sin cambiar de estado ni reservar la llamada de
+        prueba: indica si vale la pena lanzar un refresco en segundo plano
+        """
+        with self._lock:
+            if self.estado == self.ABIERTO:
+                return time.monotonic() - self.abierto_desde >= self.tiempo_reintento
+            return self.estado == self.CERRADO or not self._prueba_en_curso
+
+    def registrar_exito(self):
+        with self._lock:
+            self.fallos_consecutivos = 0
+            self.estado = self.CERRADO
+            self._prueba_en_curso = False
+
+    def registrar_fallo(self):
+        with self._lock:
+            self.fallos_consecutivos += 1
+            self._prueba_en_curso = False
+            if self.estado == self.SEMIABIERTO or self.fallos_consecutivos >= self.umbral_fallos:
+                if self.estado != self.ABIERTO:
+                    self.disparos += 1
+                    logger.warning('Circuito %s abierto tras %s fallos', self.nombre, self.fallos_consecutivos)
+                self.estado = self.ABIERTO
+                self.abierto_desde = time.monotonic()
+
+    def llamar(self, funcion):
+        """Ejecuta ``funcion`` protegida por el circuito"""
+        if not self.permitir():
+            raise CircuitoAbierto(self.nombre)
+        inicio = time.monotonic()
+        try:
+            resultado = funcion()
+        except DatabaseError:
+            self.registrar_fallo()
+            raise
+        except Exception:
+            # La BD respondió (p. ej. un 404): no es un fallo de conectividad
+            self.registrar_exito()
+            raise
+        # Una consulta demasiado lenta cuenta como fallo aunque haya respondido
+        if time.monotonic() - inicio > self.umbral_lentitud:
+            self.registrar_fallo()
+        else:
+            self.registrar_exito()
+        return resultado
+
+    def estadisticas(self):
+        return {
+            'estado': self.estado,
+            'fallos_consecutivos': self.fallos_consecutivos,
+            'disparos': self.disparos,
+        }
+
+
+interruptor_rica = InterruptorCircuito(
+    'rica_univalle',
+    umbral_fallos=settings.RICA_CIRCUITO_FALLOS,
+    tiempo_reintento=settings.RICA_CIRCUITO_REINTENTO,
+    umbral_lentitud=settings.RICA_UMBRAL_LENTITUD,
+)
+
+_refrescos_en_curso = set()
+_refrescos_lock = threading.Lock()
+
+
+def _refrescar(clave, funcion):
+    try:
+        datos = interruptor_rica.llamar(funcion)
+        cache.set(clave, (datos, time.time()), settings.RICA_CACHE_TTL + settings.RICA_CACHE_MAX_OBSOLETO)
+    except (CircuitoAbierto, DatabaseError) as e:
+        logger.warning('No se pudo refrescar %s: %s', clave, e)
+    except Exception:
+        # En un hilo nadie más la atrapa (p. ej. un 404 si el registro se borró)
+        logger.exception('Error al refrescar %s', clave)
+    finally:
+        with _refrescos_lock:
+            _refrescos_en_curso.discard(clave)
+        # Las conexiones son por hilo: cerrar las de este hilo auxiliar
+        connections.close_all()
+
+
+def _refrescar_en_segundo_plano(clave, funcion):
+    with _refrescos_lock:
+        if clave in _refrescos_en_curso:
+            return
+        _refrescos_en_curso.add(clave)
+    threading.Thread(target=_refrescar, args=(clave, funcion), daemon=True).start()
+
+
+def leer_con_cache(clave, funcion):
+    """
+    Lectura read-through: datos frescos desde caché, obsoletos mientras se
+    refrescan en segundo plano y, si la BD falla o el circuito está abierto,
+    el último valor conocido. Sin valor en caché se lanza ``BDExternaNoDisponible``.
+    """
+    ttl = settings.RICA_CACHE_TTL
+    entrada = cache.get(clave)
+    ahora = time.time()
+    if entrada is not None:
+        datos, guardado = entrada
+        if ahora - guardado < ttl:
+            return datos
+        # Con el circuito abierto y el reintento vencido, el refresco es la llamada de prueba
+        if interruptor_rica.disponible():
+            _refrescar_en_segundo_plano(clave, funcion)
+        return datos
+
+    try:
+        datos = interruptor_rica.llamar(funcion)
+    except (CircuitoAbierto, DatabaseError) as e:
+        logger.warning('Lectura de %s fallida: %s', clave, e)
+        raise BDExternaNoDisponible()
+    cache.set(clave, (datos, ahora), ttl + settings.RICA_CACHE_MAX_OBSOLETO)
+    return datos
+
+
+def llamar_rica(funcion):
+    """Consulta directa (sin caché) a rica_univalle protegida por el circuito"""
+    try:
+        return interruptor_rica.llamar(funcion)
+    except (CircuitoAbierto, DatabaseError) as e:
+        logger.warning('Consulta a rica_univalle fallida: %s', e)
+        raise BDExternaNoDisponible()
+
+
+class EstadisticasConexiones:
+    """Conexiones abiertas y tiempo de espera en consultas por alias (por proceso)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wrappers = {}
+        self.creadas = {}
+        self.consultas = {}
+        self.espera_total = {}
+        self.espera_maxima = {}
+
+    def registrar_conexion(self, conexion):
+        alias = conexion.alias
+        with self._lock:
+            self._wrappers.setdefault(alias, weakref.WeakSet()).add(conexion)
+            self.creadas[alias] = self.creadas.get(alias, 0) + 1
+        if not getattr(conexion, '_medidor_espera', False):
+            # Al inicio de la lista: execute_wrapper() retira con pop() el último
+            conexion.execute_wrappers.insert(0, self._medir)
+            conexion._medidor_espera = True
+
+    def _medir(self, execute, sql, params, many, context):
+        inicio = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.monotonic() - inicio
+            alias = context['connection'].alias
+            with self._lock:
+                self.consultas[alias] = self.consultas.get(alias, 0) + 1
+                self.espera_total[alias] = self.espera_total.get(alias, 0.0) + duracion
+                if duracion > self.espera_maxima.get(alias, 0.0):
+                    self.espera_maxima[alias] = duracion
+
+    def por_alias(self):
+        datos = {}
+        with self._lock:
+            for alias in settings.DATABASES:
+                wrappers = self._wrappers.get(alias, ())
+                datos[alias] = {
+                    'conexiones_abiertas': sum(1 for w in wrappers if w.connection is not None),
+                    'conexiones_creadas': self.creadas.get(alias, 0),
+                    'consultas': self.consultas.get(alias, 0),
+                    'tiempo_espera_total_ms': round(self.espera_total.get(alias, 0.0) * 1000, 2),
+                    'tiempo_espera_max_ms': round(self.espera_maxima.get(alias, 0.0) * 1000, 2),
+                }
+        return datos
+
+
+estadisticas_conexiones = EstadisticasConexiones()
@@ -1,10 +1,62 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Estudiante, CodigoQR, Visitante
-import uuid
-import re
+from rest_framework.settings import api_settings
+from .estaciones import agregador_estaciones
+from .generacion import evento_para_generar
+from .models import Estudiante, CodigoQR, Estacion, Evento, Titular, Visitante
+from .validacion import MENSAJE_NO_VALIDO, normalizar_codigo
 
 
-class VisitanteSerializer(serializers.ModelSerializer):
+def campos_solicitados(request, disponibles):
+    """
+    Devuelve la lista de campos pedidos con ``?fields=a,b,c`` (en el orden de
+    ``disponibles``) o None si no se pidió un subconjunto. Los nombres
+    desconocidos se ignoran; si ninguno existe, se responde con todos los
+    campos (igual en el listado rápido y en el serializador).
+    """
+    if request is None:
+        return None
+    parametro = request.query_params.get('fields')
+    if not parametro:
+        return None
+    pedidos = {campo.strip() for campo in parametro.split(',')}
+    return [campo for campo in disponibles if campo in pedidos] or None
+
+
+def fecha_iso(valor, zona):
+    """Formatea una fecha igual que ``serializers.DateTimeField`` (ISO 8601 en ``zona``)"""
+    if not valor:
+        return None
+    if valor.tzinfo is not None:
+        valor = valor.astimezone(zona)
+    texto = valor.isoformat()
+    if texto.endswith('+00:00'):
+        texto = texto[:-6] + 'Z'
+    return texto
+
+
+class CamposDinamicosMixin:
+    """
+    Permite a los clientes pedir solo algunos campos con ``?fields=a,b,c``.
+
+    Los serializadores que además definen ``valores_rapidos`` (campo ->
+    (columnas, función(fila de ``values()``, zona horaria))) pueden usarse en el
+    listado rápido de ``ListadoRapidoMixin`` sin instanciar un serializador
+    por fila.
+    """
+    valores_rapidos = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        campos = campos_solicitados(self.context.get('request'), list(self.fields))
+        if campos is not None:
+            for nombre in set(self.fields) - set(campos):
+                self.fields.pop(nombre)
+
+
+class VisitanteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador para el modelo Visitante (tabla externa)"""
     id = serializers.CharField(source='documento', read_only=True)
     nombre = serializers.SerializerMethodField()
@@ -27,8 +79,20 @@ class VisitanteSerializer(serializers.ModelSerializer):
     def get_fecha_registro(self, obj):
         return obj.fecha_registro
 
+    valores_rapidos = {
+        'id': (('documento',), lambda f, z: f['documento']),
+        'nombre': (
+            ('nombre', 'apellido', 'documento'),
+            lambda f, z: f"{f['nombre'] or ''} {f['apellido'] or ''}".strip() or f['documento'],
+        ),
+        'identificacion': (('documento',), lambda f, z: f['documento']),
+        'email': (('email',), lambda f, z: f['email']),
+        'activo': ((), lambda f, z: True),
+        'fecha_registro': ((), lambda f, z: None),
+    }
+
 
-class EstudianteSerializer(serializers.ModelSerializer):
+class EstudianteSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     """Serializador para el modelo Estudiante"""
     
     class Meta:
@@ -37,15 +101,25 @@ class EstudianteSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'fecha_registro']
 
 
-class CodigoQRSerializer(serializers.ModelSerializer):
-    """Serializador para el modelo CodigoQR"""
-    estudiante_nombre = serializers.CharField(source='visitante_nombre', read_only=True)
+class CodigoQRSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    """
+    Serializador para el modelo CodigoQR. Los campos ``visitante_*`` salen del
+    ``Titular``; al escribirlos se registra (o pone al día) el titular por email.
+    ``visitante_id`` es solo lectura: el documento se escribe con
+    ``visitante_identificacion``.
+    """
+    estudiante_nombre = serializers.CharField(source='titular.nombre', read_only=True)
+    visitante_id = serializers.CharField(source='titular.documento', read_only=True)
+    visitante_nombre = serializers.CharField(source='titular.nombre', max_length=200, required=False, allow_blank=True)
+    visitante_identificacion = serializers.CharField(source='titular.documento', max_length=50, required=False, allow_blank=True)
+    visitante_email = serializers.EmailField(source='titular.email', required=False)
     codigo_str = serializers.CharField(source='codigo', read_only=True)
     
     class Meta:
         model = CodigoQR
         fields = [
             'id', 
+            'evento',
             'estudiante', 
             'estudiante_nombre',
             'visitante_id',
@@ -59,7 +133,121 @@ class CodigoQRSerializer(serializers.ModelSerializer):
             'fecha_creacion', 
             'fecha_uso'
         ]
-        read_only_fields = ['id', 'codigo', 'fecha_creacion', 'fecha_uso']
+        read_only_fields = ['id', 'evento', 'codigo', 'fecha_creacion', 'fecha_uso']
+
+    def _titular(self, datos, actual=None):
+        """Registra el titular con los ``visitante_*`` recibidos; lo no enviado se conserva"""
+        email = datos.get('email') or (actual.email if actual else 'noemail@example.com')
+        if actual is None or actual.email != email:
+            actual = Titular.objects.filter(email=email).first()
+        valores = {'nombre': actual.nombre, 'documento': actual.documento} if actual else {'nombre': '', 'documento': ''}
+        valores.update((campo, valor) for campo, valor in datos.items() if campo != 'email' and valor is not None)
+        return Titular.objects.registrar(email, **valores)
+
+    def _guardar(self, validated_data, instance=None):
+        evento_id = instance.evento_id if instance else evento_para_generar()
+        with transaction.atomic():
+            if instance is None or 'titular' in validated_data:
+                validated_data['titular'] = self._titular(
+                    validated_data.pop('titular', {}), instance.titular if instance else None
+                )
+            # La unicidad por titular no la valida DRF: ``titular`` no es un campo del API
+            repetidos = CodigoQR.objects.filter(
+                evento_id=evento_id,
+                titular=validated_data.get('titular') or instance.titular,
+                tipo_comida=validated_data.get('tipo_comida') or instance.tipo_comida,
+            )
+            if instance is not None:
+                repetidos = repetidos.exclude(pk=instance.pk)
+            if repetidos.exists():
+                raise self._error_repetido()
+            try:
+                with transaction.atomic():
+                    if instance is None:
+                        return super().create({**validated_data, 'evento_id': evento_id})
+                    return super().update(instance, validated_data)
+            except IntegrityError:
+                # Otra petición pudo crear el mismo código entre la comprobación y el INSERT
+                if repetidos.exists():
+                    raise self._error_repetido()
+                raise
+
+    def _error_repetido(self):
+        return serializers.ValidationError(
+            {api_settings.NON_FIELD_ERRORS_KEY: ['El titular ya tiene un código de este tipo de comida en el evento.']}
+        )
+
+    def create(self, validated_data):
+        return self._guardar(validated_data)
+
+    def update(self, instance, validated_data):
+        return self._guardar(validated_data, instance)
+
+    # Los campos duplicados (codigo/codigo_str, estudiante_nombre/visitante_nombre,
+    # visitante_id/visitante_identificacion) se conservan por compatibilidad,
+    # pero salen de una sola columna
+    valores_rapidos = {
+        'id': (('id',), lambda f, z: f['id']),
+        'evento': (('evento',), lambda f, z: f['evento']),
+        'estudiante': (('estudiante',), lambda f, z: f['estudiante']),
+        'estudiante_nombre': (('titular__nombre',), lambda f, z: f['titular__nombre']),
+        'visitante_id': (('titular__documento',), lambda f, z: f['titular__documento']),
+        'visitante_nombre': (('titular__nombre',), lambda f, z: f['titular__nombre']),
+        'visitante_identificacion': (('titular__documento',), lambda f, z: f['titular__documento']),
+        'visitante_email': (('titular__email',), lambda f, z: f['titular__email']),
+        'tipo_comida': (('tipo_comida',), lambda f, z: f['tipo_comida']),
+        'codigo': (('codigo',), lambda f, z: str(f['codigo'])),
+        'codigo_str': (('codigo',), lambda f, z: str(f['codigo'])),
+        'usado': (('usado',), lambda f, z: f['usado']),
+        'fecha_creacion': (('fecha_creacion',), lambda f, z: fecha_iso(f['fecha_creacion'], z)),
+        'fecha_uso': (('fecha_uso',), lambda f, z: fecha_iso(f['fecha_uso'], z)),
+    }
+
+
+class EventoSerializer(serializers.ModelSerializer):
+    """Serializador para el modelo Evento (solo lectura)"""
+
+    class Meta:
+        model = Evento
+        fields = ['id', 'nombre', 'fecha', 'activo', 'archivado', 'codigos_archivados', 'fecha_creacion']
+        read_only_fields = fields
+
+
+class EstacionSerializer(serializers.ModelSerializer):
+    """Serializador de Estacion con su actividad en vivo (``estaciones.agregador_estaciones``)"""
+    en_vivo = serializers.SerializerMethodField()
+    estado = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Estacion
+        fields = [
+            'id', 'identificador', 'nombre', 'escaneos', 'errores', 'ultimo_escaneo',
+            'ultimo_latido', 'fecha_registro', 'en_vivo', 'estado'
+        ]
+        read_only_fields = fields
+
+    def _en_vivo(self, obj):
+        if not hasattr(obj, '_en_vivo'):
+            obj._en_vivo = agregador_estaciones.en_vivo(obj.identificador)
+        return obj._en_vivo
+
+    def get_en_vivo(self, obj):
+        en_vivo = self._en_vivo(obj)
+        if en_vivo and en_vivo['ultimo_visto']:
+            # Misma zona horaria que los DateTimeField del modelo
+            en_vivo = {**en_vivo, 'ultimo_visto': serializers.DateTimeField().to_representation(en_vivo['ultimo_visto'])}
+        return en_vivo
+
+    def get_estado(self, obj):
+        """``activa`` si se la vio (escaneo o latido) en los últimos ESTACIONES_SIN_SENAL segundos"""
+        vistos = [obj.ultimo_escaneo, obj.ultimo_latido]
+        en_vivo = self._en_vivo(obj)
+        if en_vivo:
+            vistos.append(en_vivo['ultimo_visto'])
+        vistos = [v for v in vistos if v]
+        if vistos and (timezone.now() - max(vistos)).total_seconds() <= settings.ESTACIONES_SIN_SENAL:
+            return 'activa'
+        return 'desconectada'
 
 
 class EstudianteConCodigosSerializer(serializers.ModelSerializer):
@@ -77,31 +265,14 @@ class ValidarCodigoQRSerializer(serializers.Serializer):
 
     Este validador acepta cadenas con posibles comillas, espacios u otros
     caracteres accidentales (p. ej. los introducidos por el lector) y los
-    normaliza a un UUID antes de verificar la existencia en la base de datos.
+    normaliza a un UUID. La existencia y el estado del código los comprueba
+    el canje (``redenciones.redimir_escaneo``) con una sola consulta.
     """
     codigo = serializers.CharField()
 
     def validate_codigo(self, value):
-        # Limpiar espacios y comillas que a veces pega el lector
-        raw = value.strip()
-        # Eliminar comillas simples/dobles
-        raw = raw.replace("'", "").replace('"', '')
-        # Eliminar cualquier caracter que no sea hex o guion
-        cleaned = re.sub(r'[^0-9a-fA-F\-]', '', raw)
-
-        # Intentar convertir a UUID
-        try:
-            codigo_uuid = uuid.UUID(cleaned)
-        except Exception:
-            raise serializers.ValidationError("Código QR no válido.")
-
-        # Verificar existencia en la DB
-        try:
-            codigo_qr = CodigoQR.objects.get(codigo=codigo_uuid)
-            if codigo_qr.usado:
-                raise serializers.ValidationError("Este código QR ya ha sido utilizado.")
-        except CodigoQR.DoesNotExist:
-            raise serializers.ValidationError("Código QR no válido.")
-
-        # Retornar UUID serializado (opcional)
-        return str(codigo_uuid)
+        # Limpiar espacios, comillas y caracteres que a veces pega el lector
+        codigo_uuid = normalizar_codigo(value)
+        if codigo_uuid is None:
+            raise serializers.ValidationError(MENSAJE_NO_VALIDO)
+        return codigo_uuid
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .metricas import instalar_contador
+from .models import CodigoQR, Evento, Titular
+from .perfilado import instalar_captura
+from .resiliencia import estadisticas_conexiones
+from .versiones import TABLA_CODIGOS, tocar_version
+
+
+def _tocar_version_codigos():
+    tocar_version(TABLA_CODIGOS)
+
+
+@receiver(post_save, sender=CodigoQR)
+@receiver(post_delete, sender=CodigoQR)
+@receiver(post_save, sender=Titular)
+def invalidar_listados_codigos(sender, using, **kwargs):
+    """
+    Cualquier alta, redención o borrado de un código invalida los listados
+    cacheados; también editar un titular, del que salen los ``visitante_*``
+    """
+    conexion = transaction.get_connection(using)
+    # Un solo incremento por transacción aunque cambien miles de filas (p. ej. un delete en cascada)
+    if any(funcion is _tocar_version_codigos for _, funcion, _ in conexion.run_on_commit):
+        return
+    transaction.on_commit(_tocar_version_codigos, using=using)
+
+
+@receiver(post_save, sender=Evento)
+def invalidar_listados_evento(sender, using, **kwargs):
+    """Los listados de códigos son del evento activo: cambiarlo también los invalida"""
+    transaction.on_commit(_tocar_version_codigos, using=using)
+
+
+@receiver(connection_created)
+def registrar_conexion(sender, connection, **kwargs):
+    """Lleva la cuenta de conexiones y tiempos de consulta por alias e instala los medidores por petición"""
+    estadisticas_conexiones.registrar_conexion(connection)
+    instalar_contador(connection)
+    instalar_captura(connection)
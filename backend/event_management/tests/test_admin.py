@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import CodigoQR, Evento
+from ..pagination import PaginadorEstimado
+from .utilidades import crear_codigos
+
+RUTA = '/admin/event_management/codigoqr/'
+
+
+class CodigoQRAdminTests(TestCase):
+    """Changelist de códigos para tablas grandes"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.codigos = crear_codigos(self.evento, 'ana@prueba.invalid')
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@prueba.invalid', 'x'))
+
+    def consultas_del_listado(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get(RUTA).status_code, 200)
+        return len(consultas)
+
+    def test_consultas_constantes(self):
+        antes = self.consultas_del_listado()
+        for i in range(5):
+            crear_codigos(self.evento, f'otro{i}@prueba.invalid', f'Otro {i}', str(2000 + i))
+        self.assertEqual(self.consultas_del_listado(), antes)
+
+    def test_busqueda_por_codigo(self):
+        codigo = self.codigos[1]
+        respuesta = self.client.get(RUTA, {'q': str(codigo.codigo).upper()})
+        self.assertEqual(list(respuesta.context['cl'].result_list), [codigo])
+        respuesta = self.client.get(RUTA, {'q': '100'})
+        self.assertEqual(respuesta.context['cl'].result_count, 2)
+
+
+class PaginadorEstimadoTests(TestCase):
+
+    def setUp(self):
+        crear_codigos(Evento.objects.create(nombre='Evento prueba', activo=True), 'ana@prueba.invalid')
+
+    @mock.patch('event_management.pagination.filas_estimadas', return_value=250000)
+    def test_total_estimado_sin_filtros(self, _):
+        self.assertEqual(PaginadorEstimado(CodigoQR.objects.all(), 100).count, 250000)
+        self.assertEqual(PaginadorEstimado(CodigoQR.objects.filter(tipo_comida='DESAYUNO'), 100).count, 1)
+
+    @mock.patch('event_management.pagination.filas_estimadas', return_value=50)
+    def test_tabla_pequena_cuenta_exacto(self, _):
+        self.assertEqual(PaginadorEstimado(CodigoQR.objects.all(), 100).count, 2)
@@ -0,0 +1,54 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import uuid
+
+from django.conf import settings
+from django.core.management import CommandError
+from django.test import SimpleTestCase
+
+from ..management.commands.benchmark_arranque import Command
+from ..qr_render import imagen_png
+
+
+class ArranqueTests(SimpleTestCase):
+    """``qrcode``/Pillow se cargan en el primer render, no al arrancar"""
+
+    def test_wsgi_no_importa_qrcode(self):
+        # Aplicación WSGI y URLconf cargadas (todas las vistas importadas), sin atender peticiones
+        script = 'import json, sys\nfrom config.wsgi import application\nimport config.urls\nprint(json.dumps(sorted(sys.modules)))'
+        proceso = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=dict(os.environ),
+            capture_output=True, text=True, check=True,
+        )
+        modulos = set(json.loads(proceso.stdout.strip().splitlines()[-1]))
+        self.assertIn('event_management.views', modulos)
+        self.assertEqual(modulos & {'qrcode', 'PIL'}, set())
+
+    def test_primer_render(self):
+        self.assertTrue(imagen_png(uuid.uuid4()).startswith(b'\x89PNG'))
+
+
+class BenchmarkArranqueTests(SimpleTestCase):
+
+    def comando(self):
+        return Command(stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_leer_importtime(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       100 |        100 |   django.utils\n'
+            'import time:       200 |        300 | django\n'
+            'import time:        50 |         50 | json\n'
+        )
+        modulos, total = self.comando()._leer_importtime(stderr)
+        self.assertEqual(modulos, {'django.utils': 0.0001, 'django': 0.0002, 'json': 0.00005})
+        self.assertAlmostEqual(total, 0.00035)
+
+    def test_comparar(self):
+        base = {'resultados': {'check': {'total_s': 1.0, 'modulos': 100}}}
+        self.comando()._comparar(base, {'check': {'total_s': 1.1, 'modulos': 100}}, 0.15)
+        with self.assertRaises(CommandError):
+            self.comando()._comparar(base, {'check': {'total_s': 1.0, 'modulos': 130}}, 0.15)
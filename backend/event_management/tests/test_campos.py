@@ -0,0 +1,28 @@
+from django.test import TestCase
+
+from ..models import Evento
+from .utilidades import crear_codigos
+
+
+class CamposSolicitadosTests(TestCase):
+    """``?fields=`` con nombres desconocidos: todos los campos, en el listado y en el detalle"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.codigo = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=('DESAYUNO',))[0]
+
+    def test_campos_desconocidos(self):
+        completo = self.client.get(f'/api/codigos-qr/{self.codigo.pk}/').json()
+        listado = self.client.get('/api/codigos-qr/', {'fields': 'no_existe'}).json()
+        filas = listado['results'] if isinstance(listado, dict) else listado
+        detalle = self.client.get(f'/api/codigos-qr/{self.codigo.pk}/', {'fields': 'no_existe'}).json()
+        self.assertEqual(set(filas[0]), set(completo))
+        self.assertEqual(set(detalle), set(completo))
+
+    def test_campos_mezclados(self):
+        parametros = {'fields': 'tipo_comida,no_existe'}
+        listado = self.client.get('/api/codigos-qr/', parametros).json()
+        filas = listado['results'] if isinstance(listado, dict) else listado
+        detalle = self.client.get(f'/api/codigos-qr/{self.codigo.pk}/', parametros).json()
+        self.assertEqual(filas, [{'tipo_comida': 'DESAYUNO'}])
+        self.assertEqual(detalle, {'tipo_comida': 'DESAYUNO'})
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from .. import redenciones
+from ..duplicados import VueloUnico
+from ..models import Evento
+from ..validacion import MENSAJE_USADO
+from .utilidades import crear_codigos
+
+
+class EscaneosDuplicadosTests(TestCase):
+    """``redimir_escaneo`` agrupa las lecturas repetidas por (código, estación)"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+
+    def escanear_dos_veces(self, estacion):
+        codigo = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=('DESAYUNO',))[0]
+        with mock.patch.object(redenciones, 'escaneos', VueloUnico(ventana=60)), \
+                mock.patch.object(redenciones, 'registrar'):
+            return [redenciones.redimir_escaneo(codigo.codigo, estacion)[1] for _ in range(2)]
+
+    def test_duplicado_en_la_misma_estacion(self):
+        # La segunda lectura del lector recibe el resultado de la primera
+        self.assertEqual(self.escanear_dos_veces('puerta-1'), [None, None])
+
+    def test_duplicado_sin_estacion(self):
+        # Sin estación no se sabe si es la misma puerta: la segunda lectura se valida
+        self.assertEqual(self.escanear_dos_veces(''), [None, MENSAJE_USADO])
+
+
+class VueloUnicoTests(SimpleTestCase):
+
+    def test_copias_concurrentes(self):
+        vuelos = VueloUnico(ventana=0)
+        empezo, seguir = threading.Event(), threading.Event()
+        llamadas, resultados = [], []
+
+        def funcion():
+            llamadas.append(1)
+            empezo.set()
+            seguir.wait(5)
+            return 'resultado'
+
+        hilos = [threading.Thread(target=lambda: resultados.append(vuelos.ejecutar('clave', funcion))) for _ in range(2)]
+        hilos[0].start()
+        empezo.wait(5)
+        hilos[1].start()
+        limite = time.monotonic() + 5
+        while not vuelos.coalescidos and time.monotonic() < limite:
+            time.sleep(0.001)
+        seguir.set()
+        for hilo in hilos:
+            hilo.join(5)
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(sorted(resultados), [('resultado', False), ('resultado', True)])
+
+    def test_ventana(self):
+        vuelos = VueloUnico(ventana=60)
+        funcion = mock.Mock(return_value='resultado')
+        self.assertEqual(vuelos.ejecutar('clave', funcion), ('resultado', False))
+        self.assertEqual(vuelos.ejecutar('clave', funcion), ('resultado', True))
+        self.assertEqual(vuelos.ejecutar('otra', funcion), ('resultado', False))
+        self.assertEqual(funcion.call_count, 2)
+
+    def test_error_no_se_guarda(self):
+        vuelos = VueloUnico(ventana=60)
+        funcion = mock.Mock(side_effect=[RuntimeError('BD'), 'resultado'])
+        with self.assertRaises(RuntimeError):
+            vuelos.ejecutar('clave', funcion)
+        self.assertEqual(vuelos.ejecutar('clave', funcion), ('resultado', False))
+
+    def test_aejecutar_concurrente(self):
+        vuelos = VueloUnico(ventana=0)
+        llamadas = []
+
+        async def funcion():
+            llamadas.append(1)
+            await asyncio.sleep(0.01)
+            return 'resultado'
+
+        async def dos_copias():
+            return await asyncio.gather(vuelos.aejecutar('clave', funcion), vuelos.aejecutar('clave', funcion))
+
+        self.assertEqual(sorted(asyncio.run(dos_copias())), [('resultado', False), ('resultado', True)])
+        self.assertEqual(len(llamadas), 1)
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from ..estaciones import AgregadorEstaciones, agregador_estaciones
+from ..models import Estacion
+
+
+@mock.patch.object(AgregadorEstaciones, '_asegurar_hilo')
+class AgregadorEstacionesTests(TestCase):
+
+    def test_volcado_acumulado(self, _):
+        agregador = AgregadorEstaciones(intervalo=60)
+        for exito in (True, True, False):
+            agregador.registrar_escaneo('puerta-1', exito)
+        self.assertEqual(agregador.vaciar(), 1)
+        estacion = Estacion.objects.get(identificador='puerta-1')
+        self.assertEqual((estacion.escaneos, estacion.errores), (3, 1))
+        self.assertIsNotNone(estacion.ultimo_escaneo)
+        # Sin actividad nueva no se escribe nada
+        self.assertEqual(agregador.vaciar(), 0)
+
+        agregador.registrar_escaneo('puerta-1', True)
+        agregador.registrar_latido('puerta-1')
+        agregador.vaciar()
+        estacion.refresh_from_db()
+        self.assertEqual((estacion.escaneos, estacion.errores), (4, 1))
+        self.assertIsNotNone(estacion.ultimo_latido)
+
+        en_vivo = agregador.en_vivo('puerta-1')
+        self.assertEqual(en_vivo['escaneos_ultimo_minuto'], 4)
+        self.assertEqual(en_vivo['tasa_error'], 0.25)
+        self.assertIsNone(agregador.en_vivo('otra'))
+
+    def test_latido(self, _):
+        self.assertEqual(self.client.post('/api/estaciones/latido/').status_code, 400)
+        self.assertEqual(self.client.get('/api/estaciones/latido/').status_code, 405)
+        respuesta = self.client.post('/api/estaciones/latido/', HTTP_X_ESTACION='puerta-latido')
+        self.assertEqual(respuesta.status_code, 204)
+        agregador_estaciones.vaciar()
+        estaciones = self.client.get('/api/estaciones/').json()
+        self.assertEqual(
+            [(e['identificador'], e['estado']) for e in estaciones if e['identificador'] == 'puerta-latido'],
+            [('puerta-latido', 'activa')],
+        )
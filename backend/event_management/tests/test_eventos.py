@@ -0,0 +1,96 @@
+import io
+import tempfile
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..models import CodigoQR, Evento, SolicitudIdempotente
+from .utilidades import crear_codigos
+
+
+class CodigosDeEventoTests(TestCase):
+    """``GET /api/eventos/<id>/codigos/`` en la tabla y en el archivo"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.codigos = crear_codigos(self.evento, 'ana@prueba.invalid')
+        crear_codigos(self.evento, 'otro@prueba.invalid', 'Otro', '2002')
+
+    def consultar(self, **parametros):
+        respuesta = self.client.get(f'/api/eventos/{self.evento.pk}/codigos/', parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_evento_vivo(self):
+        por_documento = self.consultar(identificacion='1001')
+        self.assertEqual(len(por_documento), 2)
+        self.assertEqual({fila['visitante_nombre'] for fila in por_documento}, {'Ana Pérez'})
+        self.assertEqual(len(self.consultar(email='ANA@prueba.invalid')), 2)
+        codigo = self.consultar(codigo=str(self.codigos[0].codigo))
+        self.assertEqual([fila['id'] for fila in codigo], [self.codigos[0].pk])
+
+    def test_evento_archivado(self):
+        with tempfile.TemporaryDirectory() as directorio, override_settings(EVENTOS_ARCHIVO_DIRECTORIO=directorio):
+            self.evento.activo = False
+            self.evento.save()
+            call_command('archivar_evento', str(self.evento.pk), stdout=io.StringIO())
+            por_documento = self.consultar(identificacion='1001')
+            self.assertEqual(len(por_documento), 2)
+            self.assertEqual(por_documento[0]['visitante_email'], 'ana@prueba.invalid')
+            self.assertEqual(len(self.consultar(email='otro@PRUEBA.invalid')), 2)
+
+    def test_sin_filtros(self):
+        respuesta = self.client.get(f'/api/eventos/{self.evento.pk}/codigos/')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class SinEventoActivoTests(TestCase):
+    """Sin evento activo, las rutas de generación responden 409 antes de tocar nada"""
+
+    def setUp(self):
+        # La migración inicial deja un evento activo
+        Evento.objects.update(activo=False)
+
+    def test_generacion(self):
+        rutas = [
+            '/api/estudiantes/1000/generar_codigos/',
+            '/api/estudiantes/generar_codigos_masivo/',
+            '/api/estudiantes/generar_codigos_masivo/?stream=ndjson',
+        ]
+        for ruta in rutas:
+            with self.subTest(ruta=ruta):
+                respuesta = self.client.post(ruta, HTTP_IDEMPOTENCY_KEY=f'clave-{ruta}')
+                self.assertEqual(respuesta.status_code, 409)
+                self.assertIn('evento activo', respuesta.json()['detail'])
+        # El 409 no se guarda: con un evento activo, la misma clave vuelve a ejecutarse
+        self.assertFalse(SolicitudIdempotente.objects.exists())
+
+
+class EventoActivoTests(TestCase):
+    """Un solo evento activo; los códigos se listan y validan en él"""
+
+    def setUp(self):
+        self.anterior = Evento.objects.create(nombre='Evento anterior', activo=True)
+        crear_codigos(self.anterior, 'ana@prueba.invalid', tipos=('DESAYUNO',))
+        self.actual = Evento.objects.create(nombre='Evento actual', activo=True)
+
+    def test_activar_desactiva_los_demas(self):
+        self.assertEqual(list(Evento.objects.filter(activo=True)), [self.actual])
+
+    def test_codigos_del_evento_activo(self):
+        crear_codigos(self.actual, 'ana@prueba.invalid', tipos=('DESAYUNO',))
+        self.assertEqual(CodigoQR.objects.filter(titular__email='ana@prueba.invalid').count(), 2)
+        self.assertEqual(list(CodigoQR.objects.del_evento_activo().values_list('evento', flat=True)), [self.actual.pk])
+        listado = self.client.get('/api/codigos-qr/').json()
+        filas = listado['results'] if isinstance(listado, dict) else listado
+        self.assertEqual([fila['evento'] for fila in filas], [self.actual.pk])
+        listado = self.client.get('/api/codigos-qr/', {'evento': self.anterior.pk}).json()
+        filas = listado['results'] if isinstance(listado, dict) else listado
+        self.assertEqual([fila['evento'] for fila in filas], [self.anterior.pk])
+
+    def test_archivado_no_se_activa(self):
+        self.anterior.archivado = True
+        self.anterior.activo = True
+        with self.assertRaises(ValidationError):
+            self.anterior.full_clean()
@@ -0,0 +1,50 @@
+import csv
+import io
+
+from django.test import TestCase, override_settings
+
+from ..models import CodigoQR, Evento
+from .utilidades import crear_codigos
+
+try:
+    import xlsxwriter
+except ImportError:  # pragma: no cover - xlsxwriter es opcional
+    xlsxwriter = None
+
+
+@override_settings(EXPORTACION_LOTE=2)
+class ExportacionTests(TestCase):
+    """``/api/codigos-qr/exportar/`` lee por lotes de PK y filtra como el listado"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        crear_codigos(self.evento, 'ana@prueba.invalid', tipos=('DESAYUNO', 'ALMUERZO', 'REFRIGERIO'))
+        crear_codigos(self.evento, 'luis@prueba.invalid', 'Luis Díaz', '2002', tipos=('DESAYUNO', 'ALMUERZO'))
+        CodigoQR.objects.filter(titular__email='luis@prueba.invalid', tipo_comida='DESAYUNO').update(usado=True)
+
+    def exportar(self, **parametros):
+        respuesta = self.client.get('/api/codigos-qr/exportar/', parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        texto = b''.join(respuesta.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(io.StringIO(texto)))
+
+    def test_csv_completo_por_lotes(self):
+        filas = self.exportar()
+        self.assertEqual(filas[0][:3], ['id', 'evento', 'visitante_nombre'])
+        self.assertEqual(len(filas), 6)
+        self.assertEqual(len({fila[0] for fila in filas[1:]}), 5)
+
+    def test_filtros(self):
+        filas = self.exportar(usado='true', fields='visitante_email,tipo_comida')
+        self.assertEqual(filas, [['visitante_email', 'tipo_comida'], ['luis@prueba.invalid', 'DESAYUNO']])
+        self.assertEqual(len(self.exportar(tipo_comida='ALMUERZO')), 3)
+
+    def test_formato(self):
+        self.assertEqual(self.client.get('/api/codigos-qr/exportar/', {'formato': 'pdf'}).status_code, 400)
+        respuesta = self.client.get('/api/codigos-qr/exportar/', {'formato': 'xlsx'})
+        if xlsxwriter is None:
+            self.assertEqual(respuesta.status_code, 501)
+            return
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(b''.join(respuesta.streaming_content).startswith(b'PK'))
+        respuesta.close()
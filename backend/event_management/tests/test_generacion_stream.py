@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase
+
+from ..bloqueos import GENERACION_MASIVA, bloqueo_exclusivo
+from ..models import Bloqueo, Evento
+from ..views_visitantes import VisitanteViewSet
+
+URL = '/api/estudiantes/generar_codigos_masivo/'
+
+
+def _bloque(leidos, documentos, codigos_por_visitante=2):
+    return {
+        'leidos': leidos,
+        'visitantes': [{'id': d, 'nombre': f'Visitante {d}', 'identificacion': d, 'email': 'Sin email'} for d in documentos],
+        'codigos': codigos_por_visitante * len(documentos),
+        'emails_enviados': 0,
+        'emails_fallidos': 0,
+    }
+
+
+@mock.patch('event_management.views_visitantes.llamar_rica', lambda funcion: 5)
+class ProgresoNdjsonTests(TestCase):
+    """``?stream=ndjson`` envía inicio, un progreso por bloque y fin (o error)"""
+
+    def setUp(self):
+        Evento.objects.update(activo=False)
+        Evento.objects.create(nombre='Evento prueba', activo=True)
+
+    def generar(self, bloques):
+        with mock.patch.object(VisitanteViewSet, '_bloques_masivo', return_value=bloques):
+            respuesta = self.client.post(f'{URL}?stream=ndjson')
+            self.assertEqual(respuesta['Content-Type'], 'application/x-ndjson')
+            lineas = [json.loads(linea) for linea in b''.join(respuesta.streaming_content).splitlines()]
+            respuesta.close()
+        return lineas
+
+    def test_progreso(self):
+        lineas = self.generar(iter([_bloque(3, ['1', '2']), _bloque(2, ['4'])]))
+        self.assertEqual([linea['tipo'] for linea in lineas], ['inicio', 'progreso', 'progreso', 'fin'])
+        self.assertEqual(lineas[0]['total_visitantes'], 5)
+        # Los progresos llevan los acumulados y solo los visitantes de su bloque
+        self.assertEqual(
+            (lineas[2]['bloque'], lineas[2]['visitantes_leidos'], lineas[2]['visitantes_procesados'],
+             lineas[2]['total_codigos_generados'], [v['id'] for v in lineas[2]['visitantes']]),
+            (2, 5, 3, 6, ['4'])
+        )
+        self.assertIn('3 visitantes', lineas[-1]['mensaje'])
+        # El bloqueo se liberó al cerrar la respuesta
+        self.assertFalse(Bloqueo.objects.filter(nombre=GENERACION_MASIVA).exists())
+
+    def test_error_a_mitad(self):
+        def bloques():
+            yield _bloque(3, ['1'])
+            raise OperationalError('conexión perdida')
+
+        with self.assertLogs('event_management.views_visitantes', 'ERROR'):
+            lineas = self.generar(bloques())
+        self.assertEqual([linea['tipo'] for linea in lineas], ['inicio', 'progreso', 'error'])
+        self.assertEqual((lineas[-1]['error'], lineas[-1]['visitantes_procesados']), ('Error de base de datos', 1))
+
+    def test_generacion_en_curso(self):
+        with bloqueo_exclusivo(GENERACION_MASIVA):
+            respuesta = self.client.post(f'{URL}?stream=ndjson')
+        self.assertEqual(respuesta.status_code, 409)
+
+    def test_sin_evento_activo(self):
+        Evento.objects.update(activo=False)
+        respuesta = self.client.post(f'{URL}?stream=ndjson')
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertNotIn('ndjson', respuesta['Content-Type'])
@@ -0,0 +1,133 @@
+import hashlib
+from datetime import timedelta
+
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+
+from ..bloqueos import GENERACION_MASIVA, bloqueo_exclusivo
+from ..idempotencia import idempotente
+from ..models import Bloqueo, Evento, SolicitudIdempotente
+from ..views import EstudianteViewSet
+
+
+class _VistaIdempotente:
+    """Acción mínima con ``idempotente``: cuenta sus ejecuciones"""
+
+    def __init__(self, lineas=None, estado=201):
+        self.ejecuciones = 0
+        self.lineas = lineas
+        self.estado = estado
+
+    @idempotente
+    def accion(self, request):
+        self.ejecuciones += 1
+        if self.lineas is not None:
+            return StreamingHttpResponse(iter(self.lineas), content_type='application/x-ndjson')
+        return Response({'ejecucion': self.ejecuciones}, status=self.estado)
+
+
+class IdempotenciaTests(TestCase):
+
+    def peticion(self, clave='clave-1', cuerpo=b'{}'):
+        return RequestFactory().post('/accion/', cuerpo, content_type='application/json', HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_repeticion(self):
+        vista = _VistaIdempotente()
+        primera = vista.accion(self.peticion())
+        repetida = vista.accion(self.peticion())
+        self.assertEqual((repetida.status_code, repetida.data), (201, primera.data))
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual(vista.ejecuciones, 1)
+        # Otra clave es otra solicitud
+        self.assertEqual(vista.accion(self.peticion('clave-2')).data, {'ejecucion': 2})
+
+    def test_en_curso(self):
+        SolicitudIdempotente.objects.create(clave='clave-1', ruta='/accion/', huella=hashlib.sha256(b'{}').hexdigest())
+        vista = _VistaIdempotente()
+        respuesta = vista.accion(self.peticion())
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.data['estado'], 'en_curso')
+        self.assertEqual(vista.ejecuciones, 0)
+
+    def test_otro_cuerpo(self):
+        vista = _VistaIdempotente()
+        vista.accion(self.peticion())
+        self.assertEqual(vista.accion(self.peticion(cuerpo=b'{"otro": 1}')).status_code, 422)
+        self.assertEqual(vista.ejecuciones, 1)
+
+    def test_conflicto_no_se_guarda(self):
+        vista = _VistaIdempotente(estado=409)
+        vista.accion(self.peticion())
+        vista.accion(self.peticion())
+        self.assertEqual(vista.ejecuciones, 2)
+        self.assertFalse(SolicitudIdempotente.objects.exists())
+
+    def test_stream_guarda_la_linea_fin(self):
+        vista = _VistaIdempotente([b'{"tipo": "inicio"}\n', b'{"tipo": "fin", "total": 3}\n'])
+        respuesta = vista.accion(self.peticion())
+        # Mientras se envía, la clave sigue en curso
+        self.assertEqual(vista.accion(self.peticion()).status_code, 409)
+        b''.join(respuesta.streaming_content)
+        respuesta.close()
+        repetida = vista.accion(self.peticion())
+        self.assertEqual((repetida.status_code, repetida.data), (200, {'tipo': 'fin', 'total': 3}))
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual(vista.ejecuciones, 1)
+
+    def test_stream_con_error_no_se_guarda(self):
+        vista = _VistaIdempotente([b'{"tipo": "inicio"}\n', b'{"tipo": "error", "error": "BD"}\n'])
+        respuesta = vista.accion(self.peticion())
+        b''.join(respuesta.streaming_content)
+        respuesta.close()
+        self.assertFalse(SolicitudIdempotente.objects.exists())
+
+    def test_stream_cortado_no_se_guarda(self):
+        vista = _VistaIdempotente([b'{"tipo": "fin"}\n'])
+        vista.accion(self.peticion()).close()
+        self.assertFalse(SolicitudIdempotente.objects.exists())
+
+
+class BloqueoExclusivoTests(TestCase):
+
+    def test_exclusivo_y_liberado(self):
+        with bloqueo_exclusivo('prueba') as primero:
+            self.assertTrue(primero)
+            with bloqueo_exclusivo('prueba') as segundo:
+                self.assertFalse(segundo)
+            # Quien no lo obtuvo no lo libera
+            self.assertTrue(Bloqueo.objects.filter(nombre='prueba').exists())
+        self.assertFalse(Bloqueo.objects.exists())
+        with bloqueo_exclusivo('prueba') as otra_vez:
+            self.assertTrue(otra_vez)
+
+    @override_settings(BLOQUEO_MAXIMO=60)
+    def test_bloqueo_vencido_se_reemplaza(self):
+        Bloqueo.objects.create(nombre='prueba')
+        Bloqueo.objects.update(fecha=timezone.now() - timedelta(seconds=120))
+        with bloqueo_exclusivo('prueba') as obtenido:
+            self.assertTrue(obtenido)
+
+
+class GeneracionEstudiantesTests(TestCase):
+    """La generación masiva de ``EstudianteViewSet`` también es idempotente y exclusiva"""
+
+    def setUp(self):
+        Evento.objects.update(activo=False)
+        Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.vista = EstudianteViewSet.as_view({'post': 'generar_codigos_masivo'})
+
+    def generar(self, clave):
+        return self.vista(RequestFactory().post('/estudiantes/generar_codigos_masivo/', HTTP_IDEMPOTENCY_KEY=clave))
+
+    def test_repeticion(self):
+        primera = self.generar('clave-1')
+        repetida = self.generar('clave-1')
+        self.assertEqual((repetida.status_code, repetida.data), (primera.status_code, primera.data))
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+
+    def test_generacion_en_curso(self):
+        with bloqueo_exclusivo(GENERACION_MASIVA):
+            self.assertEqual(self.generar('clave-1').status_code, 409)
+        self.assertFalse(SolicitudIdempotente.objects.exists())
@@ -0,0 +1,52 @@
+import io
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from ..models import CodigoQR, Evento
+from ..tickets import tipos_a_generar
+
+
+class ImportarVisitantesTests(TestCase):
+    """``import_visitantes --generate-codes`` sin ``--streaming``"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento importación', activo=True)
+        with connection.cursor() as cursor:
+            cursor.execute('CREATE TABLE fuente_visitantes (nombre varchar(80), identificacion varchar(20), email varchar(120))')
+            cursor.executemany(
+                'INSERT INTO fuente_visitantes VALUES (%s, %s, %s)',
+                [('Ana Pérez', '1001', 'ana@prueba.invalid'), ('Luis Díaz', '2002', 'luis@prueba.invalid')],
+            )
+
+    def importar(self):
+        # La BD fuente es la misma de pruebas: cualquier alias apunta a ella.
+        # El comando agrega 'rica_source' a DATABASES; se retira al terminar.
+        with mock.patch.dict(settings.DATABASES), mock.patch(
+            'event_management.management.commands.import_visitantes.connections',
+            {'rica_source': connection, 'default': connection},
+        ):
+            salida = io.StringIO()
+            call_command(
+                'import_visitantes', host='localhost', user='prueba', db='prueba',
+                table='fuente_visitantes', generate_codes=True, stdout=salida, stderr=io.StringIO(),
+            )
+        return salida.getvalue()
+
+    def test_genera_codigos_con_titular(self):
+        self.assertIn('created=2', self.importar())
+        tipos = len(tipos_a_generar())
+        self.assertEqual(CodigoQR.objects.filter(evento=self.evento).count(), 2 * tipos)
+        self.assertEqual(
+            set(CodigoQR.objects.filter(evento=self.evento).values_list('titular__documento', flat=True)),
+            {'1001', '2002'},
+        )
+
+    def test_sin_evento_activo(self):
+        Evento.objects.update(activo=False)
+        with self.assertRaises(CommandError):
+            self.importar()
+        self.assertFalse(CodigoQR.objects.exists())
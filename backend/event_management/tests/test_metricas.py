@@ -0,0 +1,26 @@
+from django.test import TestCase, override_settings
+
+from ..metricas import registro
+
+
+class MetricasTests(TestCase):
+    """``MetricasMiddleware`` y la vista ``/metrics``"""
+
+    def test_server_timing_y_contador(self):
+        clave = ('codigoqr-list', 'GET', 200)
+        antes = registro.peticiones.get(clave, 0)
+        respuesta = self.client.get('/api/codigos-qr/')
+        self.assertIn('total;dur=', respuesta['Server-Timing'])
+        self.assertIn('db-default;dur=', respuesta['Server-Timing'])
+        self.assertEqual(registro.peticiones[clave], antes + 1)
+        texto = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            f'refrigerios_http_peticiones_total{{ruta="codigoqr-list",metodo="GET",estado="200"}} {antes + 1}', texto
+        )
+        self.assertIn('refrigerios_bd_consultas_total{ruta="codigoqr-list",alias="default"}', texto)
+
+    @override_settings(METRICAS_TOKEN='secreto')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        respuesta = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(respuesta.status_code, 200)
@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from ..models import Evento
+from ..monitor import MonitorComidas, VentanaDeslizante
+from .utilidades import crear_codigos
+
+
+class VentanaDeslizanteTests(SimpleTestCase):
+
+    def test_totales(self):
+        ventana = VentanaDeslizante()
+        for marca in (1000.1, 1000.5, 1000.9, 1030.2):
+            ventana.registrar(marca)
+        self.assertEqual(
+            ventana.totales(1031), {'ultimo_segundo': 1, 'ultimo_minuto': 4, 'ultimos_15_minutos': 4}
+        )
+        # Un minuto después solo quedan en la ventana de 15 minutos
+        self.assertEqual(ventana.totales(1095)['ultimo_minuto'], 0)
+        self.assertEqual(ventana.totales(1095)['ultimos_15_minutos'], 4)
+        self.assertEqual(ventana.totales(1901)['ultimos_15_minutos'], 1)
+        self.assertEqual(ventana.totales(5000)['ultimos_15_minutos'], 0)
+
+
+@mock.patch.object(MonitorComidas, '_asegurar_hilo')
+class MonitorComidasTests(TestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        crear_codigos(self.evento, 'ana@prueba.invalid', tipos=('DESAYUNO', 'ALMUERZO'))
+        usado = crear_codigos(self.evento, 'luis@prueba.invalid', 'Luis Díaz', '2002', tipos=('DESAYUNO',))[0]
+        usado.usado = True
+        usado.save()
+        # Otro evento: no cuenta
+        crear_codigos(Evento.objects.create(nombre='Evento viejo'), 'ana@prueba.invalid', tipos=('DESAYUNO',))
+
+    def test_pendientes_y_proyeccion(self, _):
+        monitor = MonitorComidas(refresco=60)
+        monitor.refrescar_pendientes()
+        self.assertEqual(monitor.pendientes, {'DESAYUNO': 1, 'ALMUERZO': 1, 'REFRIGERIO': 0})
+
+        monitor.registrar('ALMUERZO')
+        estado = monitor.estado()['comidas']
+        self.assertEqual(estado['ALMUERZO']['pendientes'], 0)
+        self.assertEqual(estado['ALMUERZO']['ultimo_minuto'], 1)
+        self.assertEqual(estado['ALMUERZO']['tendencia'], 'acelerando')
+        self.assertEqual(estado['DESAYUNO']['tendencia'], 'detenido')
+        self.assertIsNone(estado['DESAYUNO']['segundos_restantes'])
+
+    def test_endpoint(self, _):
+        respuesta = self.client.get('/api/salud/comidas/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(set(respuesta.json()['comidas']), {'DESAYUNO', 'ALMUERZO', 'REFRIGERIO'})
@@ -0,0 +1,45 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+
+class PerfiladoTests(TestCase):
+    """Perfiles bajo demanda: solo para staff y consultables solo por administradores"""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        ajustes = override_settings(PERFILADO_DIRECTORIO=self.directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.usuario = User.objects.create_user('usuario', password='x')
+
+    def test_perfil_de_staff(self):
+        self.client.force_login(self.staff)
+        respuesta = self.client.get('/api/codigos-qr/', HTTP_X_PERFILAR='1')
+        perfil_id = respuesta['X-Perfil-Id']
+        self.assertEqual(sorted(os.listdir(self.directorio)), [f'{perfil_id}.json', f'{perfil_id}.prof'])
+
+        perfiles = self.client.get('/api/perfiles/').json()
+        self.assertEqual([perfil['id'] for perfil in perfiles], [perfil_id])
+        detalle = self.client.get(f'/api/perfiles/{perfil_id}/').json()
+        self.assertEqual(detalle['ruta'], 'codigoqr-list')
+        self.assertGreater(detalle['total_consultas'], 0)
+        descarga = self.client.get(f'/api/perfiles/{perfil_id}/descargar/')
+        self.assertEqual(descarga.status_code, 200)
+        descarga.close()
+
+    def test_sin_staff(self):
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get('/api/codigos-qr/', HTTP_X_PERFILAR='1')
+        self.assertNotIn('X-Perfil-Id', respuesta)
+        self.assertEqual(os.listdir(self.directorio), [])
+        self.assertEqual(self.client.get('/api/perfiles/').status_code, 403)
+
+    def test_id_invalido(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get('/api/perfiles/..%2Fsettings/').status_code, 404)
@@ -0,0 +1,61 @@
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .. import redenciones
+from ..models import Evento
+from ..qr_render import LARGO_COMPACTO, compactar, contenido_qr, descompactar
+from ..validacion import normalizar_codigo
+from .utilidades import crear_codigos
+
+
+class CargaCompactaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.codigo = uuid.UUID('0f8fad5b-d9cb-469f-a165-70867728950e')
+
+    def test_ida_y_vuelta(self):
+        compacto = compactar(self.codigo)
+        self.assertEqual(len(compacto), LARGO_COMPACTO)
+        self.assertRegex(compacto, r'^[A-Z2-7]+$')
+        self.assertEqual(descompactar(compacto), self.codigo)
+        self.assertIsNone(descompactar(compacto[:-1]))
+
+    def test_normalizar_ambas_formas(self):
+        compacto = compactar(self.codigo)
+        for leido in (str(self.codigo), str(self.codigo).upper(), compacto, compacto.lower(), f' {compacto}\n'):
+            with self.subTest(leido=leido):
+                self.assertEqual(normalizar_codigo(leido), self.codigo)
+        self.assertIsNone(normalizar_codigo('no-es-un-codigo'))
+
+    def test_contenido_segun_ajuste(self):
+        with override_settings(QR_CARGA_COMPACTA=True):
+            self.assertEqual(contenido_qr(self.codigo), compactar(self.codigo))
+        with override_settings(QR_CARGA_COMPACTA=False):
+            self.assertEqual(contenido_qr(self.codigo), str(self.codigo))
+
+    def test_version_del_qr(self):
+        import qrcode
+
+        def version(texto):
+            qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_L)
+            qr.add_data(texto)
+            qr.make(fit=True)
+            return qr.version
+
+        self.assertEqual(version(str(self.codigo)), 3)
+        self.assertEqual(version(compactar(self.codigo)), 2)
+
+
+class ValidarCompactoTests(TestCase):
+
+    def test_validar_forma_compacta(self):
+        codigo = crear_codigos(Evento.objects.create(nombre='Evento prueba', activo=True), 'ana@prueba.invalid')[0]
+        with mock.patch.object(redenciones.buffer_redenciones, 'registrar'):
+            respuesta = self.client.post(
+                '/api/codigos-qr/validar/', {'codigo': compactar(codigo.codigo)}, content_type='application/json'
+            )
+        self.assertEqual(respuesta.status_code, 200)
+        codigo.refresh_from_db()
+        self.assertTrue(codigo.usado)
@@ -0,0 +1,96 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.http import Http404
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework.request import Request
+
+from .. import resiliencia
+from ..models import Visitante
+from ..views_visitantes import VisitanteViewSet, _leer_visitantes, _PeticionCopiada
+
+
+class LecturaConCacheTests(TestCase):
+    """Con el circuito abierto y datos en caché, el refresco hace la llamada de prueba"""
+
+    def setUp(self):
+        self.interruptor = resiliencia.interruptor_rica
+        self.addCleanup(self.interruptor.registrar_exito)
+        self.addCleanup(cache.clear)
+        # Entrada obsoleta: guardada hace más que el TTL
+        cache.set('prueba', ('viejo', time.time() - 3600), 3600)
+        self.interruptor.estado = self.interruptor.ABIERTO
+        # Refresco síncrono para poder comprobar el resultado
+        parche = mock.patch.object(resiliencia, '_refrescar_en_segundo_plano', resiliencia._refrescar)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_reintento_vencido(self):
+        self.interruptor.abierto_desde = time.monotonic() - self.interruptor.tiempo_reintento - 1
+        self.assertEqual(resiliencia.leer_con_cache('prueba', lambda: 'nuevo'), 'viejo')
+        self.assertEqual(self.interruptor.estado, self.interruptor.CERRADO)
+        self.assertEqual(resiliencia.leer_con_cache('prueba', lambda: 'otro'), 'nuevo')
+
+    def test_reintento_pendiente(self):
+        self.interruptor.abierto_desde = time.monotonic()
+        funcion = mock.Mock(return_value='nuevo')
+        self.assertEqual(resiliencia.leer_con_cache('prueba', funcion), 'viejo')
+        funcion.assert_not_called()
+        self.assertEqual(self.interruptor.estado, self.interruptor.ABIERTO)
+
+
+class InterruptorCircuitoTests(SimpleTestCase):
+    """Sin caché, los errores de la BD externa se responden con 503 y abren el circuito"""
+
+    def setUp(self):
+        self.interruptor = resiliencia.InterruptorCircuito('prueba', umbral_fallos=2, tiempo_reintento=60, umbral_lentitud=5)
+        parche = mock.patch.object(resiliencia, 'interruptor_rica', self.interruptor)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.addCleanup(cache.clear)
+
+    def test_abre_tras_fallos_seguidos(self):
+        funcion = mock.Mock(side_effect=DatabaseError('caída'))
+        for _ in range(2):
+            with self.assertRaises(resiliencia.BDExternaNoDisponible):
+                resiliencia.leer_con_cache('prueba', funcion)
+        self.assertEqual(self.interruptor.estado, self.interruptor.ABIERTO)
+        # Circuito abierto: ya no se consulta la BD
+        with self.assertRaises(resiliencia.BDExternaNoDisponible):
+            resiliencia.leer_con_cache('prueba', funcion)
+        self.assertEqual(funcion.call_count, 2)
+
+    def test_datos_frescos_desde_cache(self):
+        funcion = mock.Mock(return_value='datos')
+        self.assertEqual(resiliencia.leer_con_cache('prueba', funcion), 'datos')
+        self.assertEqual(resiliencia.leer_con_cache('prueba', funcion), 'datos')
+        funcion.assert_called_once()
+
+
+class RefrescoTests(SimpleTestCase):
+    """El refresco en segundo plano no deja la clave marcada aunque falle"""
+
+    def setUp(self):
+        self.addCleanup(resiliencia.interruptor_rica.registrar_exito)
+        self.addCleanup(cache.clear)
+
+    def refrescar(self, funcion):
+        resiliencia._refrescos_en_curso.add('prueba')
+        resiliencia._refrescar('prueba', funcion)
+        self.assertNotIn('prueba', resiliencia._refrescos_en_curso)
+
+    def test_error_inesperado(self):
+        with self.assertLogs('event_management.resiliencia', 'ERROR'):
+            self.refrescar(mock.Mock(side_effect=Http404))
+        self.assertIsNone(cache.get('prueba'))
+
+    @mock.patch.object(VisitanteViewSet, 'get_queryset', lambda self: Visitante.objects.none())
+    def test_lectura_con_copia_de_la_peticion(self):
+        peticion = Request(RequestFactory().get('/api/estudiantes/', {'fields': 'id', 'page_size': '5'}))
+        copia = _PeticionCopiada(peticion)
+        datos = _leer_visitantes(copia, 'list', {})
+        self.assertEqual(datos['count'], 0)
+        with self.assertLogs('event_management.resiliencia', 'ERROR'):
+            self.refrescar(lambda: _leer_visitantes(copia, 'retrieve', {'pk': '1001'}))
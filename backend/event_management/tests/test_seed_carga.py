@@ -0,0 +1,46 @@
+import io
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from ..management.commands.seed_carga import Command
+from ..models import CodigoQR, Evento, Titular
+from ..tickets import tipos_a_generar
+
+
+@override_settings(DEBUG=True, RICA_COPIA_LOCAL=False)
+class SeedCargaTests(TestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento carga', activo=True)
+
+    def sembrar(self, *argumentos):
+        salida = io.StringIO()
+        call_command('seed_carga', *argumentos, stdout=salida)
+        return salida.getvalue()
+
+    def test_rechaza_bd_externa_sin_forzar(self):
+        with self.assertRaisesMessage(CommandError, 'rica_univalle'):
+            self.sembrar('--visitantes', '1', '--bd-visitantes', 'rica_univalle')
+
+    def test_codigos_y_limpieza(self):
+        self.sembrar('--sin-visitantes', '--visitantes', '3')
+        self.assertEqual(Titular.objects.filter(email__endswith='@carga.invalid').count(), 3)
+        self.assertEqual(CodigoQR.objects.filter(evento=self.evento).count(), 3 * len(tipos_a_generar()))
+        self.sembrar('--sin-visitantes', '--limpiar', '--visitantes', '0')
+        self.assertFalse(CodigoQR.objects.exists())
+        self.assertFalse(Titular.objects.exists())
+
+    @mock.patch.object(Command, '_asegurar_tabla_visitantes')
+    def test_aviso_si_la_api_no_lee_los_visitantes(self, asegurar):
+        salida = self.sembrar('--visitantes', '0')
+        asegurar.assert_called_once_with('default')
+        self.assertIn('la API no verá', salida)
+
+    @override_settings(RICA_COPIA_LOCAL=True)
+    @mock.patch.object(Command, '_asegurar_tabla_visitantes')
+    def test_copia_local_por_defecto(self, asegurar):
+        salida = self.sembrar('--visitantes', '0')
+        asegurar.assert_called_once_with('rica_univalle')
+        self.assertNotIn('la API no verá', salida)
@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from ..management.commands.generar_codigos_shard import Command, shard_de
+from ..models import CodigoQR, Evento, Visitante
+from ..tickets import tipos_a_generar
+from .utilidades import crear_codigos
+
+
+class ShardsTests(TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directorio.cleanup)
+        Evento.objects.update(activo=False)
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+
+    def ruta(self, nombre):
+        return os.path.join(self.directorio.name, nombre)
+
+    def generar(self, visitantes, shard='0/1'):
+        salida = self.ruta(f'shard-{shard.replace("/", "-de-")}.json')
+        with mock.patch.object(Command, '_bloques', return_value=iter([(visitantes, 0.01)])):
+            call_command('generar_codigos_shard', shard=shard, sin_email=True, salida=salida, stdout=StringIO())
+        with open(salida, encoding='utf-8') as archivo:
+            return json.load(archivo)
+
+    def test_particion_completa(self):
+        documentos = [str(1000 + i) for i in range(200)]
+        por_shard = [{d for d in documentos if shard_de(d, 4) == i} for i in range(4)]
+        self.assertEqual(set().union(*por_shard), set(documentos))
+        self.assertEqual(sum(len(s) for s in por_shard), len(documentos))
+
+    def test_shard_invalido(self):
+        for valor in ('', '1', '4/4', 'a/b'):
+            with self.subTest(valor=valor), self.assertRaises(CommandError):
+                call_command('generar_codigos_shard', shard=valor, stdout=StringIO())
+
+    def test_generar_y_omitir(self):
+        crear_codigos(self.evento, 'ana@prueba.invalid', documento='1001')
+        visitantes = [
+            Visitante(documento='1001', nombre='Ana', apellido='Pérez', email='ana@prueba.invalid'),
+            Visitante(documento='2002', nombre='Luis', apellido='Gómez', email='luis@prueba.invalid'),
+            Visitante(documento='3003', nombre='Sin', apellido='Correo'),
+        ]
+        datos = self.generar(visitantes)
+        tipos = len(tipos_a_generar())
+        self.assertEqual(
+            (datos['visitantes'], datos['omitidos'], datos['generados'], datos['codigos']), (3, 1, 2, 2 * tipos)
+        )
+        self.assertEqual(datos['evento'], self.evento.pk)
+        self.assertEqual(
+            CodigoQR.objects.filter(evento=self.evento, titular__email='3003@noemail.com').count(), tipos
+        )
+
+    def test_unir(self):
+        rutas = []
+        for i, (codigos, duracion) in enumerate([(10, 2.0), (30, 5.0)]):
+            rutas.append(self.ruta(f'{i}.json'))
+            with open(rutas[-1], 'w', encoding='utf-8') as archivo:
+                json.dump({
+                    'shard': i, 'shards': 3, 'visitantes': codigos, 'omitidos': 0, 'generados': codigos,
+                    'codigos': codigos, 'emails_enviados': 0, 'emails_fallidos': 0, 'duracion_seg': duracion,
+                    'codigos_por_seg': codigos / duracion, 'emails_por_seg': 0,
+                }, archivo)
+        salida = StringIO()
+        call_command('generar_codigos_shard', unir=rutas, stdout=salida)
+        texto = salida.getvalue()
+        self.assertIn('40 códigos', texto)
+        # El tiempo en paralelo es el del shard más lento
+        self.assertIn('En paralelo: 5.0s', texto)
+        self.assertIn('Faltan los shards [2] de 3', texto)
+
+        with self.assertRaisesMessage(CommandError, 'Shards repetidos'):
+            call_command('generar_codigos_shard', unir=[rutas[0], rutas[0]], stdout=StringIO())
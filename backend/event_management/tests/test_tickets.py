@@ -0,0 +1,70 @@
+from datetime import datetime, time
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from ..models import CodigoQR, ConsumoTicket, Evento
+from ..tickets import FRANJAS, comida_en_curso, leer_franjas, tipos_a_generar
+from ..validacion import MENSAJE_FUERA_DE_HORARIO, MENSAJE_USADO, redimir
+from .utilidades import crear_codigos
+
+
+class FranjasTests(SimpleTestCase):
+
+    def test_leer_franjas(self):
+        self.assertEqual(
+            leer_franjas(['desayuno=06:00-10:30', 'ALMUERZO = 11:30-14:00']),
+            [('DESAYUNO', time(6), time(10, 30)), ('ALMUERZO', time(11, 30), time(14))],
+        )
+        for valor in ('DESAYUNO', 'CENA=18:00-20:00', 'ALMUERZO=14:00-11:30'):
+            with self.subTest(valor=valor), self.assertRaises(ImproperlyConfigured):
+                leer_franjas([valor])
+
+    def test_comida_en_curso(self):
+        tipo, inicio, _ = FRANJAS[0]
+        en_franja = timezone.make_aware(datetime.combine(datetime(2026, 3, 2), inicio))
+        self.assertEqual(comida_en_curso(en_franja), tipo)
+        madrugada = timezone.make_aware(datetime(2026, 3, 2, 3, 0))
+        self.assertIsNone(comida_en_curso(madrugada))
+
+    def test_tipos_a_generar(self):
+        with override_settings(CODIGOS_MODO_TICKET=True):
+            self.assertEqual(tipos_a_generar(), [CodigoQR.TICKET])
+        with override_settings(CODIGOS_MODO_TICKET=False):
+            self.assertEqual(tipos_a_generar(), ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO'])
+
+
+class RedencionTicketTests(TestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+
+    def test_doble_redencion_ticket(self):
+        ticket = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=(CodigoQR.TICKET,))[0]
+        with mock.patch('event_management.validacion.comida_en_curso', return_value='ALMUERZO'):
+            fila, error = redimir(ticket.codigo)
+            self.assertIsNone(error)
+            self.assertEqual(fila['tipo_comida'], 'ALMUERZO')
+            _, error = redimir(ticket.codigo)
+            self.assertEqual(error, MENSAJE_USADO)
+        self.assertEqual(ConsumoTicket.objects.filter(codigo=ticket).count(), 1)
+        ticket.refresh_from_db()
+        # Quedan otras comidas: el ticket sigue sin usar
+        self.assertFalse(ticket.usado)
+
+    def test_ticket_agotado(self):
+        ticket = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=(CodigoQR.TICKET,))[0]
+        for tipo, _, _ in FRANJAS:
+            with mock.patch('event_management.validacion.comida_en_curso', return_value=tipo):
+                self.assertIsNone(redimir(ticket.codigo)[1])
+        ticket.refresh_from_db()
+        self.assertTrue(ticket.usado)
+        self.assertEqual(redimir(ticket.codigo)[1], MENSAJE_USADO)
+
+    def test_fuera_de_horario(self):
+        ticket = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=(CodigoQR.TICKET,))[0]
+        with mock.patch('event_management.validacion.comida_en_curso', return_value=None):
+            self.assertEqual(redimir(ticket.codigo)[1], MENSAJE_FUERA_DE_HORARIO)
+        self.assertFalse(ConsumoTicket.objects.exists())
@@ -0,0 +1,169 @@
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+
+from ..models import Evento, Titular
+from ..validacion import MENSAJE_USADO, redimir
+from ..versiones import TABLA_CODIGOS, obtener_version
+from .utilidades import crear_codigos
+
+
+class VersionTitularTests(TransactionTestCase):
+    """
+    Los datos de los códigos salen del titular: cambiarlo invalida los listados.
+    Sin transacción de prueba, para que los ``on_commit`` se ejecuten.
+    """
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        crear_codigos(self.evento, 'ana@prueba.invalid')
+
+    def version(self):
+        return obtener_version(TABLA_CODIGOS)[0]
+
+    def test_editar_titular(self):
+        antes = self.version()
+        titular = Titular.objects.get(email='ana@prueba.invalid')
+        titular.nombre = 'Ana Corregida'
+        titular.save()
+        self.assertGreater(self.version(), antes)
+
+    def test_registrar_varios(self):
+        antes = self.version()
+        Titular.objects.registrar_varios([('ana@prueba.invalid', 'Ana Pérez', '1001')])
+        self.assertEqual(self.version(), antes)
+        Titular.objects.registrar_varios([('ana@prueba.invalid', 'Ana Corregida', '1001')])
+        self.assertGreater(self.version(), antes)
+
+    def test_listado_no_responde_304_tras_editar(self):
+        respuesta = self.client.get('/api/codigos-qr/')
+        etag = respuesta['ETag']
+        Titular.objects.registrar('ana@prueba.invalid', 'Ana Corregida', '1001')
+        respuesta = self.client.get('/api/codigos-qr/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        filas = respuesta.json()
+        filas = filas['results'] if isinstance(filas, dict) else filas
+        self.assertEqual({fila['visitante_nombre'] for fila in filas}, {'Ana Corregida'})
+
+
+class ApiTitularesTests(TestCase):
+    """Los campos ``visitante_*`` del API salen del titular"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.codigos = crear_codigos(self.evento, 'ana@prueba.invalid')
+
+    def test_listado_y_detalle(self):
+        listado = self.client.get('/api/codigos-qr/').json()
+        filas = listado['results'] if isinstance(listado, dict) else listado
+        detalle = self.client.get(f'/api/codigos-qr/{self.codigos[0].pk}/').json()
+        for fila in filas + [detalle]:
+            self.assertEqual(
+                (fila['visitante_nombre'], fila['visitante_identificacion'], fila['visitante_email']),
+                ('Ana Pérez', '1001', 'ana@prueba.invalid')
+            )
+        self.assertEqual(len(filas), 2)
+
+    def test_exportar(self):
+        respuesta = self.client.get('/api/codigos-qr/exportar/', {'fields': 'visitante_nombre,visitante_email,tipo_comida'})
+        lineas = b''.join(respuesta.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lineas), 3)
+        self.assertIn('Ana Pérez,ana@prueba.invalid,DESAYUNO', lineas)
+
+    def test_editar_titular_desde_un_codigo(self):
+        respuesta = self.client.patch(
+            f'/api/codigos-qr/{self.codigos[0].pk}/', {'visitante_nombre': 'Ana Corregida'}, content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        # Un titular para los dos códigos: el otro también cambia
+        self.assertEqual(self.client.get(f'/api/codigos-qr/{self.codigos[1].pk}/').json()['visitante_nombre'], 'Ana Corregida')
+        self.assertEqual(Titular.objects.get().email, 'ana@prueba.invalid')
+
+    def crear(self, **datos):
+        return self.client.post('/api/codigos-qr/', datos, content_type='application/json')
+
+    def test_crear_codigo_repetido(self):
+        respuesta = self.crear(tipo_comida='DESAYUNO', visitante_email='ana@prueba.invalid')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('ya tiene un código', respuesta.json()['non_field_errors'][0])
+        respuesta = self.crear(tipo_comida='REFRIGERIO', visitante_email='ana@prueba.invalid')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json()['evento'], self.evento.pk)
+
+    def test_crear_sin_evento_activo(self):
+        Evento.objects.update(activo=False)
+        respuesta = self.crear(tipo_comida='REFRIGERIO', visitante_email='ana@prueba.invalid')
+        self.assertEqual(respuesta.status_code, 409)
+
+    def test_visitante_id_es_solo_lectura(self):
+        respuesta = self.crear(
+            tipo_comida='REFRIGERIO', visitante_email='luis@prueba.invalid',
+            visitante_identificacion='2002', visitante_id='9999',
+        )
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.json()['visitante_id'], '2002')
+        self.assertEqual(Titular.objects.get(email='luis@prueba.invalid').documento, '2002')
+
+
+class MigracionTitularesTests(TransactionTestCase):
+    """``0012_titulares`` pliega los ``visitante_*`` en un Titular por email y se puede revertir"""
+
+    antes = [('event_management', '0011_idempotencia_bloqueos')]
+    despues = [('event_management', '0012_titulares')]
+
+    def migrar(self, destino):
+        MigrationExecutor(connection).migrate(destino)
+        return MigrationExecutor(connection).loader.project_state(destino).apps
+
+    def tearDown(self):
+        call_command('migrate', 'event_management', verbosity=0)
+
+    def test_plegar_y_desplegar(self):
+        apps = self.migrar(self.antes)
+        evento = apps.get_model('event_management', 'Evento').objects.create(nombre='Evento migración', activo=True)
+        CodigoQRViejo = apps.get_model('event_management', 'CodigoQR')
+        for tipo, email, nombre in [('DESAYUNO', 'ana@prueba.invalid', 'Ana Vieja'), ('ALMUERZO', 'ANA@prueba.invalid', 'Ana Pérez')]:
+            CodigoQRViejo.objects.create(
+                evento=evento, tipo_comida=tipo, visitante_email=email, visitante_nombre=nombre, visitante_identificacion='1001'
+            )
+        CodigoQRViejo.objects.create(
+            evento=evento, tipo_comida='DESAYUNO', visitante_email='beto@prueba.invalid', visitante_nombre='Beto',
+            visitante_identificacion='', visitante_id='2002'
+        )
+
+        apps = self.migrar(self.despues)
+        Titular = apps.get_model('event_management', 'Titular')
+        # Un titular por email sin distinguir mayúsculas, con los datos del código más reciente
+        self.assertEqual(
+            set(Titular.objects.values_list('email', 'nombre', 'documento')),
+            {('ANA@prueba.invalid', 'Ana Pérez', '1001'), ('beto@prueba.invalid', 'Beto', '2002')}
+        )
+        CodigoQR = apps.get_model('event_management', 'CodigoQR')
+        self.assertEqual(
+            sorted(CodigoQR.objects.values_list('titular__nombre', 'tipo_comida')),
+            [('Ana Pérez', 'ALMUERZO'), ('Ana Pérez', 'DESAYUNO'), ('Beto', 'DESAYUNO')]
+        )
+
+        apps = self.migrar(self.antes)
+        CodigoQRViejo = apps.get_model('event_management', 'CodigoQR')
+        self.assertEqual(
+            sorted(CodigoQRViejo.objects.values_list('visitante_nombre', 'visitante_identificacion', 'tipo_comida')),
+            [('Ana Pérez', '1001', 'ALMUERZO'), ('Ana Pérez', '1001', 'DESAYUNO'), ('Beto', '2002', 'DESAYUNO')]
+        )
+
+
+class RedencionTests(TestCase):
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+
+    def test_doble_redencion(self):
+        codigo = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=('DESAYUNO',))[0]
+        fila, error = redimir(codigo.codigo)
+        self.assertIsNone(error)
+        self.assertEqual(fila['titular__nombre'], 'Ana Pérez')
+        fila, error = redimir(codigo.codigo)
+        self.assertEqual(error, MENSAJE_USADO)
+        codigo.refresh_from_db()
+        self.assertTrue(codigo.usado)
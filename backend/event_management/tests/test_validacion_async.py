@@ -0,0 +1,47 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from .. import redenciones
+from ..models import CodigoQR, Evento
+from ..validacion import MENSAJE_NO_VALIDO, MENSAJE_USADO, MENSAJE_VALIDADO
+from .utilidades import crear_codigos
+
+RUTA = '/api/codigos-qr/validar-async/'
+
+
+class ValidarAsyncTests(TestCase):
+    """``validar_codigo_async`` con el ORM asíncrono"""
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.codigo = crear_codigos(self.evento, 'ana@prueba.invalid', tipos=('ALMUERZO',))[0]
+        parche = mock.patch.object(redenciones.buffer_redenciones, 'registrar')
+        self.registrar = parche.start()
+        self.addCleanup(parche.stop)
+
+    async def validar(self, codigo):
+        return await self.async_client.post(RUTA, {'codigo': codigo}, content_type='application/json')
+
+    async def test_canje_y_repetido(self):
+        respuesta = await self.validar(str(self.codigo.codigo))
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['mensaje'], MENSAJE_VALIDADO)
+        self.assertEqual((datos['estudiante'], datos['tipo_comida']), ('Ana Pérez', 'ALMUERZO'))
+        self.assertTrue(datos['fecha_uso'].endswith('Z'))
+        self.assertTrue(await CodigoQR.objects.filter(pk=self.codigo.pk, usado=True).aexists())
+
+        respuesta = await self.validar(str(self.codigo.codigo))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json(), {'codigo': [MENSAJE_USADO]})
+
+    async def test_codigo_invalido(self):
+        respuesta = await self.validar('no-es-un-uuid')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json(), {'codigo': [MENSAJE_NO_VALIDO]})
+        self.registrar.assert_called_once()
+
+    async def test_solo_post(self):
+        respuesta = await self.async_client.get(RUTA)
+        self.assertEqual(respuesta.status_code, 405)
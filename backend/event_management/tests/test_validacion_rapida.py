@@ -0,0 +1,56 @@
+import json
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from .. import redenciones
+from ..models import Evento
+from ..views_rapidas import ManejadorValidacion
+from .utilidades import crear_codigos
+
+RUTA = '/api/codigos-qr/validar-rapido/'
+
+
+class ValidarRapidoTests(TestCase):
+    """``validar_rapido`` responde lo mismo que ``CodigoQRViewSet.validar``"""
+
+    def setUp(self):
+        evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        self.codigos = crear_codigos(evento, 'ana@prueba.invalid', tipos=('DESAYUNO', 'ALMUERZO'))
+        parche = mock.patch.object(redenciones.buffer_redenciones, 'registrar')
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def validar(self, ruta, cuerpo):
+        respuesta = self.client.post(ruta, cuerpo, content_type='application/json')
+        return respuesta.status_code, respuesta.json()
+
+    def test_mismas_respuestas_que_validar(self):
+        for cuerpo in ({}, {'codigo': 'no-es-un-uuid'}, {'codigo': '00000000-0000-4000-8000-000000000000'}):
+            self.assertEqual(self.validar(RUTA, cuerpo), self.validar('/api/codigos-qr/validar/', cuerpo))
+
+        drf = self.validar('/api/codigos-qr/validar/', {'codigo': str(self.codigos[0].codigo)})
+        rapido = self.validar(RUTA, {'codigo': str(self.codigos[1].codigo)})
+        self.assertEqual((drf[0], set(drf[1])), (rapido[0], set(rapido[1])))
+        self.assertEqual(rapido[1]['tipo_comida'], 'ALMUERZO')
+        # Ya usados: mismo error en las dos rutas
+        self.assertEqual(
+            self.validar(RUTA, {'codigo': str(self.codigos[0].codigo)}),
+            self.validar('/api/codigos-qr/validar/', {'codigo': str(self.codigos[1].codigo)}),
+        )
+
+    def test_solo_post(self):
+        respuesta = self.client.get(RUTA)
+        self.assertEqual(respuesta.status_code, 405)
+        self.assertEqual(respuesta['Allow'], 'POST, OPTIONS')
+
+    def test_sub_aplicacion_wsgi(self):
+        peticion = RequestFactory().post(
+            RUTA, {'codigo': str(self.codigos[0].codigo)}, content_type='application/json', HTTP_X_ESTACION='puerta-1'
+        )
+        estado = []
+        cuerpo = b''.join(ManejadorValidacion()(peticion.environ, lambda s, cabeceras: estado.append((s, dict(cabeceras)))))
+        self.assertEqual(estado[0][0], '200 OK')
+        # El middleware mínimo incluye las métricas
+        self.assertIn('Server-Timing', estado[0][1])
+        self.assertEqual(json.loads(cuerpo)['estudiante'], 'Ana Pérez')
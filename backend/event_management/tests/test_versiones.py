@@ -0,0 +1,36 @@
+from django.test import TransactionTestCase
+
+from ..models import Evento
+from .utilidades import crear_codigos
+
+
+class ListadoCondicionalTests(TransactionTestCase):
+    """
+    ETag de ``/api/codigos-qr/`` a partir de la versión de la tabla. Sin
+    transacción de prueba, para que los ``on_commit`` se ejecuten.
+    """
+
+    def setUp(self):
+        self.evento = Evento.objects.create(nombre='Evento prueba', activo=True)
+        crear_codigos(self.evento, 'ana@prueba.invalid')
+
+    def test_solo_etag(self):
+        respuesta = self.client.get('/api/codigos-qr/')
+        self.assertNotIn('Last-Modified', respuesta)
+        # If-Modified-Since no basta para un 304: solo cuenta el ETag
+        respuesta = self.client.get('/api/codigos-qr/', HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(respuesta.status_code, 200)
+        respuesta = self.client.get('/api/codigos-qr/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(respuesta.status_code, 304)
+
+    def test_crear_codigo_cambia_el_etag(self):
+        etag = self.client.get('/api/codigos-qr/')['ETag']
+        crear_codigos(self.evento, 'luis@prueba.invalid', 'Luis Díaz', '2002', tipos=('DESAYUNO',))
+        respuesta = self.client.get('/api/codigos-qr/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_etag_por_url(self):
+        etag = self.client.get('/api/codigos-qr/')['ETag']
+        respuesta = self.client.get('/api/codigos-qr/', {'fields': 'tipo_comida'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
@@ -0,0 +1,8 @@
+"""Datos de prueba compartidos por los módulos de ``tests``"""
+from ..models import CodigoQR, Titular
+
+
+def crear_codigos(evento, email, nombre='Ana Pérez', documento='1001', tipos=('DESAYUNO', 'ALMUERZO')):
+    """Códigos de ``tipos`` en ``evento`` para el titular ``email``"""
+    titular = Titular.objects.registrar(email, nombre, documento)
+    return [CodigoQR.objects.create(evento=evento, titular=titular, tipo_comida=tipo) for tipo in tipos]
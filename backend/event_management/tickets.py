@@ -0,0 +1,53 @@
+"""
+Modo ticket: un solo código por visitante para todas las comidas.
+
+Con ``CODIGOS_MODO_TICKET`` la generación crea un código ``TICKET`` en lugar
+de uno por comida (un tercio de filas, renders e imágenes en el email). Al
+validarlo, la comida se elige por la hora local según ``FRANJAS_COMIDAS`` y
+el canje se guarda en ``ConsumoTicket`` (ver ``validacion.redimir``). Lo
+decide cada código: los códigos por comida que ya existan se siguen
+validando igual aunque se cambie el modo.
+"""
+from datetime import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+
+from .models import CodigoQR
+
+
+def leer_franjas(valores):
+    """``['DESAYUNO=06:00-10:30', ...]`` -> ``[('DESAYUNO', time(6), time(10, 30)), ...]``"""
+    comidas = dict(CodigoQR.COMIDA_CHOICES)
+    franjas = []
+    for valor in valores:
+        try:
+            tipo, horario = valor.split('=')
+            inicio, fin = (time.fromisoformat(hora.strip()) for hora in horario.split('-'))
+        except ValueError:
+            raise ImproperlyConfigured(f'FRANJAS_COMIDAS: "{valor}" no tiene la forma COMIDA=HH:MM-HH:MM')
+        tipo = tipo.strip().upper()
+        if tipo not in comidas:
+            raise ImproperlyConfigured(f'FRANJAS_COMIDAS: comida desconocida "{tipo}"')
+        if inicio >= fin:
+            raise ImproperlyConfigured(f'FRANJAS_COMIDAS: la franja de {tipo} termina antes de empezar')
+        franjas.append((tipo, inicio, fin))
+    return franjas
+
+
+FRANJAS = leer_franjas(settings.FRANJAS_COMIDAS)
+
+
+def tipos_a_generar():
+    """Tipos de código a crear por visitante según el modo configurado"""
+    return [CodigoQR.TICKET] if settings.CODIGOS_MODO_TICKET else [tipo for tipo, _ in CodigoQR.COMIDA_CHOICES]
+
+
+def comida_en_curso(ahora=None):
+    """Comida cuya franja incluye la hora local actual (o ``ahora``), o None"""
+    hora = timezone.localtime(ahora).time()
+    for tipo, inicio, fin in FRANJAS:
+        if inicio <= hora < fin:
+            return tipo
+    return None
@@ -2,12 +2,28 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import EstudianteViewSet, CodigoQRViewSet
 from .views_visitantes import VisitanteViewSet
+from .views_eventos import EventoViewSet
+from .views_estaciones import EstacionViewSet, latido
+from .views_salud import PerfilViewSet, estado_conexiones, ritmo_comidas
+from .views_async import validar_codigo_async
+from .views_rapidas import validar_rapido
 
 router = DefaultRouter()
 # Usar VisitanteViewSet para el endpoint de estudiantes (lee de rica_univalle)
 router.register(r'estudiantes', VisitanteViewSet, basename='estudiante')
 router.register(r'codigos-qr', CodigoQRViewSet, basename='codigoqr')
+router.register(r'eventos', EventoViewSet, basename='evento')
+router.register(r'estaciones', EstacionViewSet, basename='estacion')
+router.register(r'perfiles', PerfilViewSet, basename='perfil')
 
 urlpatterns = [
+    path('salud/conexiones/', estado_conexiones, name='estado-conexiones'),
+    path('salud/comidas/', ritmo_comidas, name='ritmo-comidas'),
+    # Antes del router: si no, 'latido' se tomaría como pk del detalle
+    path('estaciones/latido/', latido, name='estacion-latido'),
+    # Antes del router: si no, 'validar-async' se tomaría como pk del detalle
+    path('codigos-qr/validar-async/', validar_codigo_async, name='validar-async'),
+    # Con WSGI la atiende ManejadorValidacion (config/wsgi.py) sin pasar por aquí
+    path('codigos-qr/validar-rapido/', validar_rapido, name='validar-rapido'),
     path('', include(router.urls)),
 ]
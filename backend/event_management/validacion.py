@@ -0,0 +1,187 @@
+"""
+Validación y redención de códigos QR.
+
+``normalizar_codigo`` la usa ``ValidarCodigoQRSerializer`` (flujo síncrono de
+``CodigoQRViewSet.validar``); ``codigo_de_peticion`` la usan la vista ligera
+``views_rapidas.validar_rapido`` y la asíncrona ``views_async.validar_codigo_async``
+para leer el cuerpo sin DRF. ``redimir`` y ``aredimir`` canjean un código con
+un UPDATE condicional (los tickets, con ``redimir_ticket``); las vistas los
+llaman a través de ``redenciones.redimir_escaneo`` / ``aredimir_escaneo``.
+"""
+import json
+import re
+import uuid
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.fields import empty
+
+from .models import CodigoQR, ConsumoTicket
+from .qr_render import descompactar
+from .tickets import FRANJAS, comida_en_curso
+from .versiones import TABLA_CODIGOS, atocar_version, tocar_version
+
+MENSAJE_NO_VALIDO = 'Código QR no válido.'
+MENSAJE_USADO = 'Este código QR ya ha sido utilizado.'
+MENSAJE_VALIDADO = 'Código QR validado exitosamente.'
+MENSAJE_FUERA_DE_HORARIO = 'Fuera del horario de comidas.'
+
+# Todo lo que no sea hex o guion: espacios, comillas y caracteres que pega el lector
+_NO_UUID = re.compile(r'[^0-9a-fA-F\-]')
+_NO_ALFANUMERICO = re.compile(r'[^0-9a-zA-Z]')
+
+
+def normalizar_codigo(valor):
+    """
+    UUID a partir del texto leído por el escáner (UUID o su forma compacta
+    base32, ver ``qr_render``), o None si no es válido
+    """
+    compacto = descompactar(_NO_ALFANUMERICO.sub('', valor).upper())
+    if compacto is not None:
+        return compacto
+    try:
+        return uuid.UUID(_NO_UUID.sub('', valor))
+    except ValueError:
+        return None
+
+
+# Mismas reglas y mensajes de error que ValidarCodigoQRSerializer.codigo
+_CAMPO_CODIGO = serializers.CharField()
+
+
+def _leer_codigo(request):
+    """
+    Valor de ``codigo`` en el cuerpo (``empty`` si falta). Acepta los mismos
+    tipos de contenido que los parsers por defecto de DRF.
+    """
+    tipo = request.content_type
+    if tipo == 'application/json':
+        try:
+            datos = json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+        return datos.get('codigo', empty) if isinstance(datos, dict) else empty
+    if tipo == 'application/x-www-form-urlencoded':
+        # parse_qs directo: evita construir request.POST (QueryDict + upload handlers)
+        valores = parse_qs(request.body.decode(request.encoding or 'utf-8'), keep_blank_values=True).get('codigo')
+        return valores[-1] if valores else empty
+    if tipo == 'multipart/form-data':
+        return request.POST.get('codigo', empty)
+    raise UnsupportedMediaType(tipo)
+
+
+def codigo_de_peticion(request):
+    """
+    Lee y normaliza el código de una petición de Django sin pasar por DRF.
+
+    Returns:
+        (UUID, None), o (None, (cuerpo de error, estado HTTP)) con los mismos
+        mensajes que ``validar``
+    """
+    try:
+        valor = _CAMPO_CODIGO.run_validation(_leer_codigo(request))
+    except (ParseError, UnsupportedMediaType) as e:
+        return None, ({'detail': str(e.detail)}, e.status_code)
+    except serializers.ValidationError as e:
+        return None, ({'codigo': [str(mensaje) for mensaje in e.detail]}, 400)
+    codigo_uuid = normalizar_codigo(valor)
+    if codigo_uuid is None:
+        return None, ({'codigo': [MENSAJE_NO_VALIDO]}, 400)
+    return codigo_uuid, None
+
+
+def nombre_titular(fila):
+    """Nombre a mostrar: el del titular si existe, sino el del estudiante"""
+    return fila['titular__nombre'] or fila['estudiante__nombre'] or 'Desconocido'
+
+
+_CAMPOS_REDENCION = ('id', 'usado', 'tipo_comida', 'titular__nombre', 'estudiante__nombre')
+
+
+def redimir(codigo_uuid):
+    """
+    Redime un código con un UPDATE condicional (``usado=False``), de modo que
+    dos escaneos simultáneos no lo canjean dos veces.
+
+    Returns:
+        (fila, None) si se redimió, o (fila o None, mensaje de error); la fila
+        está presente cuando el código existe pero ya se usó
+    """
+    try:
+        fila = CodigoQR.objects.del_evento_activo().filter(codigo=codigo_uuid).values(*_CAMPOS_REDENCION).get()
+    except CodigoQR.DoesNotExist:
+        return None, MENSAJE_NO_VALIDO
+    if fila['usado']:
+        return fila, MENSAJE_USADO
+    if fila['tipo_comida'] == CodigoQR.TICKET:
+        return redimir_ticket(fila)
+
+    ahora = timezone.now()
+    if not CodigoQR.objects.filter(pk=fila['id'], usado=False).update(usado=True, fecha_uso=ahora):
+        # Otro escaneo lo redimió entre la lectura y el UPDATE
+        return fila, MENSAJE_USADO
+
+    # update() no dispara post_save: invalidar los ETag del listado a mano
+    tocar_version(TABLA_CODIGOS)
+    fila['fecha_uso'] = ahora
+    return fila, None
+
+
+def redimir_ticket(fila):
+    """
+    Canjea la comida en curso de un código en modo ticket: el INSERT en
+    ``ConsumoTicket`` (único por ticket y comida) es el canje. En la fila
+    devuelta ``tipo_comida`` es la comida servida; el ticket queda ``usado``
+    cuando se consumieron todas las comidas de ``FRANJAS_COMIDAS``.
+    """
+    comida = comida_en_curso()
+    if comida is None:
+        return fila, MENSAJE_FUERA_DE_HORARIO
+    fila['tipo_comida'] = comida
+
+    ahora = timezone.now()
+    try:
+        with transaction.atomic():
+            ConsumoTicket.objects.create(codigo_id=fila['id'], tipo_comida=comida, fecha=ahora)
+    except IntegrityError:
+        # Ya se sirvió esta comida con el ticket (o la otra copia ganó la carrera)
+        return fila, MENSAJE_USADO
+
+    # Contado en el mismo UPDATE: dos comidas canjeadas a la vez no dejan un total viejo
+    consumidas = ConsumoTicket.objects.filter(codigo_id=OuterRef('pk')).values('codigo_id').annotate(n=Count('id')).values('n')
+    CodigoQR.objects.filter(pk=fila['id']).update(
+        usado=GreaterThanOrEqual(Subquery(consumidas), len(FRANJAS)), fecha_uso=ahora
+    )
+    tocar_version(TABLA_CODIGOS)
+    fila['fecha_uso'] = ahora
+    return fila, None
+
+
+async def aredimir(codigo_uuid):
+    """Versión asíncrona de ``redimir``"""
+    try:
+        fila = await CodigoQR.objects.del_evento_activo().filter(codigo=codigo_uuid).values(*_CAMPOS_REDENCION).aget()
+    except CodigoQR.DoesNotExist:
+        return None, MENSAJE_NO_VALIDO
+    if fila['usado']:
+        return fila, MENSAJE_USADO
+    if fila['tipo_comida'] == CodigoQR.TICKET:
+        # Necesita una transacción para el INSERT: se ejecuta en un hilo
+        return await sync_to_async(redimir_ticket)(fila)
+
+    ahora = timezone.now()
+    actualizados = await CodigoQR.objects.filter(pk=fila['id'], usado=False).aupdate(usado=True, fecha_uso=ahora)
+    if not actualizados:
+        # Otro escaneo lo redimió entre la lectura y el UPDATE
+        return fila, MENSAJE_USADO
+
+    # update() no dispara post_save: invalidar los ETag del listado a mano
+    await atocar_version(TABLA_CODIGOS)
+    fila['fecha_uso'] = ahora
+    return fila, None
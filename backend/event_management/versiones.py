@@ -0,0 +1,108 @@
+"""
+GET condicional (ETag) y caché por URL para los listados.
+
+Cada tabla tiene un contador en ``VersionTabla`` que se incrementa al crear o
+redimir códigos. El ETag de un listado se calcula con ese contador y la URL,
+de modo que una petición repetida con ``If-None-Match`` recibe un 304 tras una
+única consulta por clave primaria, sin ejecutar el listado.
+
+No se envía ``Last-Modified``: su resolución es de un segundo y dos cambios en
+el mismo segundo darían un 304 con datos viejos a ``If-Modified-Since``.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import VersionTabla
+
+TABLA_CODIGOS = 'codigoqr'
+
+
+def tocar_version(tabla):
+    """Incrementa la versión de ``tabla``; invalida ETags y caché de sus listados"""
+    actualizados = VersionTabla.objects.filter(tabla=tabla).update(
+        version=F('version') + 1,
+        modificado=timezone.now()
+    )
+    if not actualizados:
+        VersionTabla.objects.get_or_create(tabla=tabla, defaults={'version': 1})
+
+
+async def atocar_version(tabla):
+    """Versión asíncrona de ``tocar_version`` para las vistas ASGI"""
+    actualizados = await VersionTabla.objects.filter(tabla=tabla).aupdate(
+        version=F('version') + 1,
+        modificado=timezone.now()
+    )
+    if not actualizados:
+        await VersionTabla.objects.aget_or_create(tabla=tabla, defaults={'version': 1})
+
+
+def obtener_version(tabla):
+    """Retorna (versión, fecha de modificación) de ``tabla``"""
+    fila = VersionTabla.objects.filter(tabla=tabla).values_list('version', 'modificado').first()
+    if fila is None:
+        return 0, datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+    return fila
+
+
+def version_por_ventana(segundos):
+    """
+    Versión basada en tiempo para tablas externas (p. ej. ``visitantes`` en
+    rica_univalle), cuyos cambios no pasan por este sistema.
+    """
+    ventana = int(time.time() // segundos)
+    return ventana, datetime.fromtimestamp(ventana * segundos, tz=dt_timezone.utc)
+
+
+def listado_condicional(tabla=None, ventana=None):
+    """
+    Decorador para métodos de ViewSet que añade el ETag, responde 304 si el
+    cliente ya tiene la versión actual y, si ``CACHE_LISTADOS_SEGUNDOS``
+    es mayor que cero, guarda la respuesta en caché por URL y versión.
+
+    Usar ``tabla`` para tablas locales versionadas o ``ventana`` (segundos)
+    para tablas externas.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envoltura(self, request, *args, **kwargs):
+            if tabla is not None:
+                version, _ = obtener_version(tabla)
+            else:
+                version, _ = version_por_ventana(ventana)
+
+            huella = hashlib.sha1(
+                f'{tabla or "ventana"}:{version}:{request.get_full_path()}:'
+                f'{request.accepted_media_type}'.encode()
+            ).hexdigest()
+            etag = quote_etag(huella)
+
+            respuesta = get_conditional_response(request, etag=etag)
+            if respuesta is not None:
+                return respuesta
+
+            segundos = getattr(settings, 'CACHE_LISTADOS_SEGUNDOS', 0)
+            clave = f'listado:{huella}'
+            datos = cache.get(clave) if segundos else None
+            if datos is not None:
+                respuesta = Response(datos)
+            else:
+                respuesta = metodo(self, request, *args, **kwargs)
+                if segundos and respuesta.status_code == status.HTTP_200_OK:
+                    cache.set(clave, respuesta.data, segundos)
+
+            respuesta['ETag'] = etag
+            return respuesta
+        return envoltura
+    return decorador
@@ -1,19 +1,27 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
-from .models import Estudiante, CodigoQR
+from .models import Estudiante, CodigoQR, Redencion, Titular
 from .serializers import (
+    campos_solicitados,
     EstudianteSerializer, 
     CodigoQRSerializer, 
     EstudianteConCodigosSerializer,
     ValidarCodigoQRSerializer
 )
-import qrcode
-from io import BytesIO
 from django.http import HttpResponse
-import base64
+from django.utils import timezone
+from .bloqueos import GENERACION_MASIVA, bloqueo_exclusivo
 from .email_utils import enviar_codigos_qr_email
+from .generacion import evento_para_generar
+from .idempotencia import idempotente
+from .exportacion import COLUMNAS_EXPORTACION, FORMATOS, respuesta_csv, respuesta_xlsx
+from .mixins import ListadoRapidoMixin
+from .qr_render import imagen_data_uri, imagen_png
+from .tickets import tipos_a_generar
+from .versiones import TABLA_CODIGOS, listado_condicional
+from .redenciones import estacion_de, redimir_escaneo, registrar as registrar_redencion
+from .validacion import MENSAJE_VALIDADO, nombre_titular
 
 
 class EstudianteViewSet(viewsets.ModelViewSet):
@@ -37,8 +45,10 @@ class EstudianteViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
+    @idempotente
     def generar_codigos(self, request, pk=None):
-        """Genera los 3 códigos QR para un estudiante (desayuno, almuerzo, refrigerio)"""
+        """Genera los códigos QR de un estudiante (uno por comida, o un ticket con CODIGOS_MODO_TICKET)"""
+        evento_id = evento_para_generar()
         estudiante = self.get_object()
         
         # Verificar si el estudiante está activo
@@ -48,26 +58,24 @@ class EstudianteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Verificar si ya tiene códigos
-        codigos_existentes = CodigoQR.objects.filter(estudiante=estudiante)
+        # Verificar si ya tiene códigos en el evento activo
+        codigos_existentes = CodigoQR.objects.del_evento_activo().filter(estudiante=estudiante)
         if codigos_existentes.exists():
             return Response(
                 {'error': 'Este estudiante ya tiene códigos QR generados.'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Crear los 3 códigos QR
-        tipos_comida = ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO']
+        # Crear los códigos QR (uno por comida, o un ticket)
         codigos_creados = []
+        titular = Titular.objects.registrar(estudiante.email, estudiante.nombre, estudiante.identificacion)
         
-        for tipo in tipos_comida:
+        for tipo in tipos_a_generar():
             codigo_qr = CodigoQR.objects.create(
+                evento_id=evento_id,
                 estudiante=estudiante,
                 tipo_comida=tipo,
-                visitante_id=estudiante.identificacion,
-                visitante_nombre=estudiante.nombre,
-                visitante_identificacion=estudiante.identificacion,
-                visitante_email=estudiante.email
+                titular=titular
             )
             codigos_creados.append(codigo_qr)
         
@@ -91,13 +99,27 @@ class EstudianteViewSet(viewsets.ModelViewSet):
         )
 
     @action(detail=False, methods=['post'])
+    @idempotente
     def generar_codigos_masivo(self, request):
-        """Genera códigos QR para todos los estudiantes activos que no tengan códigos"""
-        # Obtener estudiantes activos sin códigos QR
+        """
+        Genera códigos QR para todos los estudiantes activos que no tengan
+        códigos; solo corre una generación masiva a la vez entre todos los procesos
+        """
+        evento_id = evento_para_generar()
+        with bloqueo_exclusivo(GENERACION_MASIVA) as obtenido:
+            if not obtenido:
+                return Response(
+                    {'error': 'Ya hay una generación masiva en curso. Intenta de nuevo cuando termine.'},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return self._generar_masivo(evento_id)
+
+    def _generar_masivo(self, evento_id):
+        # Obtener estudiantes activos sin códigos QR en el evento activo
         estudiantes_sin_codigos = Estudiante.objects.filter(
             activo=True
         ).exclude(
-            codigos_qr__isnull=False
+            codigos_qr__evento__activo=True
         ).distinct()
         
         if not estudiantes_sin_codigos.exists():
@@ -109,7 +131,7 @@ class EstudianteViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_200_OK
             )
         
-        tipos_comida = ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO']
+        tipos_comida = tipos_a_generar()
         total_codigos = 0
         estudiantes_procesados = []
         emails_enviados = 0
@@ -117,16 +139,15 @@ class EstudianteViewSet(viewsets.ModelViewSet):
         
         for estudiante in estudiantes_sin_codigos:
             # Verificar nuevamente que no tenga códigos
-            if not CodigoQR.objects.filter(estudiante=estudiante).exists():
+            if not CodigoQR.objects.del_evento_activo().filter(estudiante=estudiante).exists():
                 codigos_creados = []
+                titular = Titular.objects.registrar(estudiante.email, estudiante.nombre, estudiante.identificacion)
                 for tipo in tipos_comida:
                     codigo = CodigoQR.objects.create(
+                        evento_id=evento_id,
                         estudiante=estudiante,
                         tipo_comida=tipo,
-                        visitante_id=estudiante.identificacion,
-                        visitante_nombre=estudiante.nombre,
-                        visitante_identificacion=estudiante.identificacion,
-                        visitante_email=estudiante.email
+                        titular=titular
                     )
                     codigos_creados.append(codigo)
                     total_codigos += 1
@@ -162,109 +183,104 @@ class EstudianteViewSet(viewsets.ModelViewSet):
         )
 
 
-class CodigoQRViewSet(viewsets.ModelViewSet):
-    """ViewSet para operaciones CRUD de Códigos QR"""
+class CodigoQRViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
+    """
+    ViewSet para operaciones CRUD de Códigos QR (el listado usa la ruta rápida con values()).
+    Opera sobre el evento activo; ``?evento=<id>`` consulta otro evento no archivado.
+    """
     queryset = CodigoQR.objects.all()
     serializer_class = CodigoQRSerializer
 
+    def get_queryset(self):
+        evento = self.request.query_params.get('evento')
+        if evento and evento.isdigit():
+            return CodigoQR.objects.filter(evento_id=evento).select_related('titular')
+        return CodigoQR.objects.del_evento_activo().select_related('titular')
+
+    @listado_condicional(tabla=TABLA_CODIGOS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     @action(detail=False, methods=['post'])
     def validar(self, request):
         """Valida y marca un código QR como usado"""
         serializer = ValidarCodigoQRSerializer(data=request.data)
+        estacion = estacion_de(request)
         
-        if serializer.is_valid():
-            codigo_uuid = serializer.validated_data['codigo']
-            codigo_qr = get_object_or_404(CodigoQR, codigo=codigo_uuid)
-            
-            if codigo_qr.usado:
-                return Response(
-                    {
-                        'error': 'Este código QR ya ha sido utilizado.',
-                        'fecha_uso': codigo_qr.fecha_uso
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Marcar como usado
-            codigo_qr.marcar_como_usado()
-            
-            # Usar visitante_nombre si existe, sino estudiante
-            nombre = codigo_qr.visitante_nombre if codigo_qr.visitante_nombre else (codigo_qr.estudiante.nombre if codigo_qr.estudiante else 'Desconocido')
-            
+        if not serializer.is_valid():
+            # Falta el código o no tiene forma de UUID
+            registrar_redencion(None, Redencion.NO_VALIDO, estacion=estacion)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Canje con UPDATE condicional; las lecturas repetidas del lector reciben el mismo resultado
+        fila, error = redimir_escaneo(serializer.validated_data['codigo'], estacion)
+        if error:
+            return Response({'codigo': [error]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(
+            {
+                'mensaje': MENSAJE_VALIDADO,
+                'estudiante': nombre_titular(fila),
+                'tipo_comida': fila['tipo_comida'],
+                'fecha_uso': fila['fecha_uso']
+            },
+            status=status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Descarga los códigos en CSV (``?formato=csv``, por defecto) o XLSX.
+        Filtros: ``?evento=``, ``?tipo_comida=``, ``?usado=true|false``;
+        columnas con ``?fields=``.
+        """
+        formato = request.query_params.get('formato', 'csv').lower()
+        if formato not in FORMATOS:
             return Response(
-                {
-                    'mensaje': 'Código QR validado exitosamente.',
-                    'estudiante': nombre,
-                    'tipo_comida': codigo_qr.tipo_comida,
-                    'fecha_uso': codigo_qr.fecha_uso
-                },
-                status=status.HTTP_200_OK
+                {'error': f'Formato no soportado. Opciones: {", ".join(FORMATOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        codigos = self.get_queryset()
+        tipo_comida = request.query_params.get('tipo_comida')
+        if tipo_comida:
+            codigos = codigos.filter(tipo_comida=tipo_comida)
+        usado = request.query_params.get('usado', '').lower()
+        if usado in ('true', 'false'):
+            codigos = codigos.filter(usado=usado == 'true')
+
+        campos = campos_solicitados(request, list(self.get_serializer_class().valores_rapidos)) or COLUMNAS_EXPORTACION
+        nombre = f'codigos_{timezone.localdate():%Y%m%d}'
+        if formato == 'csv':
+            return respuesta_csv(codigos, campos, nombre)
+        respuesta = respuesta_xlsx(codigos, campos, nombre)
+        if respuesta is None:
+            return Response(
+                {'error': 'La exportación XLSX requiere el paquete xlsxwriter'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        return respuesta
 
     @action(detail=True, methods=['get'])
     def generar_imagen(self, request, pk=None):
         """Genera la imagen del código QR"""
         codigo_qr_obj = self.get_object()
         
-        # Crear el código QR
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        
         # Datos del QR: incluye el UUID del código
-        qr_data = str(codigo_qr_obj.codigo)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        # Crear la imagen
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convertir a bytes
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        # Retornar la imagen
-        return HttpResponse(buffer, content_type='image/png')
+        return HttpResponse(imagen_png(codigo_qr_obj.codigo), content_type='image/png')
 
     @action(detail=True, methods=['get'])
     def generar_base64(self, request, pk=None):
         """Genera el código QR en formato base64"""
         codigo_qr_obj = self.get_object()
         
-        # Crear el código QR
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        
-        qr_data = str(codigo_qr_obj.codigo)
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        buffer.seek(0)
-        
-        # Convertir a base64
-        img_base64 = base64.b64encode(buffer.getvalue()).decode()
-        
-        nombre = codigo_qr_obj.visitante_nombre if codigo_qr_obj.visitante_nombre else (codigo_qr_obj.estudiante.nombre if codigo_qr_obj.estudiante else 'Desconocido')
+        nombre = codigo_qr_obj.titular.nombre if codigo_qr_obj.titular.nombre else (codigo_qr_obj.estudiante.nombre if codigo_qr_obj.estudiante else 'Desconocido')
         
         return Response({
             'codigo': str(codigo_qr_obj.codigo),
             'tipo_comida': codigo_qr_obj.tipo_comida,
             'estudiante': nombre,
-            'imagen_base64': f'data:image/png;base64,{img_base64}'
+            'imagen_base64': imagen_data_uri(codigo_qr_obj.codigo)
         })
 
     @action(detail=False, methods=['get'])
@@ -278,9 +294,9 @@ class CodigoQRViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Buscar por visitante_id primero, sino por estudiante_id
-        codigos = CodigoQR.objects.filter(visitante_id=estudiante_id)
+        # Buscar por el documento del titular primero, sino por estudiante_id
+        codigos = self.get_queryset().filter(titular__documento=estudiante_id)
         if not codigos.exists():
-            codigos = CodigoQR.objects.filter(estudiante_id=estudiante_id)
+            codigos = self.get_queryset().filter(estudiante_id=estudiante_id)
         serializer = self.get_serializer(codigos, many=True)
         return Response(serializer.data)
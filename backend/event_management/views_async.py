@@ -0,0 +1,42 @@
+"""
+Vistas asíncronas (servidas con ASGI, ver ``config/asgi.py``).
+
+``validar_codigo_async`` es la versión asíncrona de ``CodigoQRViewSet.validar``:
+mismas entradas, mensajes y códigos de estado, pero la espera de la BD no
+ocupa un hilo, así que un proceso atiende cientos de escaneos simultáneos.
+DRF no soporta vistas asíncronas, por eso es una vista de Django.
+"""
+from datetime import timezone as dt_timezone
+
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .models import Redencion
+from .redenciones import aredimir_escaneo, estacion_de, registrar as registrar_redencion
+from .serializers import fecha_iso
+from .validacion import MENSAJE_VALIDADO, codigo_de_peticion, nombre_titular
+
+
+@csrf_exempt  # Igual que las vistas de DRF sin sesión
+@require_POST
+async def validar_codigo_async(request):
+    """Valida y marca un código QR como usado"""
+    estacion = estacion_de(request)
+    codigo_uuid, error = codigo_de_peticion(request)
+    if error:
+        registrar_redencion(None, Redencion.NO_VALIDO, estacion=estacion)
+        datos, estado = error
+        return JsonResponse(datos, status=estado)
+
+    fila, error = await aredimir_escaneo(codigo_uuid, estacion)
+    if error:
+        return JsonResponse({'codigo': [error]}, status=400)
+
+    return JsonResponse({
+        'mensaje': MENSAJE_VALIDADO,
+        'estudiante': nombre_titular(fila),
+        'tipo_comida': fila['tipo_comida'],
+        # En UTC, como la fecha que devuelve validar con el encoder de DRF
+        'fecha_uso': fecha_iso(fila['fecha_uso'], dt_timezone.utc),
+    })
@@ -0,0 +1,39 @@
+"""
+Estaciones de escaneo: latido y actividad en vivo.
+
+``latido`` es deliberadamente mínimo (sin DRF ni BD): solo anota en
+``agregador_estaciones`` que la estación de ``X-Estacion`` sigue conectada;
+el hilo del agregador lo lleva a ``Estacion`` en su próximo volcado.
+"""
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import viewsets
+
+from .estaciones import agregador_estaciones
+from .models import Estacion
+from .redenciones import estacion_de
+from .serializers import EstacionSerializer
+
+
+@csrf_exempt
+def latido(request):
+    """Latido de una estación (POST con ``X-Estacion``); responde 204 sin cuerpo"""
+    if request.method != 'POST':
+        response = JsonResponse({'detail': f'Método "{request.method}" no permitido.'}, status=405)
+        response['Allow'] = 'POST, OPTIONS'
+        return response
+    estacion = estacion_de(request)
+    if not estacion:
+        return JsonResponse({'error': 'Falta la cabecera X-Estacion'}, status=400)
+    agregador_estaciones.registrar_latido(estacion)
+    return HttpResponse(status=204)
+
+
+class EstacionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Estaciones registradas con sus totales y, si este proceso las vio, el ritmo
+    del último minuto, la tasa de rechazo y si siguen activas.
+    """
+    queryset = Estacion.objects.all()
+    serializer_class = EstacionSerializer
+    pagination_class = None
@@ -0,0 +1,52 @@
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from .archivo import FILTROS_ARCHIVO, buscar_archivados
+from .models import CodigoQR, Evento
+from .serializers import CodigoQRSerializer, EventoSerializer
+from .validacion import normalizar_codigo
+
+
+class EventoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Eventos (solo lectura). ``codigos`` consulta los códigos de un evento por
+    ``?codigo=``, ``?email=`` o ``?identificacion=``: en la tabla si sigue
+    vivo o en su JSONL.gz si ya se archivó.
+    """
+    queryset = Evento.objects.all()
+    serializer_class = EventoSerializer
+    pagination_class = None
+
+    # Máximo de códigos devueltos por consulta
+    LIMITE_CODIGOS = 100
+
+    @action(detail=True, methods=['get'])
+    def codigos(self, request, pk=None):
+        evento = self.get_object()
+        filtros = {
+            parametro: request.query_params[parametro].strip()
+            for parametro in FILTROS_ARCHIVO
+            if request.query_params.get(parametro, '').strip()
+        }
+        if not filtros:
+            return Response(
+                {'error': f'Indica al menos un filtro: {", ".join(FILTROS_ARCHIVO)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if 'codigo' in filtros:
+            codigo_uuid = normalizar_codigo(filtros['codigo'])
+            if codigo_uuid is None:
+                return Response([])
+            filtros['codigo'] = str(codigo_uuid)
+
+        if evento.archivado:
+            claves = {FILTROS_ARCHIVO[parametro][1]: valor for parametro, valor in filtros.items()}
+            return Response(buscar_archivados(evento, claves, self.LIMITE_CODIGOS))
+        # Sin distinguir mayúsculas, como la búsqueda en el archivo
+        condiciones = {}
+        for parametro, valor in filtros.items():
+            campo = FILTROS_ARCHIVO[parametro][0]
+            condiciones[campo if parametro == 'codigo' else f'{campo}__iexact'] = valor
+        codigos = CodigoQR.objects.filter(evento=evento, **condiciones).select_related('titular')[:self.LIMITE_CODIGOS]
+        return Response(CodigoQRSerializer(codigos, many=True).data)
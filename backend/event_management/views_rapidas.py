@@ -0,0 +1,86 @@
+"""
+Validación ligera de códigos QR.
+
+``validar_rapido`` responde exactamente lo mismo que ``CodigoQRViewSet.validar``
+pero sin DRF (negociación de contenido, serializador, ``Response``): el cuerpo
+se lee con ``validacion.codigo_de_peticion`` y el JSON se arma directamente.
+
+``ManejadorValidacion`` es una sub-aplicación WSGI que atiende solo
+``VALIDACION_RAPIDA_RUTA`` con ``VALIDACION_RAPIDA_MIDDLEWARE`` (métricas y
+CORS) en lugar de toda la cadena de ``MIDDLEWARE``; ``config/wsgi.py`` le
+envía esa ruta. La vista también está en ``urls.py`` para ASGI y runserver
+sin la sub-aplicación.
+"""
+import json
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.handlers.exception import convert_exception_to_response
+from django.core.handlers.wsgi import WSGIHandler
+from django.http import HttpResponse
+from django.urls import ResolverMatch
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import MethodNotAllowed
+
+from .models import Redencion
+from .redenciones import estacion_de, redimir_escaneo, registrar as registrar_redencion
+from .serializers import fecha_iso
+from .validacion import MENSAJE_VALIDADO, codigo_de_peticion, nombre_titular
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+def _json(datos, status=200):
+    if orjson is not None:
+        contenido = orjson.dumps(datos)
+    else:
+        contenido = json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode()
+    return HttpResponse(contenido, status=status, content_type='application/json')
+
+
+@csrf_exempt
+def validar_rapido(request):
+    """Valida y marca un código QR como usado (mismas respuestas que ``validar``)"""
+    if request.method != 'POST':
+        response = _json({'detail': str(MethodNotAllowed(request.method).detail)}, status=405)
+        response['Allow'] = 'POST, OPTIONS'
+        return response
+
+    estacion = estacion_de(request)
+    codigo_uuid, error = codigo_de_peticion(request)
+    if error:
+        registrar_redencion(None, Redencion.NO_VALIDO, estacion=estacion)
+        return _json(*error)
+
+    fila, error = redimir_escaneo(codigo_uuid, estacion)
+    if error:
+        return _json({'codigo': [error]}, status=400)
+
+    return _json({
+        'mensaje': MENSAJE_VALIDADO,
+        'estudiante': nombre_titular(fila),
+        'tipo_comida': fila['tipo_comida'],
+        # En UTC, como la fecha que devuelve validar con el encoder de DRF
+        'fecha_uso': fecha_iso(fila['fecha_uso'], dt_timezone.utc),
+    })
+
+
+class ManejadorValidacion(WSGIHandler):
+    """Sub-aplicación WSGI para ``VALIDACION_RAPIDA_RUTA`` con el middleware mínimo"""
+
+    _coincidencia = ResolverMatch(validar_rapido, (), {}, url_name='validar-rapido')
+
+    def load_middleware(self, is_async=False):
+        # Igual que BaseHandler.load_middleware (modo síncrono) con otra lista
+        manejador = convert_exception_to_response(self._despachar)
+        for ruta in reversed(settings.VALIDACION_RAPIDA_MIDDLEWARE):
+            manejador = convert_exception_to_response(import_string(ruta)(manejador))
+        self._middleware_chain = manejador
+
+    def _despachar(self, request):
+        # Sin resolver de URLs: la ruta ya la eligió config/wsgi.py
+        request.resolver_match = self._coincidencia
+        return validar_rapido(request)
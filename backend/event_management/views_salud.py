@@ -0,0 +1,56 @@
+import json
+import os
+
+from django.http import FileResponse, Http404
+from rest_framework import viewsets
+from rest_framework.decorators import action, api_view
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from .monitor import monitor_comidas
+from .perfilado import listar_perfiles, ruta_perfil
+from .resiliencia import estadisticas_conexiones, interruptor_rica
+
+
+@api_view(['GET'])
+def estado_conexiones(request):
+    """Estadísticas de conexiones por alias y estado del circuito de rica_univalle (por proceso)"""
+    return Response({
+        'conexiones': estadisticas_conexiones.por_alias(),
+        'circuito_rica_univalle': interruptor_rica.estadisticas(),
+    })
+
+
+@api_view(['GET'])
+def ritmo_comidas(request):
+    """Canjes por segundo/minuto, tendencia y fin estimado por tipo de comida (en memoria, por proceso)"""
+    return Response(monitor_comidas.estado())
+
+
+class PerfilViewSet(viewsets.ViewSet):
+    """
+    Perfiles capturados por ``PerfiladoMiddleware`` (solo administradores).
+    El listado devuelve los N más lentos (``?n=20``).
+    """
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        try:
+            limite = int(request.query_params.get('n', 20))
+        except ValueError:
+            limite = 20
+        return Response(listar_perfiles(limite))
+
+    def retrieve(self, request, pk=None):
+        ruta = ruta_perfil(pk, 'json')
+        if ruta is None or not os.path.exists(ruta):
+            raise Http404
+        with open(ruta, encoding='utf-8') as archivo:
+            return Response(json.load(archivo))
+
+    @action(detail=True, methods=['get'])
+    def descargar(self, request, pk=None):
+        """Descarga el volcado cProfile (.prof) del perfil"""
+        ruta = ruta_perfil(pk, 'prof')
+        if ruta is None or not os.path.exists(ruta):
+            raise Http404
+        return FileResponse(open(ruta, 'rb'), as_attachment=True, filename=f'{pk}.prof')
@@ -1,15 +1,35 @@
+import json
+import logging
+from contextlib import ExitStack, nullcontext
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, transaction
+from django.http import HttpRequest, StreamingHttpResponse
+from .bloqueos import GENERACION_MASIVA, bloqueo_exclusivo
 from .models import Visitante, CodigoQR
 from .serializers import VisitanteSerializer, CodigoQRSerializer
 from .email_utils import enviar_codigos_qr_email
+from .generacion import VisitanteEmail, crear_codigos_visitante, evento_para_generar, visitantes_sin_codigos
+from .idempotencia import idempotente
+from .mixins import ListadoRapidoMixin
+from .versiones import listado_condicional
+from .resiliencia import BDExternaNoDisponible, leer_con_cache, llamar_rica
+
+logger = logging.getLogger(__name__)
 
+NDJSON = 'application/x-ndjson'
 
-class VisitanteViewSet(viewsets.ReadOnlyModelViewSet):
+
+class VisitanteViewSet(ListadoRapidoMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para consultar Visitantes desde la BD externa rica_univalle.
     Solo operaciones de lectura (la gestión se hace en el otro software).
+    El listado usa la ruta rápida con values() y admite ``?fields=``.
     """
     serializer_class = VisitanteSerializer
     
@@ -22,52 +42,63 @@ class VisitanteViewSet(viewsets.ReadOnlyModelViewSet):
             # Todos los visitantes son considerados activos
             pass
         return queryset
+
+    # La tabla visitantes se modifica en otro software: el ETag cambia por ventana de tiempo
+    @listado_condicional(ventana=settings.VISITANTES_ETAG_SEGUNDOS)
+    def list(self, request, *args, **kwargs):
+        # Lectura a través de la caché con stale-while-revalidate y circuit breaker
+        copia = _PeticionCopiada(request)
+        datos = leer_con_cache(
+            f'visitantes:listado:{request.get_full_path()}',
+            lambda: _leer_visitantes(copia, 'list', kwargs)
+        )
+        return Response(datos)
+
+    def retrieve(self, request, *args, **kwargs):
+        copia = _PeticionCopiada(request)
+        datos = leer_con_cache(
+            f'visitantes:detalle:{request.get_full_path()}',
+            lambda: _leer_visitantes(copia, 'retrieve', kwargs)
+        )
+        return Response(datos)
     
     @action(detail=True, methods=['get'])
     def codigos(self, request, pk=None):
         """Obtiene los códigos QR generados para un visitante"""
-        visitante = self.get_object()
-        # Buscar por email o documento
+        visitante = llamar_rica(self.get_object)
+        # Buscar por email o documento en el evento activo
+        codigos = CodigoQR.objects.del_evento_activo().select_related('titular')
         if visitante.email:
-            codigos = CodigoQR.objects.filter(visitante_email=visitante.email)
+            codigos = codigos.filter(titular__email=visitante.email)
         else:
-            codigos = CodigoQR.objects.filter(visitante_identificacion=visitante.documento)
+            codigos = codigos.filter(titular__documento=visitante.documento)
         serializer = CodigoQRSerializer(codigos, many=True)
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'])
+    @idempotente
     def generar_codigos(self, request, pk=None):
-        """Genera los 3 códigos QR para un visitante (desayuno, almuerzo, refrigerio)"""
-        visitante = self.get_object()
+        """Genera los códigos QR de un visitante (uno por comida, o un ticket con CODIGOS_MODO_TICKET)"""
+        evento_id = evento_para_generar()
+        visitante = llamar_rica(self.get_object)
         
-        # Verificar si ya tiene códigos (buscar por email o documento)
-        codigos_existentes = CodigoQR.objects.filter(visitante_email=visitante.email) if visitante.email else CodigoQR.objects.filter(visitante_identificacion=visitante.documento)
+        # Verificar si ya tiene códigos en el evento activo (buscar por email o documento)
+        del_evento = CodigoQR.objects.del_evento_activo()
+        codigos_existentes = del_evento.filter(titular__email=visitante.email) if visitante.email else del_evento.filter(titular__documento=visitante.documento)
+        ya_tiene_codigos = Response(
+            {'error': 'Este visitante ya tiene códigos QR generados.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
         if codigos_existentes.exists():
-            return Response(
-                {'error': 'Este visitante ya tiene códigos QR generados.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Crear los 3 códigos QR en la BD local
-        tipos_comida = ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO']
-        codigos_creados = []
-        
-        for tipo in tipos_comida:
-            codigo_qr = CodigoQR.objects.create(
-                visitante_id=visitante.documento,  # Guardamos el documento como visitante_id
-                visitante_nombre=visitante.nombre_completo,
-                visitante_identificacion=visitante.documento,
-                visitante_email=visitante.email or f'{visitante.documento}@noemail.com',
-                tipo_comida=tipo
-            )
-            codigos_creados.append(codigo_qr)
+            return ya_tiene_codigos
         
-        # Crear objeto temporal compatible con la función de email
-        class VisitanteEmail:
-            def __init__(self, v):
-                self.nombre = v.nombre_completo
-                self.email = v.email or f'{v.documento}@noemail.com'
-                self.identificacion = v.documento
+        # Crear los códigos QR en la BD local
+        try:
+            with transaction.atomic():
+                codigos_creados = crear_codigos_visitante(visitante, evento_id)
+        except IntegrityError:
+            # Otra petición los creó entre la verificación y el INSERT
+            return ya_tiene_codigos
         
         # Enviar códigos QR por email solo si tiene email válido
         email_enviado = False
@@ -94,24 +125,94 @@ class VisitanteViewSet(viewsets.ReadOnlyModelViewSet):
         )
     
     @action(detail=False, methods=['post'])
+    @idempotente
     def generar_codigos_masivo(self, request):
-        """Genera códigos QR para todos los visitantes que no tengan códigos"""
-        # Obtener todos los visitantes
-        visitantes = Visitante.objects.using('rica_univalle').all()
-        
-        # Filtrar los que NO tienen códigos
-        visitantes_sin_codigos = []
-        for v in visitantes:
-            # Buscar por email o documento
-            if v.email:
-                tiene_codigos = CodigoQR.objects.filter(visitante_email=v.email).exists()
-            else:
-                tiene_codigos = CodigoQR.objects.filter(visitante_identificacion=v.documento).exists()
-            
-            if not tiene_codigos:
-                visitantes_sin_codigos.append(v)
-        
-        if not visitantes_sin_codigos:
+        """
+        Genera códigos QR para todos los visitantes que no tengan códigos. Solo
+        corre una generación masiva a la vez entre todos los procesos. Con
+        ``?stream=ndjson`` el avance se envía mientras se genera, una línea
+        JSON por bloque.
+        """
+        # Antes de abrir el stream: sin evento activo se responde 409, no un 200 con error
+        evento_id = evento_para_generar()
+        pila = ExitStack()
+        if not pila.enter_context(bloqueo_exclusivo(GENERACION_MASIVA)):
+            pila.close()
+            return Response(
+                {'error': 'Ya hay una generación masiva en curso. Intenta de nuevo cuando termine.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if _pide_ndjson(request):
+            # El bloqueo se libera cuando termina (o se corta) el envío, no al retornar
+            response = StreamingHttpResponse(
+                _ConCierre(self._progreso_ndjson(evento_id), pila.close), content_type=NDJSON
+            )
+            response['Cache-Control'] = 'no-cache'
+            # Que nginx no acumule el cuerpo: cada línea debe llegar al cliente al generarse
+            response['X-Accel-Buffering'] = 'no'
+            return response
+        with pila:
+            return self._generar_masivo(evento_id)
+
+    def _bloques_masivo(self, evento_id):
+        """
+        Genera por bloques de ``GENERACION_MASIVA_LOTE`` visitantes (paginando por
+        documento, sin cargar la tabla) y produce el resultado de cada bloque
+        """
+        visitantes = Visitante.objects.using('rica_univalle').order_by('documento')
+        lote = settings.GENERACION_MASIVA_LOTE
+        ultimo = None
+        while True:
+            consulta = visitantes if ultimo is None else visitantes.filter(documento__gt=ultimo)
+            bloque = llamar_rica(lambda: list(consulta[:lote]))
+            if not bloque:
+                return
+            ultimo = bloque[-1].documento
+
+            # Filtrar los que NO tienen códigos en el evento activo (por email o documento)
+            pendientes = visitantes_sin_codigos(bloque)
+            resultado = {'leidos': len(bloque), 'visitantes': [], 'codigos': 0,
+                         'emails_enviados': 0, 'emails_fallidos': 0}
+            # Una sola conexión SMTP para los emails del bloque
+            with get_connection() if any(v.email for v in pendientes) else nullcontext() as conexion:
+                for visitante in pendientes:
+                    try:
+                        with transaction.atomic():
+                            codigos_creados = crear_codigos_visitante(visitante, evento_id)
+                    except IntegrityError:
+                        # Se le generaron por otra vía (generar_codigos) mientras tanto
+                        continue
+                    resultado['codigos'] += len(codigos_creados)
+
+                    # Enviar email solo si tiene email válido
+                    if visitante.email:
+                        if enviar_codigos_qr_email(VisitanteEmail(visitante), codigos_creados, connection=conexion):
+                            resultado['emails_enviados'] += 1
+                        else:
+                            resultado['emails_fallidos'] += 1
+
+                    resultado['visitantes'].append({
+                        'id': visitante.documento,
+                        'nombre': visitante.nombre_completo,
+                        'identificacion': visitante.documento,
+                        'email': visitante.email or 'Sin email'
+                    })
+            yield resultado
+            if len(bloque) < lote:
+                return
+
+    def _generar_masivo(self, evento_id):
+        total_codigos = 0
+        visitantes_procesados = []
+        emails_enviados = 0
+        emails_fallidos = 0
+        for resultado in self._bloques_masivo(evento_id):
+            total_codigos += resultado['codigos']
+            visitantes_procesados.extend(resultado['visitantes'])
+            emails_enviados += resultado['emails_enviados']
+            emails_fallidos += resultado['emails_fallidos']
+
+        if not visitantes_procesados:
             return Response(
                 {
                     'mensaje': 'No hay visitantes sin códigos QR.',
@@ -123,55 +224,9 @@ class VisitanteViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_200_OK
             )
         
-        tipos_comida = ['DESAYUNO', 'ALMUERZO', 'REFRIGERIO']
-        total_codigos = 0
-        visitantes_procesados = []
-        emails_enviados = 0
-        emails_fallidos = 0
-        
-        for visitante in visitantes_sin_codigos:
-            codigos_creados = []
-            for tipo in tipos_comida:
-                codigo = CodigoQR.objects.create(
-                    visitante_id=visitante.documento,  # Guardamos el documento como visitante_id
-                    visitante_nombre=visitante.nombre_completo,
-                    visitante_identificacion=visitante.documento,
-                    visitante_email=visitante.email or f'{visitante.documento}@noemail.com',
-                    tipo_comida=tipo
-                )
-                codigos_creados.append(codigo)
-                total_codigos += 1
-            
-            # Crear objeto temporal
-            class VisitanteEmail:
-                def __init__(self, v):
-                    self.nombre = v.nombre_completo
-                    self.email = v.email or f'{v.documento}@noemail.com'
-                    self.identificacion = v.documento
-            
-            # Enviar email solo si tiene email válido
-            if visitante.email:
-                if enviar_codigos_qr_email(VisitanteEmail(visitante), codigos_creados):
-                    emails_enviados += 1
-                else:
-                    emails_fallidos += 1
-            
-            visitantes_procesados.append({
-                'id': visitante.documento,
-                'nombre': visitante.nombre_completo,
-                'identificacion': visitante.documento,
-                'email': visitante.email or 'Sin email'
-            })
-        
-        mensaje = f'Se generaron códigos QR para {len(visitantes_procesados)} visitantes.'
-        if emails_enviados > 0:
-            mensaje += f' Se enviaron {emails_enviados} emails exitosamente.'
-        if emails_fallidos > 0:
-            mensaje += f' {emails_fallidos} emails fallaron.'
-        
         return Response(
             {
-                'mensaje': mensaje,
+                'mensaje': _mensaje_masivo(len(visitantes_procesados), emails_enviados, emails_fallidos),
                 'total_codigos_generados': total_codigos,
                 'estudiantes_procesados': visitantes_procesados,
                 'emails_enviados': emails_enviados,
@@ -179,3 +234,106 @@ class VisitanteViewSet(viewsets.ReadOnlyModelViewSet):
             },
             status=status.HTTP_201_CREATED
         )
+
+    def _progreso_ndjson(self, evento_id):
+        """
+        Líneas NDJSON de la generación masiva: ``inicio`` con el total de
+        visitantes, un ``progreso`` por bloque con sus visitantes procesados y
+        los acumulados, y ``fin`` (o ``error`` si falla a mitad de camino)
+        """
+        totales = {'visitantes_leidos': 0, 'visitantes_procesados': 0, 'total_codigos_generados': 0,
+                   'emails_enviados': 0, 'emails_fallidos': 0}
+        try:
+            total = llamar_rica(lambda: Visitante.objects.using('rica_univalle').count())
+            yield _linea({'tipo': 'inicio', 'total_visitantes': total})
+            for numero, resultado in enumerate(self._bloques_masivo(evento_id), start=1):
+                totales['visitantes_leidos'] += resultado['leidos']
+                totales['visitantes_procesados'] += len(resultado['visitantes'])
+                totales['total_codigos_generados'] += resultado['codigos']
+                totales['emails_enviados'] += resultado['emails_enviados']
+                totales['emails_fallidos'] += resultado['emails_fallidos']
+                yield _linea({
+                    'tipo': 'progreso',
+                    'bloque': numero,
+                    'total_visitantes': total,
+                    **totales,
+                    'visitantes': resultado['visitantes'],
+                })
+        except (BDExternaNoDisponible, DatabaseError) as e:
+            # El estado HTTP ya se envió: el fallo va en el cuerpo
+            logger.exception('Generación masiva interrumpida')
+            detalle = e.detail if isinstance(e, BDExternaNoDisponible) else 'Error de base de datos'
+            yield _linea({'tipo': 'error', 'error': str(detalle), **totales})
+            return
+
+        if totales['visitantes_procesados']:
+            mensaje = _mensaje_masivo(totales['visitantes_procesados'], totales['emails_enviados'], totales['emails_fallidos'])
+        else:
+            mensaje = 'No hay visitantes sin códigos QR.'
+        yield _linea({'tipo': 'fin', 'mensaje': mensaje, **totales})
+
+
+class _PeticionCopiada(HttpRequest):
+    """Ruta, parámetros y cabeceras de una petición, para repetir la lectura más tarde"""
+
+    def __init__(self, request):
+        super().__init__()
+        self.method = 'GET'
+        self.path = request.path
+        self.path_info = request.path_info
+        self.GET = request.GET.copy()
+        self.META = {clave: valor for clave, valor in request.META.items() if isinstance(valor, str)}
+        self._esquema = request.scheme
+
+    def _get_scheme(self):
+        return self._esquema
+
+
+def _leer_visitantes(peticion, accion, kwargs):
+    """
+    Datos de ``list``/``retrieve`` de la clase base en una vista nueva: el
+    refresco en segundo plano corre después de responder y no debe usar la
+    petición ni la vista del cliente
+    """
+    vista = VisitanteViewSet(action_map={'get': accion}, args=(), kwargs=kwargs, format_kwarg=None, headers={})
+    vista.request = vista.initialize_request(peticion)
+    return getattr(super(VisitanteViewSet, vista), accion)(vista.request, **kwargs).data
+
+
+def _mensaje_masivo(procesados, emails_enviados, emails_fallidos):
+    mensaje = f'Se generaron códigos QR para {procesados} visitantes.'
+    if emails_enviados > 0:
+        mensaje += f' Se enviaron {emails_enviados} emails exitosamente.'
+    if emails_fallidos > 0:
+        mensaje += f' {emails_fallidos} emails fallaron.'
+    return mensaje
+
+
+def _pide_ndjson(request):
+    # Por parámetro y no por Accept: la negociación de DRF respondería 406
+    return request.query_params.get('stream') == 'ndjson'
+
+
+def _linea(datos):
+    return json.dumps(datos, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+
+
+class _ConCierre:
+    """
+    Iterable para ``StreamingHttpResponse`` que llama a ``al_cerrar`` cuando el
+    servidor cierra la respuesta, aunque el cliente se desconecte antes de
+    empezar a leer (un generador sin iniciar no ejecuta su ``finally``)
+    """
+
+    def __init__(self, iterable, al_cerrar):
+        self.iterable = iterable
+        self.al_cerrar = al_cerrar
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        try:
+            self.iterable.close()
+        finally:
+            self.al_cerrar()
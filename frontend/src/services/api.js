@@ -19,13 +19,27 @@ export const createEstudiante = (data) => api.post('/estudiantes/', data);
 export const updateEstudiante = (id, data) => api.put(`/estudiantes/${id}/`, data);
 export const deleteEstudiante = (id) => api.delete(`/estudiantes/${id}/`);
 export const getEstudianteConCodigos = (id) => api.get(`/estudiantes/${id}/con_codigos/`);
-export const generarCodigosQR = (id) => api.post(`/estudiantes/${id}/generar_codigos/`);
-export const generarCodigosMasivo = () => api.post('/estudiantes/generar_codigos_masivo/');
+// Una clave nueva por clic en Idempotency-Key: si la petición se repite (reintento,
+// proxy), el servidor devuelve la respuesta guardada en lugar de generar de nuevo
+const conClaveIdempotencia = () => ({
+  headers: {
+    'Idempotency-Key': window.crypto?.randomUUID?.() ?? `${Date.now()}-${Math.random().toString(36).slice(2)}`,
+  },
+});
+export const generarCodigosQR = (id) =>
+  api.post(`/estudiantes/${id}/generar_codigos/`, null, conClaveIdempotencia());
+export const generarCodigosMasivo = () =>
+  api.post('/estudiantes/generar_codigos_masivo/', null, conClaveIdempotencia());
 
 // Códigos QR
 export const getCodigosQR = () => api.get('/codigos-qr/');
 export const getCodigoQR = (id) => api.get(`/codigos-qr/${id}/`);
-export const validarCodigoQR = (codigo) => api.post('/codigos-qr/validar/', { codigo });
+// La estación de escaneo (p. ej. 'puerta-1') se guarda en localStorage y se envía en X-Estacion
+export const validarCodigoQR = (codigo) => {
+  const estacion = localStorage.getItem('estacion');
+  const headers = estacion ? { 'X-Estacion': estacion } : {};
+  return api.post('/codigos-qr/validar/', { codigo }, { headers });
+};
 export const getCodigoQRImagen = (id) => `${API_URL}/codigos-qr/${id}/generar_imagen/`;
 export const getCodigoQRBase64 = (id) => api.get(`/codigos-qr/${id}/generar_base64/`);
 export const getCodigosPorEstudiante = (estudianteId) => 